@@ -0,0 +1,332 @@
+"""
+Backends do benchmark: a mesma interface para MySQL, MongoDB e Redis.
+
+Cada backend abre a sua conexão (connect), verifica se os dados foram
+carregados (check: None ou um aviso), executa uma query TPC-H com os
+parâmetros nomeados de tpch_params (run -> linhas) e fecha a conexão (close).
+
+Quem mede o tempo é o chamador, sempre em volta de run, e run não imprime
+nada. Quando o banco permite separar as fases, run deixa em last_phases um
+dict com os ns de cada fase: 'execute' e 'fetch' e, no MySQL com
+fetch_batch, 'first_row' e 'last_row' (desde o início da query até a
+primeira/última linha). Senão last_phases fica None.
+
+profile(query, params) executa a query mais uma vez, fora das medições, e
+devolve o que o banco informa sobre ela: os explain('executionStats') dos
+aggregate no MongoDB e os comandos/round trips e o tempo no Redis x Python
+no Redis (None no MySQL).
+"""
+import os
+import sys
+import threading
+import time
+
+from mysql.connector import pooling
+from pymongo import MongoClient
+
+import index_advisor
+import tpch_params
+import tpch_sql
+from mongodb_queries import MONGODB_QUERIES
+
+# Configurações de conexão
+MYSQL_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',  # Ajuste conforme necessário
+    'password': 'fkvpqg91',  # Ajuste conforme necessário
+    'database': 'tpch'
+}
+
+# conexões abertas no pool na primeira chamada de mysql_pool (uma por stream)
+MYSQL_POOL_SIZE = 1
+
+MONGODB_URI = 'mongodb://localhost:27017/'
+MONGODB_DB = 'tpch'
+
+PROJ2_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'proj2')
+
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+
+def mysql_pool(size=None):
+    """Pool de conexões do MySQL do processo, criado na primeira chamada (size só vale nela)"""
+    global _mysql_pool
+    with _mysql_pool_lock:
+        if _mysql_pool is None:
+            _mysql_pool = pooling.MySQLConnectionPool(
+                pool_name='tpch', pool_size=size or MYSQL_POOL_SIZE, **MYSQL_CONFIG
+            )
+        return _mysql_pool
+
+class Backend:
+    """Interface comum; stream é o número do stream (nome da view da Q15 no MySQL)"""
+    name = None
+    label = None
+
+    def __init__(self, stream=0, queries_dir=tpch_sql.QUERIES_DIR):
+        self.stream = stream
+        self.queries_dir = queries_dir
+        self.last_phases = None
+
+    def connect(self):
+        raise NotImplementedError
+
+    def check(self):
+        """None se os dados estão carregados, senão o texto do aviso"""
+        return None
+
+    def version(self):
+        """Versão do servidor (vai no histórico do benchmark), None se desconhecida"""
+        return None
+
+    def server_memory(self):
+        """Bytes de memória ocupados pelos dados no servidor, None se o banco não informa"""
+        return None
+
+    def run(self, query, params):
+        """Executa a query ('Q1'..'Q22') com os parâmetros nomeados e retorna as linhas"""
+        raise NotImplementedError
+
+    def profile(self, query, params):
+        """Perfil de uma execução no banco (dict serializável em JSON), None se não há"""
+        return None
+
+    def close(self):
+        pass
+
+class MySQLBackend(Backend):
+    """
+    Uma conexão do pool para a execução inteira e o texto SQL de cada
+    (query, parâmetros) renderizado uma vez só. fetch_batch > 0 lê as linhas
+    do cursor sem buffer em lotes (fetchmany), à medida que o servidor envia,
+    e mede o tempo até a primeira e até a última linha.
+    """
+    name = 'mysql'
+    label = 'MySQL'
+
+    def __init__(self, stream=0, queries_dir=tpch_sql.QUERIES_DIR, fetch_batch=0):
+        super().__init__(stream, queries_dir)
+        self.fetch_batch = fetch_batch
+        self._statements = {}
+
+    def connect(self):
+        self.conn = mysql_pool().get_connection()
+
+    def check(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM orders")
+        count = cursor.fetchall()[0][0]
+        cursor.close()
+        if count == 0:
+            return "MySQL parece estar vazio! Carregue as tabelas com load_tbls.sql."
+        return None
+
+    def version(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT VERSION()")
+        version = cursor.fetchall()[0][0]
+        cursor.close()
+        return version
+
+    def server_memory(self):
+        """Páginas de dados no buffer pool do InnoDB"""
+        cursor = self.conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_buffer_pool_bytes_data'")
+        rows = cursor.fetchall()
+        cursor.close()
+        return int(rows[0][1]) if rows else None
+
+    def statements(self, query, params):
+        """Comandos de tpch_sql.render_query, renderizados uma vez por conjunto de parâmetros"""
+        n = int(query[1:])
+        values = tpch_params.sql_params(n, params)
+        key = (n, tuple(values))
+        if key not in self._statements:
+            self._statements[key] = tpch_sql.render_query(
+                n, values, stream=self.stream, queries_dir=self.queries_dir
+            )
+        return self._statements[key]
+
+    def run(self, query, params):
+        """
+        Executa os comandos da query (a Q15 cria e remove uma view); as linhas
+        são as do último comando que retorna linhas.
+        Execução: até cursor.execute voltar (cursor sem buffer); fetch: a leitura das linhas.
+        """
+        cursor = self.conn.cursor()
+
+        rows = []
+        phases = {'execute': 0, 'fetch': 0}
+        query_start = time.perf_counter_ns()
+        try:
+            for statement in self.statements(query, params):
+                start = time.perf_counter_ns()
+                cursor.execute(statement)
+                executed = time.perf_counter_ns()
+                phases['execute'] += executed - start
+                if cursor.with_rows:
+                    if self.fetch_batch > 0:
+                        rows = self._stream_rows(cursor, query_start, phases)
+                    else:
+                        rows = cursor.fetchall()
+                    phases['fetch'] += time.perf_counter_ns() - executed
+        finally:
+            cursor.close()
+
+        self.last_phases = phases
+        return rows
+
+    def _stream_rows(self, cursor, query_start, phases):
+        """Lê o resultado em lotes de fetch_batch linhas anotando first_row e last_row"""
+        rows = []
+        while True:
+            batch = cursor.fetchmany(self.fetch_batch)
+            if not batch:
+                break
+            if not rows:
+                phases['first_row'] = time.perf_counter_ns() - query_start
+            rows.extend(batch)
+        phases['last_row'] = time.perf_counter_ns() - query_start
+        return rows
+
+    def close(self):
+        # devolve a conexão ao pool
+        self.conn.close()
+
+class PhaseDatabase:
+    """
+    Envolve o Database do pymongo e anota quando o último aggregate() devolveu
+    o cursor. Até ali é a fase de execução (inclui os distinct feitos antes e
+    o primeiro lote); o resto (list(cursor), getMore) é a fase de fetch.
+    Guarda também (coleção, pipeline) de cada aggregate, para o explain.
+    """
+    def __init__(self, db):
+        self._db = db
+        self.executed_at = None
+        self.aggregates = []
+
+    def __getitem__(self, name):
+        return _PhaseCollection(self._db[name], self)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+class _PhaseCollection:
+    def __init__(self, collection, owner):
+        self._collection = collection
+        self._owner = owner
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        cursor = self._collection.aggregate(pipeline, *args, **kwargs)
+        self._owner.executed_at = time.perf_counter_ns()
+        self._owner.aggregates.append((self._collection.name, pipeline))
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+class MongoDBBackend(Backend):
+    name = 'mongodb'
+    label = 'MongoDB'
+
+    def connect(self):
+        self.client = MongoClient(MONGODB_URI)
+        self.db = self.client[MONGODB_DB]
+
+    def check(self):
+        if self.db['orders'].count_documents({}, limit=1) == 0:
+            return "MongoDB parece estar vazio! Execute primeiro o script load_mongodb.py para carregar os dados."
+        return None
+
+    def version(self):
+        return self.client.server_info()['version']
+
+    def server_memory(self):
+        """Memória residente do mongod (serverStatus informa em MB)"""
+        return self.client.admin.command('serverStatus')['mem']['resident'] * 1024 * 1024
+
+    def run(self, query, params):
+        """Funções de mongodb_queries.py; params pode trazer as variantes (ex.: embedded_customer)"""
+        phased = PhaseDatabase(self.db)
+        start = time.perf_counter_ns()
+        rows = MONGODB_QUERIES[query](phased, **params)
+        end = time.perf_counter_ns()
+        executed = phased.executed_at or end
+        self.last_phases = {'execute': executed - start, 'fetch': end - executed}
+        return rows
+
+    def profile(self, query, params):
+        """
+        explain('executionStats') de cada aggregate que a query executou, com
+        os parâmetros já aplicados: estágios do plano, índices usados,
+        documentos/chaves examinados e o tempo estimado de cada estágio.
+        """
+        phased = PhaseDatabase(self.db)
+        MONGODB_QUERIES[query](phased, **params)
+        plans = []
+        for collection, pipeline in phased.aggregates:
+            plan = {'collection': collection}
+            try:
+                explain = index_advisor.explain_pipeline(self.db, collection, pipeline)
+            except Exception as e:
+                plan['error'] = f"{type(e).__name__}: {e}"
+            else:
+                plan.update(index_advisor.summarize_explain(explain))
+                plan['stage_timings'] = index_advisor.stage_timings(explain)
+            plans.append(plan)
+        return {'explain': plans}
+
+    def close(self):
+        self.client.close()
+
+class RedisBackend(Backend):
+    """
+    Queries de proj2/tpch_redis_queries.py (Q4-Q22 exigem
+    load_tpch_redis.py --query-indexes). As junções são no Python, então não
+    há fase de fetch separada. O cliente é o do módulo; o pool dele entrega
+    uma conexão diferente para cada thread que está executando um comando.
+    """
+    name = 'redis'
+    label = 'Redis'
+
+    def connect(self):
+        if PROJ2_DIR not in sys.path:
+            sys.path.insert(0, PROJ2_DIR)
+        import tpch_redis_queries
+        tpch_redis_queries.VERBOSE = False
+        self.queries = tpch_redis_queries
+        self.queries.r.ping()
+
+    def check(self):
+        client = self.queries.r
+        if not client.exists("lineitem:by_shipdate"):
+            return "Redis parece estar vazio! Execute primeiro proj2/load_tpch_redis.py."
+        if not client.exists("orders:sum_qty"):
+            return "Redis sem os índices de Q4-Q22; carregue com load_tpch_redis.py --query-indexes."
+        return None
+
+    def version(self):
+        return self.queries.r.info('server')['redis_version']
+
+    def server_memory(self):
+        return self.queries.r.info('memory')['used_memory']
+
+    def run(self, query, params):
+        return self.queries.REDIS_QUERIES[query](**params)[1]
+
+    def profile(self, query, params):
+        """Comandos por tipo, round trips e tempo no Redis x no Python (CountingRedis)"""
+        before = self.queries.r.profile()
+        start = time.perf_counter_ns()
+        self.queries.REDIS_QUERIES[query](**params)
+        return self.queries.profile_since(before, time.perf_counter_ns() - start)
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'mongodb': MongoDBBackend,
+    'redis': RedisBackend,
+}
+
+def create(name, stream=0, queries_dir=tpch_sql.QUERIES_DIR, **options):
+    """options: parâmetros próprios do backend (ex.: fetch_batch do MySQL)"""
+    return BACKENDS[name](stream=stream, queries_dir=queries_dir, **options)
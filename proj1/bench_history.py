@@ -0,0 +1,217 @@
+"""
+Histórico das execuções do benchmark e detecção de regressões.
+
+Cada execução do benchmark.py é acrescentada como uma linha JSON em
+benchmark_history.jsonl: configuração (queries, SF, parâmetros), ambiente
+(commit do git, versões dos bancos, máquina) e os resultados de measure com
+as amostras brutas. A comparação entre duas execuções usa o teste de
+Mann-Whitney nas amostras do tempo total de cada (query, banco): a mudança só
+conta como regressão/melhora se p < alpha e a mediana variou pelo menos
+min_change.
+
+Uso:
+    python proj1/bench_history.py list
+    python proj1/bench_history.py compare --baseline <run_id|commit|índice> [--run latest]
+    python proj1/bench_history.py report --baseline previous   (reescreve o README.md)
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import backends
+import bench_stats
+
+HISTORY_FILE = 'benchmark_history.jsonl'
+
+# configurações que precisam ser iguais para os tempos serem comparáveis
+COMPARABLE_SETTINGS = ['scale_factor', 'param_sets', 'seed', 'mysql_fetch_batch']
+
+ALPHA = 0.05
+MIN_CHANGE = 0.05
+
+def git_commit():
+    """{'commit', 'dirty'} do repositório, ou None fora de um repositório git"""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_dir, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {'commit': commit, 'dirty': bool(status.strip())}
+
+def host_info():
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+def environment(connected):
+    """Ambiente da execução; connected: {banco: backend conectado}"""
+    versions = {}
+    for engine, backend in connected.items():
+        try:
+            versions[engine] = backend.version()
+        except Exception:
+            versions[engine] = None
+    return {'git': git_commit(), 'host': host_info(), 'engine_versions': versions}
+
+def make_record(settings, results):
+    """Linha do histórico: settings (com o ambiente) e a lista de resultados de measure"""
+    record = dict(settings)
+    record['run_id'] = settings['timestamp']
+    record['results'] = list(results.values())
+    return record
+
+def append_run(record, path=HISTORY_FILE):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def load_runs(path=HISTORY_FILE):
+    """Execuções do histórico, da mais antiga para a mais recente"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_run(runs, ref='latest'):
+    """
+    Execução pelo run_id, pelo prefixo do commit (a mais recente dele), pelo
+    índice (-1 é a última) ou por 'latest'/'previous'.
+    """
+    if not runs:
+        raise ValueError("histórico vazio")
+    if ref in (None, 'latest'):
+        return runs[-1]
+    if ref == 'previous':
+        if len(runs) < 2:
+            raise ValueError("o histórico tem uma execução só")
+        return runs[-2]
+    # prefixos de commit têm pelo menos 7 caracteres, índices menos
+    if ref.lstrip('-').isdigit() and len(ref) < 7:
+        if not -len(runs) <= int(ref) < len(runs):
+            raise ValueError(f"índice fora do histórico: {ref}")
+        return runs[int(ref)]
+    for run in reversed(runs):
+        git = (run.get('environment') or {}).get('git') or {}
+        if run['run_id'] == ref or (len(ref) >= 7 and git.get('commit', '').startswith(ref)):
+            return run
+    raise ValueError(f"execução não encontrada no histórico: {ref}")
+
+def run_label(run):
+    git = (run.get('environment') or {}).get('git')
+    if not git:
+        return run['run_id']
+    return f"{run['run_id']} ({git['commit'][:7]}{'-dirty' if git['dirty'] else ''})"
+
+def results_by_key(run):
+    return {(r['query'], r['engine']): r for r in run['results']}
+
+def setting_differences(baseline, current):
+    """Configurações que mudaram entre as execuções (os tempos podem não ser comparáveis)"""
+    return [k for k in COMPARABLE_SETTINGS if baseline.get(k) != current.get(k)]
+
+def compare_runs(baseline, current, alpha=ALPHA, min_change=MIN_CHANGE):
+    """
+    Uma linha por (query, banco) medido com sucesso nas duas execuções:
+    medianas (ms), variação relativa, p-valor e o veredito.
+    """
+    base = results_by_key(baseline)
+    rows = []
+    for key, result in results_by_key(current).items():
+        previous = base.get(key)
+        if previous is None or previous['status'] != 'ok' or result['status'] != 'ok':
+            continue
+        base_ms = previous['stats']['total']['median_ms']
+        current_ms = result['stats']['total']['median_ms']
+        change = current_ms / base_ms - 1 if base_ms > 0 else 0.0
+        p_value = bench_stats.mann_whitney_p(previous['total_ns'], result['total_ns'])
+        if p_value is not None and p_value < alpha and abs(change) >= min_change:
+            verdict = 'regressão' if change > 0 else 'melhora'
+        else:
+            verdict = 'sem mudança'
+        rows.append({
+            'query': key[0], 'engine': key[1],
+            'baseline_ms': base_ms, 'current_ms': current_ms,
+            'change': change, 'p_value': p_value, 'verdict': verdict,
+        })
+    engines = list(backends.BACKENDS)
+    rows.sort(key=lambda r: (int(r['query'][1:]), engines.index(r['engine'])))
+    return rows
+
+def comparison_lines(comparison, engine_labels):
+    """Tabela markdown da comparação"""
+    lines = [
+        "| Query | Banco | Base (ms) | Atual (ms) | Variação | p | Resultado |",
+        "|-------|-------|-----------|------------|----------|---|-----------|",
+    ]
+    for r in comparison:
+        p_value = f"{r['p_value']:.3f}" if r['p_value'] is not None else "-"
+        verdict = f"**{r['verdict']}**" if r['verdict'] != 'sem mudança' else r['verdict']
+        lines.append(f"| {r['query']} | {engine_labels.get(r['engine'], r['engine'])} | {r['baseline_ms']:.1f} | "
+                     f"{r['current_ms']:.1f} | {r['change']:+.1%} | {p_value} | {verdict} |")
+    return lines
+
+def print_comparison(baseline, current, comparison, engine_labels):
+    print(f"Base: {run_label(baseline)}")
+    print(f"Atual: {run_label(current)}")
+    differences = setting_differences(baseline, current)
+    if differences:
+        print(f"AVISO: configurações diferentes ({', '.join(differences)}); os tempos podem não ser comparáveis")
+    for line in comparison_lines(comparison, engine_labels):
+        print(line)
+    regressions = sum(1 for r in comparison if r['verdict'] == 'regressão')
+    improvements = sum(1 for r in comparison if r['verdict'] == 'melhora')
+    print(f"{regressions} regressões, {improvements} melhoras")
+
+def main():
+    # import aqui: benchmark.py importa este módulo
+    import benchmark
+
+    parser = argparse.ArgumentParser(description="Histórico do benchmark TPC-H e comparação entre execuções")
+    parser.add_argument('--history', default=HISTORY_FILE, help="arquivo JSONL do histórico")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="lista as execuções do histórico")
+    for name, help_text in (('compare', "compara uma execução com a de referência (sai com 1 se houver regressão)"),
+                            ('report', "reescreve o README.md com uma execução e a variação em relação à base")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument('--run', default='latest', help="execução avaliada (padrão: a última)")
+        cmd.add_argument('--baseline', default='previous',
+                         help="execução de referência: run_id, prefixo do commit, índice ou 'previous'")
+        cmd.add_argument('--alpha', type=float, default=ALPHA, help="nível de significância do teste")
+        cmd.add_argument('--min-change', type=float, default=MIN_CHANGE,
+                         help="variação mínima da mediana para contar (0.05 = 5%%)")
+    args = parser.parse_args()
+
+    runs = load_runs(args.history)
+    if args.command == 'list':
+        for i, run in enumerate(runs):
+            versions = ", ".join(f"{benchmark.ENGINE_LABELS.get(e, e)} {v}"
+                                 for e, v in (run.get('environment') or {}).get('engine_versions', {}).items() if v)
+            print(f"{i:>3}  {run_label(run)}  SF {run.get('scale_factor')}  {', '.join(run['queries'])}  {versions}")
+        return
+
+    try:
+        current = find_run(runs, args.run)
+        baseline = find_run(runs, args.baseline)
+    except ValueError as e:
+        parser.error(str(e))
+    comparison = compare_runs(baseline, current, args.alpha, args.min_change)
+
+    if args.command == 'compare':
+        print_comparison(baseline, current, comparison, benchmark.ENGINE_LABELS)
+        if any(r['verdict'] == 'regressão' for r in comparison):
+            sys.exit(1)
+    else:
+        benchmark.generate_report(results_by_key(current), current['queries'], current['engines'], current,
+                                  history=(baseline, comparison))
+        print("Relatório salvo no README.md")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Estatísticas das amostras de tempo do benchmark.
+
+As amostras vêm de time.perf_counter_ns (nanossegundos); os resumos são em
+milissegundos.
+"""
+import math
+import statistics
+
+def percentile(values, p):
+    """Percentil p (0-100) com interpolação linear entre as amostras ordenadas"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def summarize(samples_ns):
+    """min/mediana/média/p95/p99/máx/desvio padrão (ms) de uma lista de amostras em ns"""
+    if not samples_ns:
+        return None
+    ms = [s / 1e6 for s in samples_ns]
+    return {
+        'runs': len(ms),
+        'min_ms': min(ms),
+        'median_ms': statistics.median(ms),
+        'mean_ms': statistics.fmean(ms),
+        'p95_ms': percentile(ms, 95),
+        'p99_ms': percentile(ms, 99),
+        'max_ms': max(ms),
+        'stddev_ms': statistics.stdev(ms) if len(ms) > 1 else 0.0,
+    }
+
+def mann_whitney_p(a, b):
+    """
+    p-valor bilateral do teste de Mann-Whitney (aproximação normal com correção
+    de empates e de continuidade) entre duas listas de amostras.
+    Não supõe distribuição normal dos tempos; None se alguma lista está vazia.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return None
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n1 + n2
+    rank_sum_a = 0.0
+    tie_term = 0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # empates recebem a média dos postos (1-based)
+        avg_rank = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum_a += avg_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        i = j + 1
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0) / math.sqrt(variance)
+    return math.erfc(z / math.sqrt(2))
@@ -1,196 +1,550 @@
+import argparse
+import csv
+import datetime
+import json
 import time
-import mysql.connector
-from pymongo import MongoClient
-from mongodb_queries import query1_mongodb, query2_mongodb, query3_mongodb
+import backends
+import bench_history
+import bench_stats
+import tpch_params
+import verify
+from mongodb_queries import MONGODB_QUERIES
 import os
 
-# Configurações de conexão
-MYSQL_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',  # Ajuste conforme necessário
-    'password': 'fkvpqg91',  # Ajuste conforme necessário
-    'database': 'tpch'
-}
-
-MONGODB_URI = 'mongodb://localhost:27017/'
-MONGODB_DB = 'tpch'
-
-def execute_mysql_query(query_file):
-    """Executa uma query SQL no MySQL e retorna o tempo de execução"""
-    conn = mysql.connector.connect(**MYSQL_CONFIG)
-    cursor = conn.cursor()
-    
-    with open(query_file, 'r', encoding='utf-8') as f:
-        query = f.read()
-    
-    start_time = time.time()
-    cursor.execute(query)
-    results = cursor.fetchall()
-    end_time = time.time()
-    
-    cursor.close()
-    conn.close()
-    
-    return end_time - start_time, len(results)
-
-def execute_mongodb_query(query_func, db):
-    """Executa uma query MongoDB e retorna o tempo de execução"""
-    start_time = time.time()
-    results = query_func(db)
-    end_time = time.time()
-    
-    return end_time - start_time, len(results)
-
-def generate_report(results):
-    """Gera relatório markdown e atualiza README"""
+ENGINES = list(backends.BACKENDS)
+ENGINE_LABELS = {name: cls.label for name, cls in backends.BACKENDS.items()}
+PHASE_LABELS = {'execute': 'Execução', 'fetch': 'Fetch', 'first_row': '1ª linha', 'last_row': 'Última linha'}
+
+# fases que os backends podem medir dentro de run (backends.py)
+PHASES = ['execute', 'fetch', 'first_row', 'last_row']
+
+CSV_FIELDS = [
+    'query', 'engine', 'status', 'runs', 'rows',
+    'min_ms', 'median_ms', 'mean_ms', 'p95_ms', 'p99_ms', 'max_ms', 'stddev_ms',
+] + [f'{phase}_median_ms' for phase in PHASES] + ['verification', 'error']
+
+def run_query(backend, query, params):
+    """
+    Uma execução: (ns total, {fase: ns}, linhas).
+    O total é medido aqui, em volta de backend.run, igual para todos os bancos;
+    as fases vêm do backend (vazio quando ele não separa as fases).
+    """
+    start = time.perf_counter_ns()
+    rows = backend.run(query, params)
+    total_ns = time.perf_counter_ns() - start
+    return total_ns, backend.last_phases or {}, rows
+
+def measure(backend, query, param_sets, warmup, iterations, verifier=None, profile=False):
+    """
+    Para cada conjunto de parâmetros: warmup execuções descartadas e
+    iterations execuções medidas. Uma falha interrompe a query naquele banco
+    e fica registrada como falha (sem tempo).
+    verifier (verify.Verifier): confere as linhas de cada execução medida com
+    as do banco de referência, fora do tempo medido.
+    profile: depois das execuções medidas de cada conjunto, guarda em
+    'profiles' o backend.profile (explain no MongoDB, comandos no Redis).
+    """
+    result = {
+        'query': query,
+        'engine': backend.name,
+        'status': 'ok',
+        'error': None,
+        'rows': None,
+        'total_ns': [],
+        'verification': None,
+        'profiles': [] if profile else None,
+    }
+    for phase in PHASES:
+        result[f'{phase}_ns'] = []
+    if verifier is not None:
+        result['verification'] = {'reference': verifier.reference, 'checked': 0, 'failed': 0,
+                                  'first_mismatch': None}
+    try:
+        for set_index, params in enumerate(param_sets):
+            for _ in range(warmup):
+                backend.run(query, params)
+            for _ in range(iterations):
+                total_ns, phases, rows = run_query(backend, query, params)
+                result['total_ns'].append(total_ns)
+                for phase, ns in phases.items():
+                    result[f'{phase}_ns'].append(ns)
+                result['rows'] = len(rows)
+                if verifier is not None:
+                    check_rows(result['verification'], verifier, backend.name, query, set_index, params, rows)
+            if profile:
+                result['profiles'].append(profile_query(backend, query, params))
+    except Exception as e:
+        result['status'] = 'falha'
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['stats'] = {
+        phase: bench_stats.summarize(result[f'{phase}_ns'])
+        for phase in ['total'] + PHASES
+    } if result['status'] == 'ok' else None
+    return result
+
+def check_rows(verification, verifier, engine, query, set_index, params, rows):
+    """Acumula em verification o resultado de verifier.check para uma execução"""
+    comparison = verifier.check(engine, query, set_index, rows)
+    if comparison is None:
+        return
+    verification['checked'] += 1
+    if not comparison['ok']:
+        verification['failed'] += 1
+        if verification['first_mismatch'] is None:
+            verification['first_mismatch'] = dict(comparison, params=params)
+
+def profile_query(backend, query, params):
+    """backend.profile sem interromper a medição se o banco não suportar o explain"""
+    try:
+        return backend.profile(query, params)
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+def format_profile(profile):
+    """Linhas de texto de um perfil de backend.profile"""
+    if not profile:
+        return []
+    if 'error' in profile:
+        return [f"perfil indisponível: {profile['error']}"]
+    lines = []
+    if 'round_trips' in profile:
+        commands = ", ".join(f"{name} {count}" for name, count in list(profile['commands'].items())[:6])
+        lines.append(f"{profile['round_trips']} round trips ({commands}); "
+                     f"Redis {profile['redis_ms']:.1f} ms, Python {profile['python_ms']:.1f} ms")
+    for plan in profile.get('explain', []):
+        if 'error' in plan:
+            lines.append(f"explain {plan['collection']}: {plan['error']}")
+            continue
+        timings = ", ".join(f"{t['stage']} {t['time_ms']} ms" for t in plan['stage_timings']
+                            if t['time_ms'] is not None)
+        lines.append(f"explain {plan['collection']}: {' > '.join(plan['stages'])}; "
+                     f"índices {', '.join(plan['indexes']) or 'nenhum'}; docs examinados {plan['docs_examined']},"
+                     f" chaves {plan['keys_examined']}" + (f"; {timings}" if timings else ""))
+    return lines
+
+def verification_status(result):
+    """'ok', 'divergente' ou None (sem verificação, banco de referência ou sem referência)"""
+    verification = result.get('verification') if result else None
+    if not verification or verification['checked'] == 0:
+        return None
+    return 'divergente' if verification['failed'] else 'ok'
+
+def compare_q3_embedded(backend, warmup, iterations):
+    """Q3 com $lookup em customer x Q3 com c_mktsegment embutido em orders (--embed-customer)"""
+    if backend.db['orders'].count_documents({'c_mktsegment': {'$exists': True}}, limit=1) == 0:
+        print("AVISO: orders não tem c_mktsegment; carregue com load_mongodb.py --embed-customer")
+        return None
+    medians = []
+    for label, embedded in (("$lookup", False), ("embutido", True)):
+        params = dict(tpch_params.VALIDATION[3], embedded_customer=embedded)
+        result = measure(backend, 'Q3', [params], warmup, iterations)
+        if result['status'] != 'ok':
+            print(f"MongoDB Q3 ({label}): FALHOU: {result['error']}")
+            return None
+        stats = result['stats']['total']
+        medians.append(stats['median_ms'] / 1000)
+        print(f"MongoDB Q3 ({label}): mediana {stats['median_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms"
+              f" ({result['rows']} resultados)")
+    lookup_time, embedded_time = medians
+    if embedded_time > 0:
+        print(f"Speedup: {lookup_time / embedded_time:.2f}x")
+    return lookup_time, embedded_time
+
+def query_label(queries):
+    """['Q1', 'Q2', 'Q3'] -> 'Q1–Q3'; subconjuntos não contíguos são listados"""
+    numbers = [int(q[1:]) for q in queries]
+    if len(numbers) > 1 and numbers == list(range(numbers[0], numbers[-1] + 1)):
+        return f"{queries[0]}–{queries[-1]}"
+    return ", ".join(queries)
+
+def median_seconds(result):
+    """Mediana do tempo total em segundos, ou None se a query falhou"""
+    if result is None or result['status'] != 'ok':
+        return None
+    return result['stats']['total']['median_ms'] / 1000
+
+def with_difference(engines):
+    """A coluna Diferença (MongoDB - MySQL) aparece quando os dois são medidos"""
+    return 'mysql' in engines and 'mongodb' in engines
+
+def summary_rows(results, queries, engines):
+    """Linhas da tabela de resumo: medianas (s) por banco e a diferença MongoDB - MySQL"""
+    rows = []
+    for query in queries:
+        cells = [median_seconds(results.get((query, e))) for e in engines]
+        row = [query]
+        for engine, t in zip(engines, cells):
+            if t is None:
+                row.append("falhou")
+            elif verification_status(results.get((query, engine))) == 'divergente':
+                # tempo de uma resposta errada não vale como comparação
+                row.append(f"{t:.3f} (divergente)")
+            else:
+                row.append(f"{t:.3f}")
+        if with_difference(engines):
+            mysql_t = cells[engines.index('mysql')]
+            mongo_t = cells[engines.index('mongodb')]
+            if mysql_t is None or mongo_t is None:
+                row.append("-")
+            else:
+                diff = mongo_t - mysql_t
+                row.append(f"{diff:+.3f}" if diff != 0 else "0.000")
+        rows.append(row)
+    return rows
+
+def phase_median(result, phase):
+    """Mediana (ms) de uma fase de PHASES; None se o banco não mediu a fase"""
+    stats = result['stats'][phase]
+    return stats['median_ms'] if stats else None
+
+def summary_header(engines):
+    header = ["Query"] + [ENGINE_LABELS[e] for e in engines]
+    if with_difference(engines):
+        header.append("Diferença")
+    return header
+
+def environment_line(settings):
+    """Commit, versões dos bancos e máquina da execução (bench_history.environment)"""
+    env = settings.get('environment')
+    if not env:
+        return None
+    parts = []
+    if env.get('git'):
+        parts.append(f"commit `{env['git']['commit'][:7]}`{' (com alterações)' if env['git']['dirty'] else ''}")
+    parts += [f"{ENGINE_LABELS.get(e, e)} {v}" for e, v in env.get('engine_versions', {}).items() if v]
+    host = env.get('host')
+    if host:
+        parts.append(f"{host['platform']}, {host['cpus']} CPUs, Python {host['python']}")
+    return "; ".join(parts) + "."
+
+def generate_report(results, queries, engines, settings, q3_embedded=None, history=None):
+    """
+    Gera relatório markdown e atualiza README.
+    results: {(query, banco): resultado de measure}.
+    settings: warmup, iterations e param_sets usados (vão no texto do relatório).
+    q3_embedded: (mediana com $lookup, mediana embutido) de compare_q3_embedded, se medido.
+    history: (execução de referência, bench_history.compare_runs) para a tabela de variação.
+    """
+    header = summary_header(engines)
     report_lines = [
         "# NoSQL",
         "",
         "Projetos da disciplina Nosql - Banco De Dados Não Relacionais",
         "",
-        "# Benchmark TPC-H (Q1–Q3) — MySQL vs MongoDB",
+        f"# Benchmark TPC-H ({query_label(queries)}) — {' vs '.join(ENGINE_LABELS[e] for e in engines)}",
+        "",
+        f"{settings['iterations']} execuções medidas após {settings['warmup']} de aquecimento"
+        f" por conjunto de parâmetros ({settings['param_sets']} conjunto(s) por query),"
+        f" SF {settings.get('scale_factor', 1)}, execução {settings['timestamp']}.",
+        "",
+    ]
+    env_line = environment_line(settings)
+    if env_line:
+        report_lines += [env_line, ""]
+    report_lines += [
+        "## Resultados (mediana, segundos)",
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join("-" * (len(h) + 2) for h in header) + "|"
+    ]
+    for row in summary_rows(results, queries, engines):
+        report_lines.append("| " + " | ".join(row) + " |")
+
+    # colunas de 1ª/última linha só quando algum banco leu o resultado em lotes
+    phases = [p for p in PHASES if p in ('execute', 'fetch') or any(
+        r['status'] == 'ok' and r['stats'][p] for r in results.values())]
+    phase_header = [PHASE_LABELS[p] for p in phases]
+    report_lines += [
         "",
-        "## Resultados (segundos)",
-        "| Query | MySQL | MongoDB | Diferença |",
-        "|-------|--------|---------|-----------|"
+        "## Distribuição dos tempos (ms)",
+        "| Query | Banco | Execuções | Mín | Mediana | p95 | p99 | Desvio | " + " | ".join(phase_header) + " |",
+        "|-------|-------|-----------|-----|---------|-----|-----|--------|" +
+        "|".join("-" * (len(h) + 2) for h in phase_header) + "|",
     ]
-    
-    for query in ['Q1', 'Q2', 'Q3']:
-        mysql_t = results['mysql'].get(query, 0)
-        mongo_t = results['mongodb'].get(query, 0)
-        diff = mongo_t - mysql_t
-        diff_str = f"{diff:+.3f}" if diff != 0 else "0.000"
-        report_lines.append(f"| {query}    | {mysql_t:.3f} | {mongo_t:.3f} | {diff_str} |")
-    
+    for query in queries:
+        for engine in engines:
+            result = results.get((query, engine))
+            if result is None:
+                continue
+            if result['status'] != 'ok':
+                report_lines.append(f"| {query} | {ENGINE_LABELS[engine]} | falhou |" + " - |" * (5 + len(phases)))
+                continue
+            total = result['stats']['total']
+            phase_cells = []
+            for phase in phases:
+                median = phase_median(result, phase)
+                phase_cells.append('-' if median is None else f"{median:.1f}")
+            report_lines.append(
+                f"| {query} | {ENGINE_LABELS[engine]} | {total['runs']} | {total['min_ms']:.1f} | "
+                f"{total['median_ms']:.1f} | {total['p95_ms']:.1f} | {total['p99_ms']:.1f} | "
+                f"{total['stddev_ms']:.1f} | " + " | ".join(phase_cells) + " |"
+            )
+
+    if history:
+        baseline, comparison = history
+        report_lines += ["", f"## Variação em relação à execução {bench_history.run_label(baseline)}"]
+        differences = bench_history.setting_differences(baseline, settings)
+        if differences:
+            report_lines.append(f"Configurações diferentes ({', '.join(differences)}); "
+                                f"os tempos podem não ser comparáveis.")
+        report_lines += [""] + bench_history.comparison_lines(comparison, ENGINE_LABELS)
+
+    verified = [r for r in results.values() if verification_status(r)]
+    if verified:
+        reference = ENGINE_LABELS[verified[0]['verification']['reference']]
+        report_lines += ["", f"## Verificação dos resultados (referência: {reference})"]
+        for r in verified:
+            v = r['verification']
+            line = f"- {r['query']} ({ENGINE_LABELS[r['engine']]}): "
+            if v['failed'] == 0:
+                report_lines.append(line + f"ok em {v['checked']} execuções")
+                continue
+            mismatch = v['first_mismatch']
+            report_lines.append(line + f"**divergente** em {v['failed']} de {v['checked']} execuções"
+                                f" ({mismatch['actual_rows']} linhas, esperado {mismatch['expected_rows']})")
+            for d in mismatch['diffs'][:1]:
+                report_lines.append(f"  - linha {d['row']} ({', '.join(d['columns'])}): "
+                                    f"esperado `{d['expected']}`, obtido `{d['actual']}`")
+
+    profiled = [r for r in results.values() if r.get('profiles') and any(r['profiles'])]
+    if profiled:
+        report_lines += ["", "## Perfil dos bancos (primeiro conjunto de parâmetros)"]
+        for r in profiled:
+            report_lines.append(f"- {r['query']} ({ENGINE_LABELS[r['engine']]}):")
+            for line in format_profile(r['profiles'][0]):
+                report_lines.append(f"  - {line}")
+
+    failures = [r for r in results.values() if r['status'] != 'ok']
+    if failures:
+        report_lines += ["", "## Falhas"]
+        for r in failures:
+            report_lines.append(f"- {r['query']} ({ENGINE_LABELS[r['engine']]}): {r['error']}")
+
+    if q3_embedded:
+        lookup_t, embedded_t = q3_embedded
+        report_lines += [
+            "",
+            "## Q3 no MongoDB: $lookup x customer embutido (mediana, segundos)",
+            "| Variante | MongoDB |",
+            "|----------|---------|",
+            f"| $lookup em customer | {lookup_t:.3f} |",
+            f"| c_mktsegment em orders | {embedded_t:.3f} |",
+        ]
+
     report_content = "\n".join(report_lines)
-    
+
     # Salvar no README
     with open('README.md', 'w', encoding='utf-8') as f:
         f.write(report_content)
-    
+
     return report_content
 
+def write_json(path, results, settings):
+    """Resultado completo: configuração, amostras brutas (ns) e estatísticas (ms)"""
+    data = dict(settings)
+    data['results'] = list(results.values())
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def write_csv(path, results):
+    """Uma linha por (query, banco) com as estatísticas do tempo total (ms)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for r in results.values():
+            row = {'query': r['query'], 'engine': r['engine'], 'status': r['status'],
+                   'rows': r['rows'], 'verification': verification_status(r) or '',
+                   'error': r['error'] or ''}
+            if r['status'] == 'ok':
+                row.update({k: round(v, 3) for k, v in r['stats']['total'].items()})
+                for phase in PHASES:
+                    median = phase_median(r, phase)
+                    row[f'{phase}_median_ms'] = round(median, 3) if median is not None else ''
+            writer.writerow(row)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark TPC-H: MySQL, MongoDB e Redis")
+    parser.add_argument('--queries', nargs='+', default=['Q1', 'Q2', 'Q3'],
+                        help="queries a executar (ex.: Q1 Q5 Q18) ou 'all' para Q1-Q22")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=['mysql', 'mongodb'],
+                        help="bancos a medir (redis usa proj2/tpch_redis_queries.py)")
+    parser.add_argument('--warmup', type=int, default=1,
+                        help="execuções de aquecimento descartadas por conjunto de parâmetros")
+    parser.add_argument('--iterations', type=int, default=5,
+                        help="execuções medidas por conjunto de parâmetros")
+    parser.add_argument('--q3-embedded', action='store_true',
+                        help="compara a Q3 com $lookup e a variante com customer embutido em orders")
+    parser.add_argument('--param-sets', type=int, default=0,
+                        help="roda cada query com N conjuntos de parâmetros sorteados no estilo do qgen "
+                             "(padrão: só os valores de validação)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="semente do gerador de parâmetros (mesma semente, mesmos parâmetros)")
+    parser.add_argument('--scale-factor', type=float, default=1,
+                        help="SF dos dados carregados (usado no parâmetro FRACTION da Q11)")
+    parser.add_argument('--mysql-fetch-batch', type=int, default=0, metavar='N',
+                        help="lê o resultado do MySQL em lotes de N linhas (cursor sem buffer) e mede "
+                             "o tempo até a primeira e a última linha (padrão: fetchall)")
+    parser.add_argument('--verify', action='store_true',
+                        help="confere as linhas de cada execução medida com as do primeiro banco de --engines "
+                             "(verify.py); respostas divergentes ficam marcadas no resumo")
+    parser.add_argument('--rel-tol', type=float, default=verify.REL_TOL,
+                        help="tolerância relativa dos números na verificação")
+    parser.add_argument('--abs-tol', type=float, default=verify.ABS_TOL,
+                        help="tolerância absoluta dos números na verificação")
+    parser.add_argument('--profile', action='store_true',
+                        help="depois das medições roda cada query mais uma vez coletando o explain do MongoDB "
+                             "e os comandos/round trips do Redis (salvos no JSON e no histórico)")
+    parser.add_argument('--history', default=bench_history.HISTORY_FILE, metavar='ARQUIVO',
+                        help="histórico JSONL onde a execução é acrescentada (bench_history.py)")
+    parser.add_argument('--no-history', action='store_true', help="não grava a execução no histórico")
+    parser.add_argument('--baseline', default='latest',
+                        help="execução do histórico usada como referência para a variação: run_id, "
+                             "prefixo do commit, índice ou 'latest' (padrão: a anterior a esta)")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva configuração, amostras e estatísticas em JSON")
+    parser.add_argument('--csv', metavar='ARQUIVO', help="salva as estatísticas por query e banco em CSV")
+    parser.add_argument('--no-readme', action='store_true', help="não reescreve o README.md")
+    args = parser.parse_args()
+    if args.queries == ['all']:
+        args.queries = list(MONGODB_QUERIES)
+    for q in args.queries:
+        if q not in MONGODB_QUERIES:
+            parser.error(f"query desconhecida: {q} (use Q1-Q22)")
+    if args.iterations < 1 or args.warmup < 0:
+        parser.error("--iterations deve ser >= 1 e --warmup >= 0")
+    # mantém a ordem de ENGINES (a coluna Diferença é MongoDB - MySQL)
+    args.engines = [e for e in ENGINES if e in args.engines]
+    return args
+
 def main():
+    args = parse_args()
+
     print("=" * 60)
-    print("BENCHMARK TPC-H: MySQL vs MongoDB")
+    print(f"BENCHMARK TPC-H: {' vs '.join(ENGINE_LABELS[e] for e in args.engines)}")
     print("=" * 60)
     print()
-    
-    # Conectar ao MongoDB
-    print("Conectando ao MongoDB...")
-    try:
-        mongo_client = MongoClient(MONGODB_URI)
-        mongo_db = mongo_client[MONGODB_DB]
-        
-        # Verificar se o MongoDB tem dados
-        if mongo_db['orders'].count_documents({}) == 0:
-            print("AVISO: MongoDB parece estar vazio!")
-            print("Execute primeiro o script load_mongodb.py para carregar os dados.")
-            print()
-    except Exception as e:
-        print(f"Erro ao conectar ao MongoDB: {e}")
-        return
-    
-    results = {
-        'mysql': {},
-        'mongodb': {}
-    }
-    
+
     base_dir = os.getcwd()
     queries_dir = os.path.join(base_dir, 'tpch-dbgen', 'queries')
-    
-    # Query 1
-    print("Executando Query 1...")
-    print("-" * 60)
-    
-    try:
-        mysql_time, mysql_count = execute_mysql_query(
-            os.path.join(queries_dir, '1.sql')
-        )
-        results['mysql']['Q1'] = mysql_time
-        print(f"MySQL Q1:   {mysql_time:.3f}s ({mysql_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MySQL Q1: {e}")
-        results['mysql']['Q1'] = 0
-    
-    try:
-        mongo_time, mongo_count = execute_mongodb_query(query1_mongodb, mongo_db)
-        results['mongodb']['Q1'] = mongo_time
-        print(f"MongoDB Q1: {mongo_time:.3f}s ({mongo_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MongoDB Q1: {e}")
-        results['mongodb']['Q1'] = 0
-    print()
-    
-    # Query 2
-    print("Executando Query 2...")
-    print("-" * 60)
-    
-    try:
-        mysql_time, mysql_count = execute_mysql_query(
-            os.path.join(queries_dir, '2.sql')
-        )
-        results['mysql']['Q2'] = mysql_time
-        print(f"MySQL Q2:   {mysql_time:.3f}s ({mysql_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MySQL Q2: {e}")
-        results['mysql']['Q2'] = 0
-    
-    try:
-        mongo_time, mongo_count = execute_mongodb_query(query2_mongodb, mongo_db)
-        results['mongodb']['Q2'] = mongo_time
-        print(f"MongoDB Q2: {mongo_time:.3f}s ({mongo_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MongoDB Q2: {e}")
-        results['mongodb']['Q2'] = 0
-    print()
-    
-    # Query 3
-    print("Executando Query 3...")
-    print("-" * 60)
-    
-    try:
-        mysql_time, mysql_count = execute_mysql_query(
-            os.path.join(queries_dir, '3.sql')
-        )
-        results['mysql']['Q3'] = mysql_time
-        print(f"MySQL Q3:   {mysql_time:.3f}s ({mysql_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MySQL Q3: {e}")
-        results['mysql']['Q3'] = 0
-    
-    try:
-        mongo_time, mongo_count = execute_mongodb_query(query3_mongodb, mongo_db)
-        results['mongodb']['Q3'] = mongo_time
-        print(f"MongoDB Q3: {mongo_time:.3f}s ({mongo_count} resultados)")
-    except Exception as e:
-        print(f"Erro ao executar MongoDB Q3: {e}")
-        results['mongodb']['Q3'] = 0
-    print()
-    
+
+    connected = {}
+    for engine in args.engines:
+        print(f"Conectando ao {ENGINE_LABELS[engine]}...")
+        options = {'fetch_batch': args.mysql_fetch_batch} if engine == 'mysql' else {}
+        backend = backends.create(engine, queries_dir=queries_dir, **options)
+        try:
+            backend.connect()
+            warning = backend.check()
+        except Exception as e:
+            print(f"Erro ao conectar ao {ENGINE_LABELS[engine]}: {e}")
+            return
+        if warning:
+            print(f"AVISO: {warning}")
+            print()
+        connected[engine] = backend
+    settings = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'engines': args.engines,
+        'queries': args.queries,
+        'warmup': args.warmup,
+        'iterations': args.iterations,
+        'param_sets': max(args.param_sets, 1),
+        'seed': args.seed,
+        'scale_factor': args.scale_factor,
+        'mysql_fetch_batch': args.mysql_fetch_batch,
+        'verify': args.verify,
+        'profile': args.profile,
+        'environment': bench_history.environment(connected),
+    }
+    # referência da verificação: o primeiro banco (MySQL quando medido)
+    verifier = verify.Verifier(args.engines[0], args.rel_tol, args.abs_tol) if args.verify else None
+
+    results = {}
+    for query in args.queries:
+        n = int(query[1:])
+        print(f"Executando Query {n}...")
+        print("-" * 60)
+
+        if args.param_sets > 0:
+            param_sets = tpch_params.param_sets(n, args.param_sets, args.seed, args.scale_factor)
+        else:
+            param_sets = [tpch_params.VALIDATION[n]]
+
+        for engine in args.engines:
+            result = measure(connected[engine], query, param_sets, args.warmup, args.iterations, verifier,
+                             args.profile)
+            results[(query, engine)] = result
+            label = f"{ENGINE_LABELS[engine]} {query}:"
+            if result['status'] == 'ok':
+                total = result['stats']['total']
+                first_row = phase_median(result, 'first_row')
+                first_row = f", 1ª linha {first_row:.1f} ms" if first_row is not None else ""
+                print(f"{label:<12} mediana {total['median_ms']:.1f} ms, p95 {total['p95_ms']:.1f} ms,"
+                      f" desvio {total['stddev_ms']:.1f} ms{first_row} ({result['rows']} resultados)")
+            else:
+                print(f"{label:<12} FALHOU: {result['error']}")
+            status = verification_status(result)
+            if status == 'ok':
+                print(f"{'':<12} verificação: ok ({result['verification']['checked']} execuções)")
+            elif status == 'divergente':
+                v = result['verification']
+                print(f"{'':<12} verificação: {v['failed']} de {v['checked']} execuções "
+                      f"{verify.format_comparison(v['first_mismatch'])}")
+            if result['profiles']:
+                for line in format_profile(result['profiles'][0]):
+                    print(f"{'':<12} {line}")
+        print()
+
+    q3_embedded = None
+    if args.q3_embedded and 'mongodb' in connected:
+        print("Comparando Q3: $lookup x customer embutido...")
+        print("-" * 60)
+        q3_embedded = compare_q3_embedded(connected['mongodb'], args.warmup, args.iterations)
+        print()
+
     # Gerar relatório
     print("=" * 60)
-    print("RESUMO DOS RESULTADOS")
+    print("RESUMO DOS RESULTADOS (mediana, segundos)")
     print("=" * 60)
     print()
-    print("| Query | MySQL (s) | MongoDB (s) | Diferença |")
-    print("|-------|-----------|-------------|-----------|")
-    
-    for query in ['Q1', 'Q2', 'Q3']:
-        mysql_t = results['mysql'].get(query, 0)
-        mongo_t = results['mongodb'].get(query, 0)
-        diff = mongo_t - mysql_t
-        diff_str = f"{diff:+.3f}" if diff != 0 else "0.000"
-        print(f"| {query}    | {mysql_t:.3f} | {mongo_t:.3f} | {diff_str} |")
-    
+    header = summary_header(args.engines)
+    print("| " + " | ".join(header) + " |")
+    print("|" + "|".join("-" * (len(h) + 2) for h in header) + "|")
+    for row in summary_rows(results, args.queries, args.engines):
+        print("| " + " | ".join(row) + " |")
     print()
-    print("Gerando relatório no README.md...")
-    generate_report(results)
-    print("Relatório salvo com sucesso!")
-    
-    mongo_client.close()
 
-if __name__ == "__main__":
-    main()
+    # referência: uma execução do histórico antes de acrescentar esta
+    history = None
+    record = bench_history.make_record(settings, results)
+    runs = bench_history.load_runs(args.history)
+    if runs:
+        try:
+            baseline = bench_history.find_run(runs, args.baseline)
+        except ValueError as e:
+            print(f"AVISO: {e}; sem comparação com o histórico")
+        else:
+            comparison = bench_history.compare_runs(baseline, record)
+            history = (baseline, comparison)
+            print("VARIAÇÃO EM RELAÇÃO AO HISTÓRICO")
+            bench_history.print_comparison(baseline, record, comparison, ENGINE_LABELS)
+            print()
+    if not args.no_history:
+        bench_history.append_run(record, args.history)
+        print(f"Execução acrescentada ao histórico {args.history}")
+
+    if args.json:
+        write_json(args.json, results, settings)
+        print(f"Resultados salvos em {args.json}")
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"Estatísticas salvas em {args.csv}")
+    if not args.no_readme:
+        print("Gerando relatório no README.md...")
+        generate_report(results, args.queries, args.engines, settings, q3_embedded, history)
+        print("Relatório salvo com sucesso!")
 
+    for backend in connected.values():
+        backend.close()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Espaço ocupado pelos dados em cada banco, depois da carga.
+
+Redis: INFO memory e MEMORY USAGE de uma amostra de chaves de cada família
+(padrão da chave com as partes numéricas trocadas por '*': lineitem:*,
+part:size:*, lineitem:by_shipdate...). O total da família é a média da
+amostra x o número de chaves (contado com SCAN). As famílias <tabela>:*
+de hashes são as linhas; as demais (SETs e ZSETs) são índices, com os
+bytes por linha da tabela a que pertencem.
+
+MongoDB: dbStats e collStats de cada collection (tamanho dos documentos,
+armazenamento em disco e tamanho de cada índice) e, em uma amostra de
+documentos ($sample), o tamanho BSON de cada campo de primeiro nível, que
+mostra quanto os arrays embutidos (lineitems, partsupps, nation) pesam.
+
+MySQL: data_length/index_length de information_schema.tables.
+
+Uso:
+    python proj1/footprint.py --engines redis mongodb mysql --sample 200 --json footprint.json
+"""
+import argparse
+import json
+import random
+import re
+
+import bson
+
+import backends
+import benchmark
+
+ENGINE_LABELS = benchmark.ENGINE_LABELS
+TPCH_TABLES = ['region', 'nation', 'supplier', 'part', 'partsupp', 'customer', 'orders', 'lineitem']
+
+_NUMERIC = re.compile(r"-?\d+(\.\d+)?")
+
+def key_family(key):
+    """'lineitem:7:3' -> 'lineitem:*', 'part:size:34' -> 'part:size:*', 'orders:sum_qty' fica igual"""
+    parts = key.split(":")
+    family = [parts[0]]
+    if len(parts) > 1 and not _NUMERIC.fullmatch(parts[1]):
+        family.append(parts[1])
+        if len(parts) > 2:
+            family.append("*")
+    elif len(parts) > 1:
+        family.append("*")
+    return ":".join(family)
+
+def redis_footprint(client, sample=200, scan_count=10000, seed=0):
+    """INFO memory + famílias de chaves com chaves, tipo e bytes estimados"""
+    rng = random.Random(seed)
+    counts = {}
+    samples = {}
+    for key in client.scan_iter(count=scan_count):
+        family = key_family(key)
+        n = counts[family] = counts.get(family, 0) + 1
+        # amostragem por reservatório: cada chave tem a mesma chance de entrar
+        reservoir = samples.setdefault(family, [])
+        if len(reservoir) < sample:
+            reservoir.append(key)
+        else:
+            i = rng.randrange(n)
+            if i < sample:
+                reservoir[i] = key
+
+    families = []
+    for family, keys in samples.items():
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key)
+        pipe.type(keys[0])
+        *usages, key_type = pipe.execute()
+        usages = [u for u in usages if u is not None]
+        avg = sum(usages) / len(usages) if usages else 0
+        families.append({
+            'family': family,
+            'type': key_type,
+            'keys': counts[family],
+            'sampled': len(usages),
+            'avg_bytes': avg,
+            'bytes': avg * counts[family],
+        })
+
+    rows = {f['family'].split(':')[0]: f['keys'] for f in families
+            if f['type'] == 'hash' and f['family'].split(':')[0] in TPCH_TABLES and f['family'].endswith(':*')
+            and f['family'].count(':') == 1}
+    for f in families:
+        table = f['family'].split(':')[0]
+        f['table'] = table if table in TPCH_TABLES else None
+        f['kind'] = 'linhas' if f['family'] == f"{table}:*" and f['type'] == 'hash' else 'índice'
+        f['bytes_per_row'] = f['bytes'] / rows[table] if rows.get(table) else None
+    families.sort(key=lambda f: -f['bytes'])
+
+    info = client.info('memory')
+    memory = {k: info.get(k) for k in ('used_memory', 'used_memory_dataset', 'used_memory_overhead',
+                                       'used_memory_rss', 'mem_fragmentation_ratio')}
+    return {'memory': memory, 'rows': rows, 'families': families}
+
+def _coll_stats(db, name):
+    """collStats (comando antigo) ou $collStats (MongoDB 6.2+, que removeu o comando)"""
+    try:
+        return db.command('collStats', name)
+    except Exception:
+        stats = next(db[name].aggregate([{'$collStats': {'storageStats': {}}}]))['storageStats']
+        return stats
+
+def field_sizes(collection, sample=200):
+    """Média de bytes BSON por documento de cada campo de primeiro nível, em uma amostra"""
+    totals = {}
+    docs = 0
+    for doc in collection.aggregate([{'$sample': {'size': sample}}]):
+        docs += 1
+        for field, value in doc.items():
+            totals[field] = totals.get(field, 0) + len(bson.encode({field: value}))
+    if not docs:
+        return {}
+    return dict(sorted(((f, total / docs) for f, total in totals.items()), key=lambda f: -f[1]))
+
+def mongodb_footprint(db, sample=200):
+    stats = db.command('dbStats')
+    database = {k: stats.get(k) for k in ('objects', 'dataSize', 'storageSize', 'indexSize', 'totalSize')}
+    collections = []
+    for name in sorted(db.list_collection_names()):
+        c = _coll_stats(db, name)
+        count = c.get('count') or 0
+        collections.append({
+            'collection': name,
+            'count': count,
+            'size': c.get('size'),
+            'storage_size': c.get('storageSize'),
+            'total_index_size': c.get('totalIndexSize'),
+            'index_sizes': c.get('indexSizes', {}),
+            'bytes_per_doc': c['size'] / count if count else None,
+            'storage_per_doc': c['storageSize'] / count if count and c.get('storageSize') is not None else None,
+            'field_sizes': field_sizes(db[name], sample),
+        })
+    return {'database': database, 'collections': collections}
+
+def mysql_footprint(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT table_name, table_rows, data_length, index_length FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() ORDER BY data_length + index_length DESC"
+    )
+    tables = [
+        {'table': name, 'rows': rows, 'data_bytes': data, 'index_bytes': index,
+         'bytes_per_row': (data + index) / rows if rows else None}
+        for name, rows, data, index in cursor.fetchall()
+    ]
+    cursor.close()
+    return {'tables': tables}
+
+def mb(value):
+    return f"{value / (1024 * 1024):.1f}" if value is not None else "-"
+
+def per_row(value):
+    return f"{value:.0f}" if value is not None else "-"
+
+def report_lines(footprint):
+    lines = ["# Espaço ocupado pelos dados", ""]
+    redis_fp = footprint.get('redis')
+    if redis_fp:
+        m = redis_fp['memory']
+        lines += [
+            "## Redis",
+            f"used_memory {mb(m['used_memory'])} MB (dados {mb(m['used_memory_dataset'])} MB,"
+            f" overhead {mb(m['used_memory_overhead'])} MB), RSS {mb(m['used_memory_rss'])} MB,"
+            f" fragmentação {m['mem_fragmentation_ratio']}",
+            "",
+            "| Família | Tipo | Papel | Chaves | MB (estimado) | Bytes/chave | Bytes/linha da tabela |",
+            "|---------|------|-------|--------|---------------|-------------|-----------------------|",
+        ]
+        for f in redis_fp['families']:
+            lines.append(f"| {f['family']} | {f['type']} | {f['kind']} | {f['keys']} | {mb(f['bytes'])} | "
+                         f"{per_row(f['avg_bytes'])} | {per_row(f['bytes_per_row'])} |")
+        lines.append("")
+    mongo_fp = footprint.get('mongodb')
+    if mongo_fp:
+        d = mongo_fp['database']
+        lines += [
+            "## MongoDB",
+            f"dbStats: {d['objects']} documentos, dados {mb(d['dataSize'])} MB, armazenamento"
+            f" {mb(d['storageSize'])} MB, índices {mb(d['indexSize'])} MB",
+            "",
+            "| Collection | Documentos | Dados (MB) | Disco (MB) | Índices (MB) | Bytes/doc | Disco/doc |",
+            "|------------|------------|------------|------------|--------------|-----------|-----------|",
+        ]
+        for c in mongo_fp['collections']:
+            lines.append(f"| {c['collection']} | {c['count']} | {mb(c['size'])} | {mb(c['storage_size'])} | "
+                         f"{mb(c['total_index_size'])} | {per_row(c['bytes_per_doc'])} | "
+                         f"{per_row(c['storage_per_doc'])} |")
+        lines += ["", "| Collection | Índice | MB | Bytes/doc |", "|------------|--------|----|-----------|"]
+        for c in mongo_fp['collections']:
+            for name, size in c['index_sizes'].items():
+                lines.append(f"| {c['collection']} | {name} | {mb(size)} | "
+                             f"{per_row(size / c['count'] if c['count'] else None)} |")
+        lines += ["", "Campos mais pesados (bytes BSON por documento, amostra):", ""]
+        for c in mongo_fp['collections']:
+            fields = list(c['field_sizes'].items())[:4]
+            if fields:
+                lines.append(f"- {c['collection']}: " + ", ".join(f"{f} {size:.0f}" for f, size in fields))
+        lines.append("")
+    mysql_fp = footprint.get('mysql')
+    if mysql_fp:
+        lines += [
+            "## MySQL",
+            "| Tabela | Linhas (estimado) | Dados (MB) | Índices (MB) | Bytes/linha |",
+            "|--------|-------------------|------------|--------------|-------------|",
+        ]
+        for t in mysql_fp['tables']:
+            lines.append(f"| {t['table']} | {t['rows']} | {mb(t['data_bytes'])} | {mb(t['index_bytes'])} | "
+                         f"{per_row(t['bytes_per_row'])} |")
+        lines.append("")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória e disco ocupados pelo TPC-H em cada banco")
+    parser.add_argument('--engines', nargs='+', choices=benchmark.ENGINES, default=['redis', 'mongodb'])
+    parser.add_argument('--sample', type=int, default=200,
+                        help="chaves do Redis por família e documentos do MongoDB por collection")
+    parser.add_argument('--out', default='footprint.md', help="relatório markdown")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva os números completos em JSON")
+    args = parser.parse_args()
+
+    footprint = {}
+    for engine in args.engines:
+        print(f"Coletando {ENGINE_LABELS[engine]}...")
+        backend = backends.create(engine)
+        try:
+            backend.connect()
+            if engine == 'redis':
+                footprint['redis'] = redis_footprint(backend.queries.r, args.sample)
+            elif engine == 'mongodb':
+                footprint['mongodb'] = mongodb_footprint(backend.db, args.sample)
+            else:
+                footprint['mysql'] = mysql_footprint(backend.conn)
+        except Exception as e:
+            print(f"Erro ao coletar {ENGINE_LABELS[engine]}: {e}")
+        finally:
+            try:
+                backend.close()
+            except Exception:
+                pass
+
+    lines = report_lines(footprint)
+    print("\n".join(lines))
+    with open(args.out, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    print(f"Relatório salvo em {args.out}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(footprint, f, ensure_ascii=False, indent=2, default=str)
+        print(f"Resultados salvos em {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Advisor de índices para os pipelines de mongodb_queries.py.
+
+Para cada query roda explain('executionStats') e mostra COLLSCAN x IXSCAN,
+documentos examinados x retornados e os $lookup sem índice. Pela diferença
+de $indexStats antes/depois de executar os pipelines, lista os índices que
+nenhuma query usou. Sugere (e com --create cria) índices compostos no
+padrão igualdade -> intervalo -> chaves do $group, ex.:
+(l_shipdate, l_returnflag, l_linestatus) para a Q1.
+"""
+import argparse
+
+from pymongo import MongoClient
+
+from mongodb_queries import DERIVED_QUERIES, QUERY_PIPELINES
+
+MONGODB_URI = 'mongodb://localhost:27017/'
+MONGODB_DB = 'tpch'
+
+RANGE_OPERATORS = {'$lt', '$lte', '$gt', '$gte', '$regex'}
+
+def explain_pipeline(db, collection, pipeline):
+    """explain do aggregate com verbosity executionStats"""
+    return db.command(
+        'explain',
+        {'aggregate': collection, 'pipeline': pipeline, 'cursor': {}},
+        verbosity='executionStats'
+    )
+
+def _walk(node):
+    """Percorre recursivamente todos os dicts do explain"""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+def summarize_explain(explain):
+    """Extrai estágios de plano, índices usados, contadores e estatísticas de $lookup"""
+    summary = {
+        'stages': [],
+        'indexes': [],
+        'docs_examined': 0,
+        'keys_examined': 0,
+        'returned': None,
+        'lookups': [],
+    }
+    for node in _walk(explain):
+        stage = node.get('stage')
+        if isinstance(stage, str):
+            if stage not in summary['stages']:
+                summary['stages'].append(stage)
+            if stage == 'IXSCAN' and node.get('indexName') and node['indexName'] not in summary['indexes']:
+                summary['indexes'].append(node['indexName'])
+        if 'totalDocsExamined' in node and 'executionSuccess' in node:
+            summary['docs_examined'] += node['totalDocsExamined']
+            summary['keys_examined'] += node.get('totalKeysExamined', 0)
+            if summary['returned'] is None:
+                summary['returned'] = node.get('nReturned')
+        if '$lookup' in node:
+            summary['lookups'].append({
+                'from': node['$lookup'].get('from'),
+                'docs_examined': node.get('totalDocsExamined'),
+                'collection_scans': node.get('collectionScans'),
+                'indexes_used': node.get('indexesUsed'),
+                'returned': node.get('nReturned'),
+            })
+    return summary
+
+def stage_timings(explain):
+    """
+    Tempo estimado (ms) e documentos devolvidos por estágio do pipeline; quando
+    o pipeline inteiro foi executado pelo planner (sem 'stages'), os nós da
+    árvore de execução.
+    """
+    timings = []
+    for stage in explain.get('stages', []):
+        name = next((k for k in stage if k.startswith('$')), '?')
+        timings.append({
+            'stage': name,
+            'time_ms': stage.get('executionTimeMillisEstimate'),
+            'returned': stage.get('nReturned'),
+        })
+    if not timings:
+        execution = explain.get('executionStats', {}).get('executionStages', {})
+        for node in _walk(execution):
+            if isinstance(node.get('stage'), str):
+                timings.append({
+                    'stage': node['stage'],
+                    'time_ms': node.get('executionTimeMillisEstimate'),
+                    'returned': node.get('nReturned'),
+                })
+    return timings
+
+def index_usage(db, collection):
+    """{nome do índice: número de acessos} via $indexStats"""
+    return {s['name']: s['accesses']['ops'] for s in db[collection].aggregate([{'$indexStats': {}}])}
+
+def suggest_index(collection, pipeline):
+    """
+    Sugere um índice composto a partir do primeiro $match e do primeiro $group:
+    campos de igualdade, depois de intervalo/regex, depois as chaves do $group.
+    Retorna [(campo, 1), ...] ou None quando não há o que indexar.
+    """
+    equality, ranges, group_keys = [], [], []
+    for i, stage in enumerate(pipeline):
+        if '$match' in stage and i == 0:
+            for field, cond in stage['$match'].items():
+                if field.startswith('$'):
+                    continue
+                if isinstance(cond, dict) and set(cond) & RANGE_OPERATORS:
+                    ranges.append(field)
+                else:
+                    equality.append(field)
+        elif '$group' in stage:
+            group_id = stage['$group']['_id']
+            if isinstance(group_id, dict):
+                for expr in group_id.values():
+                    if isinstance(expr, str) and expr.startswith('$') and '.' not in expr:
+                        group_keys.append(expr[1:])
+            break
+        elif set(stage) & {'$unwind', '$lookup'}:
+            # depois de $unwind/$lookup as chaves já não vêm do documento base
+            break
+
+    fields = []
+    for field in equality + ranges + group_keys:
+        if field not in fields:
+            fields.append(field)
+    return [(f, 1) for f in fields] or None
+
+def lookup_suggestions(pipeline):
+    """Índices no foreignField de cada $lookup simples do pipeline"""
+    suggestions = []
+    for stage in pipeline:
+        lookup = stage.get('$lookup')
+        if lookup and 'foreignField' in lookup:
+            suggestions.append((lookup['from'], [(lookup['foreignField'], 1)]))
+    return suggestions
+
+def has_index_prefix(db, collection, keys):
+    """True se algum índice existente começa exatamente com keys"""
+    for info in db[collection].index_information().values():
+        if list(info['key'])[:len(keys)] == list(keys):
+            return True
+    return False
+
+def advise(db, queries, create=False, derived=False):
+    """Roda explain e o relatório de índices para as queries pedidas"""
+    collections = sorted({QUERY_PIPELINES[q][0] for q in queries} | set(db.list_collection_names()))
+    before = {c: index_usage(db, c) for c in collections}
+
+    suggestions = []
+    for q in queries:
+        collection, build = QUERY_PIPELINES[q]
+        pipeline = build(derived) if q in DERIVED_QUERIES else build()
+        summary = summarize_explain(explain_pipeline(db, collection, pipeline))
+        scan = 'COLLSCAN' if 'COLLSCAN' in summary['stages'] else ('IXSCAN' if 'IXSCAN' in summary['stages'] else '-')
+        print(f"== {q} ({collection}) ==")
+        print(f"  plano: {scan}  estágios: {', '.join(summary['stages'])}")
+        print(f"  índices usados: {', '.join(summary['indexes']) or 'nenhum'}")
+        print(f"  docs examinados: {summary['docs_examined']}  chaves examinadas: {summary['keys_examined']}"
+              f"  retornados: {summary['returned']}")
+        for lookup in summary['lookups']:
+            print(f"  $lookup {lookup['from']}: docs examinados {lookup['docs_examined']},"
+                  f" collection scans {lookup['collection_scans']}, índices {lookup['indexes_used']}")
+
+        index = suggest_index(collection, pipeline)
+        if index:
+            suggestions.append((q, collection, index))
+        for lookup_collection, lookup_index in lookup_suggestions(pipeline):
+            suggestions.append((q, lookup_collection, lookup_index))
+        print()
+
+    # índices sem nenhum acesso durante os explains acima
+    print("== Índices não usados ==")
+    for c in collections:
+        after = index_usage(db, c)
+        unused = [name for name, ops in after.items() if name != '_id_' and ops == before[c].get(name, 0)]
+        if unused:
+            print(f"  {c}: {', '.join(unused)}")
+    print()
+
+    print("== Sugestões ==")
+    for q, collection, keys in suggestions:
+        spec = ', '.join(f for f, _ in keys)
+        if has_index_prefix(db, collection, keys):
+            print(f"  {q}: {collection} ({spec}) já existe")
+        elif create:
+            name = db[collection].create_index(keys)
+            print(f"  {q}: {collection} ({spec}) criado como {name}")
+        else:
+            print(f"  {q}: {collection} ({spec})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Advisor de índices para as queries MongoDB")
+    parser.add_argument('--queries', nargs='+', choices=list(QUERY_PIPELINES), default=list(QUERY_PIPELINES))
+    parser.add_argument('--create', action='store_true', help="cria os índices sugeridos")
+    parser.add_argument('--derived', action='store_true',
+                        help="analisa as variantes que usam os campos derivados (Q1-Q3, load_mongodb.py --derived)")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGODB_URI)
+    advise(client[MONGODB_DB], args.queries, args.create, args.derived)
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,352 @@
+import argparse
+import glob
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+from operator import itemgetter
+from bson import ObjectId
 from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
 from datetime import datetime
 
-def load_json_to_mongodb(json_file, collection):
-    """Carrega um arquivo JSONL para uma collection do MongoDB"""
-    count = 0
+import tpch_schema
+from q1_rollup import ROLLUP_COLLECTION, apply_partials, create_rollup_indexes, tracking
+
+TABLES = ['region', 'nation', 'supplier', 'customer', 'part', 'partsupp', 'orders', 'lineitem']
+
+def batched(docs, batch_size):
+    """Agrupa um iterável de documentos em listas de até batch_size"""
+    it = iter(docs)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+# Write concerns do modo bulk; os relaxados são só para bancos descartáveis de benchmark
+WRITE_CONCERNS = {
+    'default': None,
+    'relaxed': WriteConcern(w=1, j=False),
+    'unacknowledged': WriteConcern(w=0),
+}
+
+# segundos que wait() espera o servidor aplicar as escritas sem confirmação (w=0)
+FENCE_TIMEOUT = 600
+
+class BulkInserter:
+    """
+    Insere fluxos de documentos com insert_many em lotes de batch_size.
+    Com workers > 1 até 2 * workers lotes ficam em voo num pool de threads, cada
+    lote com a sua própria sessão. O _id é atribuído antes do envio, então quem
+    copia o documento depois do submit (embeddings) já vê o _id definitivo.
+    Acumula por collection os documentos e o intervalo entre o primeiro envio e
+    a conclusão do último lote, para o relatório de throughput (no hashjoin as
+    collections são intercaladas, então os intervalos se sobrepõem).
+    """
+
+    def __init__(self, client=None, batch_size=1000, workers=1, ordered=True, write_concern=None):
+        self.client = client
+        self.batch_size = batch_size
+        self.ordered = ordered
+        self.write_concern = write_concern
+        self.pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.slots = threading.BoundedSemaphore(2 * workers)
+        # sessões explícitas não são permitidas com w=0
+        self.use_sessions = client is not None and (write_concern is None or write_concern.acknowledged)
+        self.pending = []
+        # {collection: [documentos, primeiro envio, última conclusão]}
+        self.stats = {}
+        self.lock = threading.Lock()
+        # collections que receberam lotes e quantos documentos já foram vistos no servidor
+        self.collections = {}
+        self.applied = {}
+
+    def _record(self, name, docs, start):
+        with self.lock:
+            stats = self.stats.setdefault(name, [0, start, start])
+            stats[0] += docs
+            stats[2] = max(stats[2], time.perf_counter())
+
+    def _insert(self, collection, batch, start):
+        try:
+            if self.use_sessions:
+                with self.client.start_session() as session:
+                    collection.insert_many(batch, ordered=self.ordered, session=session)
+            else:
+                collection.insert_many(batch, ordered=self.ordered)
+            self._record(collection.name, len(batch), start)
+        finally:
+            self.slots.release()
+
+    def _reap(self):
+        """Descarta lotes concluídos, propagando erros"""
+        still = []
+        for fut in self.pending:
+            if fut.done():
+                fut.result()
+            else:
+                still.append(fut)
+        self.pending = still
+
+    def submit(self, collection, batch):
+        """Envia um lote (assíncrono quando workers > 1); retorna o tamanho do lote"""
+        for doc in batch:
+            if '_id' not in doc:
+                doc['_id'] = ObjectId()
+        if self.write_concern is not None:
+            collection = collection.with_options(write_concern=self.write_concern)
+        self.collections[collection.name] = collection
+        start = time.perf_counter()
+        if self.pool is None:
+            collection.insert_many(batch, ordered=self.ordered)
+            self._record(collection.name, len(batch), start)
+        else:
+            self.slots.acquire()
+            self.pending.append(self.pool.submit(self._insert, collection, batch, start))
+            self._reap()
+        return len(batch)
+
+    def wait(self):
+        """Espera todos os lotes em voo e, com w=0, que o servidor tenha aplicado todos"""
+        pending, self.pending = self.pending, []
+        for fut in pending:
+            fut.result()
+        if self.write_concern is not None and not self.write_concern.acknowledged:
+            self._fence()
+
+    def _fence(self):
+        """
+        Com w=0 o insert_many volta antes de o servidor aplicar as escritas;
+        sem esta espera a denormalização e os índices leriam collections
+        incompletas. Espera o count_documents de cada collection chegar aos
+        documentos enviados (as collections são apagadas antes da carga).
+        """
+        deadline = time.perf_counter() + FENCE_TIMEOUT
+        for name, collection in self.collections.items():
+            expected = self.stats[name][0]
+            if self.applied.get(name, 0) >= expected:
+                continue
+            while True:
+                self.applied[name] = collection.count_documents({})
+                if self.applied[name] >= expected:
+                    break
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"{name}: {self.applied[name]} de {expected} documentos aplicados após "
+                                       f"{FENCE_TIMEOUT}s; escritas sem confirmação (w=0) podem ter sido perdidas")
+                time.sleep(0.1)
+            # no throughput a collection só termina quando as escritas foram aplicadas
+            self.stats[name][2] = max(self.stats[name][2], time.perf_counter())
+
+    def insert(self, collection, docs):
+        """Insere um fluxo de documentos e espera a conclusão; retorna o total"""
+        count = 0
+        for batch in batched(docs, self.batch_size):
+            count += self.submit(collection, batch)
+        self.wait()
+        return count
+
+    def rate(self, name):
+        docs, start, end = self.stats.get(name, (0, 0.0, 0.0))
+        return docs / (end - start) if end > start else 0.0
+
+    def report(self):
+        print("Throughput por collection:")
+        for name, (docs, start, end) in self.stats.items():
+            seconds = end - start
+            if seconds > 0:
+                print(f"  {name}: {docs} docs em {seconds:.2f}s ({docs / seconds:,.0f} docs/s)")
+            else:
+                print(f"  {name}: {docs} docs")
+
+    def close(self):
+        self.wait()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+def insert_in_batches(collection, docs, batch_size=1000, inserter=None):
+    """Insere um fluxo de documentos em lotes com insert_many; retorna o total"""
+    inserter = inserter or BulkInserter(batch_size=batch_size)
+    return inserter.insert(collection, docs)
+
+class _BsonDates(dict):
+    """'YYYY-MM-DD' -> datetime (BSON date), memoizado: só ~2.500 datas distintas"""
+
+    def __missing__(self, d):
+        value = self[d] = datetime.strptime(d, '%Y-%m-%d')
+        return value
+
+BSON_DATES = _BsonDates()
+
+def _derive_part(doc):
+    # token final de p_type ('LARGE BRUSHED BRASS' -> 'BRASS'): troca a regex BRASS$ por igualdade
+    doc['p_type_suffix'] = doc['p_type'].rsplit(' ', 1)[-1]
+    return doc
+
+def _derive_orders(doc):
+    doc['o_orderdate_d'] = BSON_DATES[doc['o_orderdate']]
+    return doc
+
+def _derive_lineitem(doc):
+    doc['l_shipdate_d'] = BSON_DATES[doc['l_shipdate']]
+    disc_price = doc['l_extendedprice'] * (1 - doc['l_discount'])
+    doc['l_disc_price'] = disc_price
+    doc['l_charge'] = disc_price * (1 + doc['l_tax'])
+    return doc
+
+DERIVED_FIELDS = {
+    'part': _derive_part,
+    'orders': _derive_orders,
+    'lineitem': _derive_lineitem,
+}
+
+# Índices sobre os campos derivados (usados pelas variantes derived=True das queries)
+DERIVED_INDEXES = [
+    ('part', [('p_size', 1), ('p_type_suffix', 1)], {}),
+    ('orders', 'o_orderdate_d', {}),
+    ('lineitem', [('l_shipdate_d', 1), ('l_returnflag', 1), ('l_linestatus', 1)], {}),
+]
+
+def with_derived_fields(table, docs):
+    """Acrescenta os campos derivados da tabela (se houver) a cada documento do fluxo"""
+    derive = DERIVED_FIELDS.get(table)
+    if derive is None:
+        return docs
+    return (derive(doc) for doc in docs)
+
+def create_derived_indexes(db):
+    print("Criando índices dos campos derivados...")
+    for collection, keys, options in DERIVED_INDEXES:
+        db[collection].create_index(keys, **options)
+
+# Campos de customer copiados para cada pedido (--embed-customer): a Q3 filtra o
+# segmento no primeiro $match de orders em vez de um $lookup por pedido
+ORDER_CUSTOMER_FIELDS = ['c_mktsegment', 'c_nationkey']
+
+ORDER_CUSTOMER_INDEXES = [
+    ('orders', [('c_mktsegment', 1), ('o_orderdate', 1)], {}),
+]
+
+# com --derived a Q3 filtra a data BSON
+ORDER_CUSTOMER_DERIVED_INDEXES = [
+    ('orders', [('c_mktsegment', 1), ('o_orderdate_d', 1)], {}),
+]
+
+def embed_customer_fields(db):
+    """Copia ORDER_CUSTOMER_FIELDS para orders no servidor ($lookup + $merge, uma vez na carga)"""
+    print("Embedando campos de customer em orders...")
+    db['orders'].aggregate([
+        {'$lookup': {
+            'from': 'customer',
+            'localField': 'o_custkey',
+            'foreignField': 'c_custkey',
+            'as': 'customer'
+        }},
+        {'$unwind': '$customer'},
+        {'$project': {field: f'$customer.{field}' for field in ORDER_CUSTOMER_FIELDS}},
+        {'$merge': {
+            'into': 'orders',
+            'on': '_id',
+            'whenMatched': 'merge',
+            'whenNotMatched': 'discard'
+        }}
+    ], allowDiskUse=True)
+
+def create_order_customer_indexes(db, derived=False):
+    print("Criando índices dos campos de customer em orders...")
+    indexes = ORDER_CUSTOMER_INDEXES + (ORDER_CUSTOMER_DERIVED_INDEXES if derived else [])
+    for collection, keys, options in indexes:
+        db[collection].create_index(keys, **options)
+
+def read_json_docs(json_file):
+    """Gera os documentos de um arquivo JSONL"""
     with open(json_file, 'r', encoding='utf-8') as f:
-        docs = []
         for line in f:
             if line.strip():
-                doc = json.loads(line)
-                docs.append(doc)
-                count += 1
-                # Inserir em lotes de 1000
-                if len(docs) >= 1000:
-                    collection.insert_many(docs)
-                    docs = []
-        if docs:
-            collection.insert_many(docs)
-    return count
-
-def denormalize_data(client, db):
-    """Denormaliza dados para otimizar queries"""
+                yield json.loads(line)
+
+def load_json_to_mongodb(json_file, collection, inserter=None, derived=False, rollup=None):
+    """
+    Carrega um arquivo JSONL para uma collection do MongoDB. rollup: dict de
+    parciais da Q1 (q1_rollup.tracking), acumuladas enquanto lineitem passa.
+    """
+    docs = read_json_docs(json_file)
+    if derived:
+        docs = with_derived_fields(collection.name, docs)
+    if rollup is not None and collection.name == 'lineitem':
+        docs = tracking(rollup, docs)
+    return insert_in_batches(collection, docs, inserter=inserter)
+
+def load_tbl_to_mongodb(tbl_file, table, collection, inserter=None, derived=False, rollup=None):
+    """Carrega um .tbl direto para o MongoDB, sem JSONL intermediário"""
+    docs = tpch_schema.iter_tbl(tbl_file, table)
+    if derived:
+        docs = with_derived_fields(table, docs)
+    if rollup is not None and table == 'lineitem':
+        docs = tracking(rollup, docs)
+    return insert_in_batches(collection, docs, inserter=inserter)
+
+def table_json_files(jsons_dir, table):
+    """Arquivos JSONL de uma tabela: o .jsonl único ou, se não existir, os shards numerados"""
+    json_file = os.path.join(jsons_dir, f'{table}.jsonl')
+    if os.path.exists(json_file):
+        return [json_file]
+    return sorted(glob.glob(os.path.join(glob.escape(jsons_dir), f'{table}.part-[0-9][0-9][0-9][0-9].jsonl')))
+
+# Índices por collection; as chaves primárias são únicas (exigido pelo $merge do modo bulk)
+INDEXES = [
+    ('lineitem', 'l_shipdate', {}),
+    ('lineitem', 'l_orderkey', {}),
+    ('lineitem', 'l_returnflag', {}),
+    ('lineitem', 'l_linestatus', {}),
+    ('orders', 'o_orderkey', {'unique': True}),
+    ('orders', 'o_custkey', {}),
+    ('orders', 'o_orderdate', {}),
+    ('customer', 'c_custkey', {'unique': True}),
+    ('customer', 'c_mktsegment', {}),
+    ('part', 'p_partkey', {'unique': True}),
+    ('part', 'p_size', {}),
+    ('part', 'p_type', {}),
+    ('supplier', 's_suppkey', {'unique': True}),
+    ('supplier', 's_nationkey', {}),
+    ('nation', 'n_nationkey', {'unique': True}),
+    ('nation', 'n_regionkey', {}),
+    ('region', 'r_regionkey', {'unique': True}),
+    ('region', 'r_name', {}),
+    ('partsupp', [('ps_partkey', 1), ('ps_suppkey', 1)], {}),
+]
+
+# Índices de junção: usados pela própria denormalização (update_one/find, $lookup, $merge)
+JOIN_INDEX_KEYS = {
+    'l_orderkey', 'o_orderkey', 'c_custkey', 'p_partkey', 's_suppkey', 'n_nationkey', 'r_regionkey',
+    ('ps_partkey', 'ps_suppkey'),
+}
+
+def index_kind(keys):
+    key = keys if isinstance(keys, str) else tuple(k for k, _ in keys)
+    return 'join' if key in JOIN_INDEX_KEYS else 'query'
+
+def create_indexes(db, collections=None, kind=None):
+    """
+    Cria os índices usados pela denormalização e pelas queries.
+    kind: None (todos), 'join' (só os de junção) ou 'query' (os demais).
+    """
+    print("Criando índices..." if kind is None else f"Criando índices ({kind})...")
+    for collection, keys, options in INDEXES:
+        if collections is not None and collection not in collections:
+            continue
+        if kind is not None and index_kind(keys) != kind:
+            continue
+        db[collection].create_index(keys, **options)
+
+def denormalize_data(client, db, defer_indexes=False):
+    """
+    Denormaliza dados para otimizar queries.
+    Com defer_indexes só os índices de junção são criados antes dos updates;
+    os demais ficam para depois que os dados estão no lugar.
+    """
     print("Denormalizando dados...")
     
     # Carregar dados básicos primeiro
@@ -35,27 +359,7 @@ def denormalize_data(client, db):
     lineitem_col = db['lineitem']
     partsupp_col = db['partsupp']
     
-    # Criar índices para melhor performance
-    print("Criando índices...")
-    lineitem_col.create_index("l_shipdate")
-    lineitem_col.create_index("l_orderkey")
-    lineitem_col.create_index("l_returnflag")
-    lineitem_col.create_index("l_linestatus")
-    orders_col.create_index("o_orderkey")
-    orders_col.create_index("o_custkey")
-    orders_col.create_index("o_orderdate")
-    customer_col.create_index("c_custkey")
-    customer_col.create_index("c_mktsegment")
-    part_col.create_index("p_partkey")
-    part_col.create_index("p_size")
-    part_col.create_index("p_type")
-    supplier_col.create_index("s_suppkey")
-    supplier_col.create_index("s_nationkey")
-    nation_col.create_index("n_nationkey")
-    nation_col.create_index("n_regionkey")
-    region_col.create_index("r_regionkey")
-    region_col.create_index("r_name")
-    partsupp_col.create_index([("ps_partkey", 1), ("ps_suppkey", 1)])
+    create_indexes(db, kind='join' if defer_indexes else None)
     
     # Embedar nation em supplier e customer
     print("Embedando nation em supplier e customer...")
@@ -118,13 +422,340 @@ def denormalize_data(client, db):
                 {'$set': {'partsupps': enriched_partsupps}}
             )
     
+    if defer_indexes:
+        create_indexes(db, kind='query')
     print("Denormalização concluída!")
 
+def nation_with_region_stages(local_field):
+    """Estágios que embedam nation (com nation.region) a partir de local_field"""
+    return [
+        {'$lookup': {
+            'from': 'nation',
+            'localField': local_field,
+            'foreignField': 'n_nationkey',
+            'as': 'nation'
+        }},
+        {'$unwind': '$nation'},
+        {'$lookup': {
+            'from': 'region',
+            'localField': 'nation.n_regionkey',
+            'foreignField': 'r_regionkey',
+            'as': 'nation.region'
+        }},
+        {'$unwind': {'path': '$nation.region', 'preserveNullAndEmptyArrays': True}},
+    ]
+
+def denormalize_data_bulk(db, defer_indexes=False):
+    """
+    Denormalização em lote, feita no servidor com $lookup + $merge.
+    Gera os mesmos embeddings de denormalize_data (nation.region em supplier/customer,
+    lineitems em orders e partsupps.supplier em part) sem um update_one por documento.
+    """
+    print("Denormalizando dados (bulk)...")
+    create_indexes(db, kind='join' if defer_indexes else None)
+
+    # Embedar nation (com region) em supplier e customer
+    print("Embedando nation em supplier e customer...")
+    for collection, nationkey in (('supplier', 's_nationkey'), ('customer', 'c_nationkey')):
+        db[collection].aggregate(
+            nation_with_region_stages(nationkey) + [
+                {'$project': {'nation': 1}},
+                {'$merge': {
+                    'into': collection,
+                    'on': '_id',
+                    'whenMatched': 'merge',
+                    'whenNotMatched': 'discard'
+                }}
+            ],
+            allowDiskUse=True
+        )
+
+    # Embedar lineitems em orders (útil para Q1 e Q3)
+    print("Embedando lineitems em orders...")
+    db['lineitem'].aggregate([
+        {'$group': {'_id': '$l_orderkey', 'lineitems': {'$push': '$$ROOT'}}},
+        {'$project': {'_id': 0, 'o_orderkey': '$_id', 'lineitems': 1}},
+        {'$merge': {
+            'into': 'orders',
+            'on': 'o_orderkey',
+            'whenMatched': 'merge',
+            'whenNotMatched': 'discard'
+        }}
+    ], allowDiskUse=True)
+
+    # Embedar partsupp (com supplier) em part (útil para Q2)
+    print("Embedando partsupp em part...")
+    db['partsupp'].aggregate([
+        {'$lookup': {
+            'from': 'supplier',
+            'localField': 'ps_suppkey',
+            'foreignField': 's_suppkey',
+            'as': 'supplier'
+        }},
+        {'$unwind': {'path': '$supplier', 'preserveNullAndEmptyArrays': True}},
+        {'$group': {'_id': '$ps_partkey', 'partsupps': {'$push': '$$ROOT'}}},
+        {'$project': {'_id': 0, 'p_partkey': '$_id', 'partsupps': 1}},
+        {'$merge': {
+            'into': 'part',
+            'on': 'p_partkey',
+            'whenMatched': 'merge',
+            'whenNotMatched': 'discard'
+        }}
+    ], allowDiskUse=True)
+
+    if defer_indexes:
+        create_indexes(db, kind='query')
+    print("Denormalização concluída!")
+
+# Tabelas que Q1–Q3 nunca leem diretamente (só as cópias embedadas)
+UNUSED_BY_QUERIES = {'region', 'nation', 'supplier', 'partsupp'}
+
+def merge_groups(parents, parent_key, children, child_key):
+    """
+    Merge join de dois fluxos ordenados pela mesma chave.
+    Gera (pai, [filhos]) sem materializar nenhum dos dois lados. Filhos sem
+    pai no ponto do fluxo em que aparecem (chave inexistente ou .tbl fora de
+    ordem) saem como (None, [filhos]), para o chamador ainda inseri-los.
+    """
+    groups = groupby(children, key=itemgetter(child_key))
+    key, group = next(groups, (None, None))
+    for parent in parents:
+        pk = parent[parent_key]
+        while key is not None and key < pk:
+            yield None, list(group)
+            key, group = next(groups, (None, None))
+        if key == pk:
+            yield parent, list(group)
+            key, group = next(groups, (None, None))
+        else:
+            yield parent, []
+    while key is not None:
+        yield None, list(group)
+        key, group = next(groups, (None, None))
+
+def embed_nation(doc, nationkey_field, nations):
+    """Copia nation (com region) para o documento, como em denormalize_data"""
+    nation = nations.get(doc[nationkey_field])
+    if nation:
+        doc['nation'] = nation.copy()
+    return doc
+
+def load_hashjoin(db, tbl_dir, skip_unused=False, inserter=None, derived=False, embed_customer=False,
+                  rollup=None):
+    """
+    Carga em passada única: monta os documentos já denormalizados antes do insert.
+    region, nation e supplier ficam em dicts; partsupp é agrupado por parte e
+    lineitem por pedido (os .tbl do dbgen já vêm ordenados por essas chaves),
+    então a memória fica limitada a um lote. Com skip_unused as cópias
+    normalizadas que Q1–Q3 não leem não são inseridas. Com embed_customer
+    os ORDER_CUSTOMER_FIELDS de cada cliente ficam em um dict e são
+    copiados para os pedidos. rollup: dict de parciais da Q1, acumuladas
+    enquanto lineitem passa.
+    """
+    def tbl(table):
+        docs = tpch_schema.iter_tbl(os.path.join(tbl_dir, f'{table}.tbl'), table)
+        return with_derived_fields(table, docs) if derived else docs
+
+    def keep(table):
+        return not (skip_unused and table in UNUSED_BY_QUERIES)
+
+    inserter = inserter or BulkInserter()
+    batch_size = inserter.batch_size
+
+    def insert(table, docs):
+        # o inserter atribui _id aos próprios dicts, então as cópias embedadas
+        # feitas depois carregam o mesmo _id da collection normalizada
+        if docs and keep(table):
+            inserter.submit(db[table], docs)
+        return len(docs)
+
+    counts = {}
+    orphans = {'partsupp': 0, 'lineitem': 0}
+    start = time.perf_counter()
+
+    # Dimensões pequenas em memória
+    print("Carregando region e nation...")
+    regions = list(tbl('region'))
+    counts['region'] = insert('region', regions)
+    region_dict = {r['r_regionkey']: r for r in regions}
+
+    nation_list = list(tbl('nation'))
+    counts['nation'] = insert('nation', nation_list)
+    nations = {}
+    for n in nation_list:
+        nation_copy = n.copy()
+        region = region_dict.get(n['n_regionkey'])
+        if region:
+            nation_copy['region'] = region
+        nations[n['n_nationkey']] = nation_copy
+
+    print("Carregando supplier...")
+    suppliers = [embed_nation(s, 's_nationkey', nations) for s in tbl('supplier')]
+    counts['supplier'] = insert('supplier', suppliers)
+    supplier_dict = {s['s_suppkey']: s for s in suppliers}
+
+    print("Carregando customer...")
+    counts['customer'] = 0
+    customer_fields = {}
+    for batch in batched((embed_nation(c, 'c_nationkey', nations) for c in tbl('customer')), batch_size):
+        counts['customer'] += insert('customer', batch)
+        if embed_customer:
+            for c in batch:
+                customer_fields[c['c_custkey']] = {field: c[field] for field in ORDER_CUSTOMER_FIELDS}
+
+    # part + partsupp (agrupado por ps_partkey)
+    print("Carregando part com partsupps embedados...")
+    counts['part'] = counts['partsupp'] = 0
+    for batch in batched(merge_groups(tbl('part'), 'p_partkey', tbl('partsupp'), 'ps_partkey'), batch_size):
+        counts['partsupp'] += insert('partsupp', [ps for _, group in batch for ps in group])
+        parts = []
+        for part, group in batch:
+            if part is None:
+                orphans['partsupp'] += len(group)
+                continue
+            if group:
+                enriched_partsupps = []
+                for ps in group:
+                    supplier = supplier_dict.get(ps['ps_suppkey'])
+                    if supplier:
+                        ps_copy = ps.copy()
+                        ps_copy['supplier'] = supplier
+                        enriched_partsupps.append(ps_copy)
+                    else:
+                        enriched_partsupps.append(ps)
+                part['partsupps'] = enriched_partsupps
+            parts.append(part)
+        counts['part'] += insert('part', parts)
+
+    # orders + lineitem (agrupado por l_orderkey)
+    print("Carregando orders com lineitems embedados...")
+    counts['orders'] = counts['lineitem'] = 0
+    lineitems = tbl('lineitem')
+    if rollup is not None:
+        lineitems = tracking(rollup, lineitems)
+    for batch in batched(merge_groups(tbl('orders'), 'o_orderkey', lineitems, 'l_orderkey'), batch_size):
+        counts['lineitem'] += insert('lineitem', [l for _, group in batch for l in group])
+        orders = []
+        for order, group in batch:
+            if order is None:
+                orphans['lineitem'] += len(group)
+                continue
+            if embed_customer:
+                order.update(customer_fields.get(order['o_custkey'], {}))
+            if group:
+                order['lineitems'] = group
+            orders.append(order)
+        counts['orders'] += insert('orders', orders)
+
+    inserter.wait()
+    elapsed = time.perf_counter() - start
+    for table in TABLES:
+        if keep(table):
+            print(f"  {counts[table]} documentos inseridos em {table}")
+        else:
+            print(f"  {table}: cópia normalizada não inserida ({counts[table]} linhas)")
+    for table, parent in (('partsupp', 'part'), ('lineitem', 'orders')):
+        if orphans[table]:
+            print(f"  AVISO: {orphans[table]} linhas de {table} sem {parent} correspondente ou fora de ordem no .tbl; "
+                  f"inseridas só na collection normalizada, sem embedding")
+    total = sum(counts[t] for t in TABLES if keep(t))
+    print(f"  total: {total} documentos em {elapsed:.2f}s ({total / elapsed if elapsed > 0 else 0:,.0f} docs/s)")
+
+    create_indexes(db, [t for t in TABLES if keep(t)])
+    return counts
+
+def load_from_jsonl(db, jsons_dir, inserter=None, derived=False, rollup=None):
+    """Carrega as tabelas a partir dos JSONL gerados por tpch_to_json.py"""
+    if not os.path.exists(jsons_dir):
+        print(f"Erro: Diretório {jsons_dir} não encontrado!")
+        print("Execute primeiro o script tpch_to_json.py para gerar os arquivos JSON.")
+        return False
+
+    for table in TABLES:
+        json_files = table_json_files(jsons_dir, table)
+        if json_files:
+            print(f"Carregando {table}...")
+            collection = db[table]
+            count = 0
+            for json_file in json_files:
+                count += load_json_to_mongodb(json_file, collection, inserter, derived, rollup)
+            print(f"  {count} documentos inseridos em {table}")
+        else:
+            print(f"  Aviso: {os.path.join(jsons_dir, f'{table}.jsonl')} não encontrado!")
+    return True
+
+def load_from_tbl(db, tbl_dir, inserter=None, derived=False, rollup=None):
+    """Carrega as tabelas direto dos .tbl (leitura, decodificação e insert_many em fluxo)"""
+    if not os.path.exists(tbl_dir):
+        print(f"Erro: Diretório {tbl_dir} não encontrado!")
+        return False
+
+    for table in TABLES:
+        tbl_file = os.path.join(tbl_dir, f'{table}.tbl')
+        if os.path.exists(tbl_file):
+            print(f"Carregando {table}...")
+            count = load_tbl_to_mongodb(tbl_file, table, db[table], inserter, derived, rollup)
+            print(f"  {count} documentos inseridos em {table}")
+        else:
+            print(f"  Aviso: {tbl_file} não encontrado!")
+    return True
+
+def build_rollup(db, partials):
+    """
+    Grava o rollup da Q1 com as parciais acumuladas durante a carga; novas
+    inserções usam q1_rollup.insert_lineitems
+    """
+    print(f"Gravando {ROLLUP_COLLECTION}...")
+    buckets = apply_partials(db, partials)
+    create_rollup_indexes(db)
+    print(f"  {buckets} buckets")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carrega o TPC-H no MongoDB")
+    parser.add_argument('--source', choices=['jsonl', 'tbl'], default='jsonl',
+                        help="jsonl: lê jsons/*.jsonl; tbl: lê os .tbl direto, sem arquivo intermediário")
+    parser.add_argument('--jsons-dir', default=os.path.join(os.getcwd(), 'jsons'))
+    parser.add_argument('--tbl-dir', default=os.path.join(os.getcwd(), 'tpch-dbgen'))
+    parser.add_argument('--denormalize', choices=['loop', 'bulk'], default='loop',
+                        help="loop: update_one por documento; bulk: $lookup + $merge no servidor")
+    parser.add_argument('--mode', choices=['normalized', 'hashjoin'], default='normalized',
+                        help="normalized: insere e depois denormaliza; hashjoin: monta os documentos finais "
+                             "em uma passada sobre os .tbl")
+    parser.add_argument('--skip-unused', action='store_true',
+                        help="hashjoin: não insere region, nation, supplier e partsupp normalizados")
+    parser.add_argument('--derived', action='store_true',
+                        help="acrescenta p_type_suffix, datas BSON (*_d), l_disc_price e l_charge, com índices")
+    parser.add_argument('--embed-customer', action='store_true',
+                        help="copia c_mktsegment e c_nationkey para orders, com índice (c_mktsegment, o_orderdate)")
+    parser.add_argument('--q1-rollup', action='store_true',
+                        help="mantém lineitem_q1_rollup (somas da Q1 por returnflag/linestatus/shipdate)")
+    parser.add_argument('--index-timing', choices=['before', 'after'], default='before',
+                        help="after: só os índices de junção antes da denormalização, os demais no fim")
+    parser.add_argument('--batch-size', type=int, default=1000, help="documentos por insert_many")
+    parser.add_argument('--insert-workers', type=int, default=1,
+                        help="threads com lotes em voo (1 = inserts síncronos, como antes)")
+    parser.add_argument('--unordered', action='store_true', help="insert_many com ordered=False")
+    parser.add_argument('--write-concern', choices=list(WRITE_CONCERNS), default='default',
+                        help="relaxed (w=1, j=False) e unacknowledged (w=0) só para bancos descartáveis")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     # Configuração de conexão
     client = MongoClient('mongodb://localhost:27017/')
     db = client['tpch']
+    inserter = BulkInserter(
+        client,
+        batch_size=args.batch_size,
+        workers=args.insert_workers,
+        ordered=not args.unordered,
+        write_concern=WRITE_CONCERNS[args.write_concern]
+    )
     
+    # parciais da Q1 acumuladas enquanto lineitem é carregado (--q1-rollup)
+    rollup = {} if args.q1_rollup else None
+
     # Limpar collections existentes
     print("Limpando collections existentes...")
     db.drop_collection('region')
@@ -135,31 +766,50 @@ def main():
     db.drop_collection('partsupp')
     db.drop_collection('orders')
     db.drop_collection('lineitem')
+    db.drop_collection(ROLLUP_COLLECTION)
     
-    base_dir = os.getcwd()
-    jsons_dir = os.path.join(base_dir, 'jsons')
-    
-    if not os.path.exists(jsons_dir):
-        print(f"Erro: Diretório {jsons_dir} não encontrado!")
-        print("Execute primeiro o script tpch_to_json.py para gerar os arquivos JSON.")
+    if args.mode == 'hashjoin':
+        if not os.path.exists(args.tbl_dir):
+            print(f"Erro: Diretório {args.tbl_dir} não encontrado!")
+            return
+        load_hashjoin(db, args.tbl_dir, args.skip_unused, inserter, args.derived, args.embed_customer, rollup)
+        inserter.close()
+        inserter.report()
+        if args.derived:
+            create_derived_indexes(db)
+        if args.embed_customer:
+            create_order_customer_indexes(db, args.derived)
+        if args.q1_rollup:
+            build_rollup(db, rollup)
+        print("\nCarregamento concluído!")
+        print(f"Database: {db.name}")
+        print(f"Collections: {db.list_collection_names()}")
         return
-    
-    tables = ['region', 'nation', 'supplier', 'customer', 'part', 'partsupp', 'orders', 'lineitem']
-    
+
     # Carregar dados básicos
     print("Carregando dados básicos...")
-    for table in tables:
-        json_file = os.path.join(jsons_dir, f'{table}.jsonl')
-        if os.path.exists(json_file):
-            print(f"Carregando {table}...")
-            collection = db[table]
-            count = load_json_to_mongodb(json_file, collection)
-            print(f"  {count} documentos inseridos em {table}")
-        else:
-            print(f"  Aviso: {json_file} não encontrado!")
+    if args.source == 'tbl':
+        loaded = load_from_tbl(db, args.tbl_dir, inserter, args.derived, rollup)
+    else:
+        loaded = load_from_jsonl(db, args.jsons_dir, inserter, args.derived, rollup)
+    inserter.close()
+    if not loaded:
+        return
+    inserter.report()
     
     # Denormalizar dados
-    denormalize_data(client, db)
+    defer_indexes = args.index_timing == 'after'
+    if args.denormalize == 'bulk':
+        denormalize_data_bulk(db, defer_indexes)
+    else:
+        denormalize_data(client, db, defer_indexes)
+    if args.embed_customer:
+        embed_customer_fields(db)
+        create_order_customer_indexes(db, args.derived)
+    if args.derived:
+        create_derived_indexes(db)
+    if args.q1_rollup:
+        build_rollup(db, rollup)
     
     print("\nCarregamento concluído!")
     print(f"Database: {db.name}")
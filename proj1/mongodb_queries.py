@@ -1,12 +1,17 @@
+import re
 from pymongo import MongoClient
 from datetime import datetime, timedelta
 
-def query1_mongodb(db):
-    """Q1: Pricing Summary Report Query"""
-    lineitem_col = db['lineitem']
-    
-    # Calcular data limite: 1998-12-01 - 90 dias
-    date_limit = datetime(1998, 12, 1) - timedelta(days=90)
+from q1_rollup import ROLLUP_COLLECTION
+
+def q1_pipeline(derived=False, delta=90):
+    """
+    Pipeline da Q1 (sobre lineitem).
+    derived: usa l_shipdate_d (BSON date) e os l_disc_price/l_charge pré-calculados
+    na carga (load_mongodb.py --derived) em vez de multiplicar em cada documento.
+    """
+    # Calcular data limite: 1998-12-01 - delta dias
+    date_limit = datetime(1998, 12, 1) - timedelta(days=delta)
     
     pipeline = [
         {
@@ -69,20 +74,88 @@ def query1_mongodb(db):
             }
         }
     ]
-    
-    return list(lineitem_col.aggregate(pipeline))
 
-def query2_mongodb(db):
-    """Q2: Minimum Cost Supplier Query - Versão otimizada com agregação"""
-    part_col = db['part']
+    if derived:
+        pipeline[0]['$match'] = {'l_shipdate_d': {'$lte': date_limit}}
+        group = pipeline[1]['$group']
+        group['sum_disc_price'] = {'$sum': '$l_disc_price'}
+        group['sum_charge'] = {'$sum': '$l_charge'}
+    return pipeline
+
+def q1_rollup_pipeline(delta=90):
+    """
+    Pipeline da Q1 sobre o rollup (q1_rollup.py): soma os buckets diários
+    até a data limite e deriva as médias das somas e contagens.
+    """
+    date_limit = datetime(1998, 12, 1) - timedelta(days=delta)
     
+    pipeline = [
+        {
+            '$match': {
+                '_id.shipdate': {'$lte': date_limit.strftime('%Y-%m-%d')}
+            }
+        },
+        {
+            '$group': {
+                '_id': {
+                    'returnflag': '$_id.returnflag',
+                    'linestatus': '$_id.linestatus'
+                },
+                'sum_qty': {'$sum': '$sum_qty'},
+                'sum_base_price': {'$sum': '$sum_base_price'},
+                'sum_disc_price': {'$sum': '$sum_disc_price'},
+                'sum_charge': {'$sum': '$sum_charge'},
+                'sum_disc': {'$sum': '$sum_disc'},
+                'count_order': {'$sum': '$count'}
+            }
+        },
+        {
+            '$sort': {
+                '_id.returnflag': 1,
+                '_id.linestatus': 1
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'l_returnflag': '$_id.returnflag',
+                'l_linestatus': '$_id.linestatus',
+                'sum_qty': 1,
+                'sum_base_price': 1,
+                'sum_disc_price': 1,
+                'sum_charge': 1,
+                'avg_qty': {'$divide': ['$sum_qty', '$count_order']},
+                'avg_price': {'$divide': ['$sum_base_price', '$count_order']},
+                'avg_disc': {'$divide': ['$sum_disc', '$count_order']},
+                'count_order': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query1_mongodb(db, derived=False, rollup=False, delta=90):
+    """
+    Q1: Pricing Summary Report Query
+    rollup: responde a partir de lineitem_q1_rollup (load_mongodb.py --q1-rollup)
+    """
+    if rollup:
+        return list(db[ROLLUP_COLLECTION].aggregate(q1_rollup_pipeline(delta)))
+    lineitem_col = db['lineitem']
+    return list(lineitem_col.aggregate(q1_pipeline(derived, delta)))
+
+def q2_pipeline(derived=False, size=15, type_suffix='BRASS', region='EUROPE'):
+    """
+    Pipeline da Q2 (sobre part).
+    derived: filtra p_type_suffix = type_suffix (servido pelo índice
+    (p_size, p_type_suffix)) em vez da regex de sufixo.
+    """
     # Pipeline de agregação otimizado
     pipeline = [
-        # Filtrar partes: p_size = 15 e p_type LIKE '%BRASS'
+        # Filtrar partes: p_size = size e p_type LIKE '%type_suffix'
         {
             '$match': {
-                'p_size': 15,
-                'p_type': {'$regex': 'BRASS$'}
+                'p_size': size,
+                'p_type': {'$regex': f'{type_suffix}$'}
             }
         },
         # Desdobrar partsupps em documentos separados
@@ -92,10 +165,10 @@ def query2_mongodb(db):
                 'preserveNullAndEmptyArrays': False
             }
         },
-        # Filtrar apenas partsupps da região EUROPE
+        # Filtrar apenas partsupps da região pedida
         {
             '$match': {
-                'partsupps.supplier.nation.region.r_name': 'EUROPE'
+                'partsupps.supplier.nation.region.r_name': region
             }
         },
         # Agrupar por partkey para encontrar o menor custo
@@ -141,15 +214,27 @@ def query2_mongodb(db):
             }
         }
     ]
-    
-    return list(part_col.aggregate(pipeline))
 
-def query3_mongodb(db):
-    """Q3: Shipping Priority Query"""
-    orders_col = db['orders']
-    
-    # Data limite: 1995-03-15
-    date_limit = datetime(1995, 3, 15)
+    if derived:
+        pipeline[0]['$match'] = {'p_size': size, 'p_type_suffix': type_suffix}
+    return pipeline
+
+def query2_mongodb(db, derived=False, size=15, type_suffix='BRASS', region='EUROPE'):
+    """Q2: Minimum Cost Supplier Query - Versão otimizada com agregação"""
+    part_col = db['part']
+    return list(part_col.aggregate(q2_pipeline(derived, size, type_suffix, region)))
+
+def q3_pipeline(derived=False, embedded_customer=False, segment='BUILDING', date='1995-03-15'):
+    """
+    Pipeline da Q3 (sobre orders).
+    derived: compara o_orderdate_d/l_shipdate_d (BSON date) e soma l_disc_price.
+    embedded_customer: usa o c_mktsegment copiado para orders (load_mongodb.py
+    --embed-customer); segmento e data ficam no primeiro $match, servido pelo
+    índice (c_mktsegment, o_orderdate), ou (c_mktsegment, o_orderdate_d) com
+    derived, sem o $lookup em customer.
+    """
+    # Data limite
+    date_limit = datetime.strptime(date, '%Y-%m-%d')
     
     pipeline = [
         {
@@ -170,7 +255,7 @@ def query3_mongodb(db):
         },
         {
             '$match': {
-                'customer.c_mktsegment': 'BUILDING'
+                'customer.c_mktsegment': segment
             }
         },
         {
@@ -214,6 +299,1085 @@ def query3_mongodb(db):
             }
         }
     ]
-    
-    return list(orders_col.aggregate(pipeline))
+
+    if derived:
+        pipeline[0]['$match'] = {'o_orderdate_d': {'$lt': date_limit}}
+        pipeline[5]['$match'] = {'lineitems.l_shipdate_d': {'$gt': date_limit}}
+        pipeline[6]['$group']['revenue'] = {'$sum': '$lineitems.l_disc_price'}
+    if embedded_customer:
+        pipeline[0]['$match'] = {'c_mktsegment': segment, **pipeline[0]['$match']}
+        del pipeline[1:4]  # $lookup, $unwind e $match de customer
+    return pipeline
+
+def query3_mongodb(db, derived=False, embedded_customer=False, segment='BUILDING', date='1995-03-15'):
+    """Q3: Shipping Priority Query"""
+    orders_col = db['orders']
+    return list(orders_col.aggregate(q3_pipeline(derived, embedded_customer, segment, date)))
+
+# ---------------------------------------------------------------------------
+# Q4-Q22. Os parâmetros padrão são os valores de validação (tpch_params.py).
+# Sempre que possível os pipelines usam os documentos embutidos da carga:
+# orders.lineitems, part.partsupps(.supplier.nation) e
+# customer/supplier.nation.region. Filtros sobre dimensões pequenas (part,
+# supplier) são resolvidos antes com distinct e entram no pipeline como $in.
+# ---------------------------------------------------------------------------
+
+def _add_months(date_str, months):
+    """'1993-07-01' + n meses (as datas dos parâmetros são sempre dia 1)"""
+    d = datetime.strptime(date_str, '%Y-%m-%d')
+    m = d.month - 1 + months
+    return d.replace(year=d.year + m // 12, month=m % 12 + 1).strftime('%Y-%m-%d')
+
+def _disc_price(prefix=''):
+    """l_extendedprice * (1 - l_discount), opcionalmente dentro de um subdocumento"""
+    return {
+        '$multiply': [
+            f'${prefix}l_extendedprice',
+            {'$subtract': [1, f'${prefix}l_discount']}
+        ]
+    }
+
+def _year(field):
+    """extract(year from <data 'YYYY-MM-DD'>)"""
+    return {'$toInt': {'$substrBytes': [field, 0, 4]}}
+
+def _lookup_one(collection, local_field, foreign_field, as_field):
+    """$lookup por chave primária seguido de $unwind (junção 1:1)"""
+    return [
+        {
+            '$lookup': {
+                'from': collection,
+                'localField': local_field,
+                'foreignField': foreign_field,
+                'as': as_field
+            }
+        },
+        {'$unwind': f'${as_field}'}
+    ]
+
+def _partsupp_of(part_field, suppkey_field):
+    """Seleciona em part.partsupps o partsupp do fornecedor do lineitem"""
+    return {
+        '$arrayElemAt': [
+            {
+                '$filter': {
+                    'input': f'${part_field}.partsupps',
+                    'as': 'ps',
+                    'cond': {'$eq': ['$$ps.ps_suppkey', f'${suppkey_field}']}
+                }
+            },
+            0
+        ]
+    }
+
+def q4_pipeline(date='1993-07-01'):
+    """Pipeline da Q4 (sobre orders, com os lineitems embutidos)"""
+    pipeline = [
+        {
+            '$match': {
+                'o_orderdate': {'$gte': date, '$lt': _add_months(date, 3)}
+            }
+        },
+        # exists (lineitem com l_commitdate < l_receiptdate)
+        {
+            '$match': {
+                '$expr': {
+                    '$anyElementTrue': [{
+                        '$map': {
+                            'input': {'$ifNull': ['$lineitems', []]},
+                            'as': 'l',
+                            'in': {'$lt': ['$$l.l_commitdate', '$$l.l_receiptdate']}
+                        }
+                    }]
+                }
+            }
+        },
+        {
+            '$group': {
+                '_id': '$o_orderpriority',
+                'order_count': {'$sum': 1}
+            }
+        },
+        {'$sort': {'_id': 1}},
+        {
+            '$project': {
+                '_id': 0,
+                'o_orderpriority': '$_id',
+                'order_count': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query4_mongodb(db, date='1993-07-01'):
+    """Q4: Order Priority Checking Query"""
+    return list(db['orders'].aggregate(q4_pipeline(date)))
+
+def q5_pipeline(region='ASIA', date='1994-01-01'):
+    """Pipeline da Q5 (sobre orders): cliente e fornecedor da mesma nação da região"""
+    pipeline = [
+        {
+            '$match': {
+                'o_orderdate': {'$gte': date, '$lt': _add_months(date, 12)}
+            }
+        },
+        *_lookup_one('customer', 'o_custkey', 'c_custkey', 'customer'),
+        {
+            '$match': {
+                'customer.nation.region.r_name': region
+            }
+        },
+        {'$unwind': '$lineitems'},
+        *_lookup_one('supplier', 'lineitems.l_suppkey', 's_suppkey', 'supplier'),
+        {
+            '$match': {
+                '$expr': {'$eq': ['$supplier.s_nationkey', '$customer.c_nationkey']}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$customer.nation.n_name',
+                'revenue': {'$sum': _disc_price('lineitems.')}
+            }
+        },
+        {'$sort': {'revenue': -1}},
+        {
+            '$project': {
+                '_id': 0,
+                'n_name': '$_id',
+                'revenue': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query5_mongodb(db, region='ASIA', date='1994-01-01'):
+    """Q5: Local Supplier Volume Query"""
+    return list(db['orders'].aggregate(q5_pipeline(region, date)))
+
+def q6_pipeline(date='1994-01-01', discount=0.06, quantity=24):
+    """Pipeline da Q6 (sobre lineitem)"""
+    pipeline = [
+        {
+            '$match': {
+                'l_shipdate': {'$gte': date, '$lt': _add_months(date, 12)},
+                'l_discount': {
+                    '$gte': round(discount - 0.01, 2),
+                    '$lte': round(discount + 0.01, 2)
+                },
+                'l_quantity': {'$lt': quantity}
+            }
+        },
+        {
+            '$group': {
+                '_id': None,
+                'revenue': {'$sum': {'$multiply': ['$l_extendedprice', '$l_discount']}}
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'revenue': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query6_mongodb(db, date='1994-01-01', discount=0.06, quantity=24):
+    """Q6: Forecasting Revenue Change Query"""
+    return list(db['lineitem'].aggregate(q6_pipeline(date, discount, quantity)))
+
+def q7_pipeline(nation1='FRANCE', nation2='GERMANY'):
+    """Pipeline da Q7 (sobre orders): volume enviado entre as duas nações"""
+    start, end = '1995-01-01', '1996-12-31'
+    nations = [nation1, nation2]
+    pipeline = [
+        {
+            '$match': {
+                'lineitems': {'$elemMatch': {'l_shipdate': {'$gte': start, '$lte': end}}}
+            }
+        },
+        *_lookup_one('customer', 'o_custkey', 'c_custkey', 'customer'),
+        {
+            '$match': {
+                'customer.nation.n_name': {'$in': nations}
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_shipdate': {'$gte': start, '$lte': end}
+            }
+        },
+        *_lookup_one('supplier', 'lineitems.l_suppkey', 's_suppkey', 'supplier'),
+        {
+            '$match': {
+                'supplier.nation.n_name': {'$in': nations},
+                '$expr': {'$ne': ['$supplier.nation.n_name', '$customer.nation.n_name']}
+            }
+        },
+        {
+            '$group': {
+                '_id': {
+                    'supp_nation': '$supplier.nation.n_name',
+                    'cust_nation': '$customer.nation.n_name',
+                    'l_year': _year('$lineitems.l_shipdate')
+                },
+                'revenue': {'$sum': _disc_price('lineitems.')}
+            }
+        },
+        {
+            '$sort': {
+                '_id.supp_nation': 1,
+                '_id.cust_nation': 1,
+                '_id.l_year': 1
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'supp_nation': '$_id.supp_nation',
+                'cust_nation': '$_id.cust_nation',
+                'l_year': '$_id.l_year',
+                'revenue': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query7_mongodb(db, nation1='FRANCE', nation2='GERMANY'):
+    """Q7: Volume Shipping Query"""
+    return list(db['orders'].aggregate(q7_pipeline(nation1, nation2)))
+
+def q8_pipeline(partkeys, nation='BRAZIL', region='AMERICA'):
+    """
+    Pipeline da Q8 (sobre orders).
+    partkeys: p_partkey das peças do tipo pedido (ver query8_mongodb).
+    """
+    pipeline = [
+        {
+            '$match': {
+                'o_orderdate': {'$gte': '1995-01-01', '$lte': '1996-12-31'},
+                'lineitems.l_partkey': {'$in': partkeys}
+            }
+        },
+        *_lookup_one('customer', 'o_custkey', 'c_custkey', 'customer'),
+        {
+            '$match': {
+                'customer.nation.region.r_name': region
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_partkey': {'$in': partkeys}
+            }
+        },
+        *_lookup_one('supplier', 'lineitems.l_suppkey', 's_suppkey', 'supplier'),
+        {
+            '$group': {
+                '_id': _year('$o_orderdate'),
+                'nation_volume': {
+                    '$sum': {
+                        '$cond': [
+                            {'$eq': ['$supplier.nation.n_name', nation]},
+                            _disc_price('lineitems.'),
+                            0
+                        ]
+                    }
+                },
+                'volume': {'$sum': _disc_price('lineitems.')}
+            }
+        },
+        {'$sort': {'_id': 1}},
+        {
+            '$project': {
+                '_id': 0,
+                'o_year': '$_id',
+                'mkt_share': {'$divide': ['$nation_volume', '$volume']}
+            }
+        }
+    ]
+    return pipeline
+
+def query8_mongodb(db, nation='BRAZIL', region='AMERICA', p_type='ECONOMY ANODIZED STEEL'):
+    """Q8: National Market Share Query"""
+    partkeys = db['part'].distinct('p_partkey', {'p_type': p_type})
+    return list(db['orders'].aggregate(q8_pipeline(partkeys, nation, region)))
+
+def q9_pipeline(partkeys):
+    """
+    Pipeline da Q9 (sobre orders).
+    partkeys: p_partkey das peças cujo nome contém a cor (ver query9_mongodb).
+    O custo e a nação do fornecedor vêm de part.partsupps, com um único $lookup.
+    """
+    pipeline = [
+        {
+            '$match': {
+                'lineitems.l_partkey': {'$in': partkeys}
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_partkey': {'$in': partkeys}
+            }
+        },
+        *_lookup_one('part', 'lineitems.l_partkey', 'p_partkey', 'part'),
+        {
+            '$addFields': {
+                'ps': _partsupp_of('part', 'lineitems.l_suppkey')
+            }
+        },
+        {
+            '$group': {
+                '_id': {
+                    'nation': '$ps.supplier.nation.n_name',
+                    'o_year': _year('$o_orderdate')
+                },
+                'sum_profit': {
+                    '$sum': {
+                        '$subtract': [
+                            _disc_price('lineitems.'),
+                            {'$multiply': ['$ps.ps_supplycost', '$lineitems.l_quantity']}
+                        ]
+                    }
+                }
+            }
+        },
+        {
+            '$sort': {
+                '_id.nation': 1,
+                '_id.o_year': -1
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'nation': '$_id.nation',
+                'o_year': '$_id.o_year',
+                'sum_profit': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query9_mongodb(db, color='green'):
+    """Q9: Product Type Profit Measure Query"""
+    partkeys = db['part'].distinct('p_partkey', {'p_name': {'$regex': color}})
+    return list(db['orders'].aggregate(q9_pipeline(partkeys)))
+
+def q10_pipeline(date='1993-10-01'):
+    """Pipeline da Q10 (sobre orders): agrega por cliente antes do $lookup"""
+    pipeline = [
+        {
+            '$match': {
+                'o_orderdate': {'$gte': date, '$lt': _add_months(date, 3)}
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_returnflag': 'R'
+            }
+        },
+        {
+            '$group': {
+                '_id': '$o_custkey',
+                'revenue': {'$sum': _disc_price('lineitems.')}
+            }
+        },
+        {'$sort': {'revenue': -1}},
+        {'$limit': 20},
+        *_lookup_one('customer', '_id', 'c_custkey', 'customer'),
+        {
+            '$project': {
+                '_id': 0,
+                'c_custkey': '$_id',
+                'c_name': '$customer.c_name',
+                'revenue': 1,
+                'c_acctbal': '$customer.c_acctbal',
+                'n_name': '$customer.nation.n_name',
+                'c_address': '$customer.c_address',
+                'c_phone': '$customer.c_phone',
+                'c_comment': '$customer.c_comment'
+            }
+        }
+    ]
+    return pipeline
+
+def query10_mongodb(db, date='1993-10-01'):
+    """Q10: Returned Item Reporting Query"""
+    return list(db['orders'].aggregate(q10_pipeline(date)))
+
+def q11_pipeline(nation='GERMANY', fraction=0.0001):
+    """
+    Pipeline da Q11 (sobre part.partsupps, com o fornecedor embutido).
+    O total da nação vem de $setWindowFields (MongoDB 5.0+) sem segunda varredura.
+    fraction: 0.0001 / SF na especificação.
+    """
+    pipeline = [
+        {
+            '$match': {
+                'partsupps.supplier.nation.n_name': nation
+            }
+        },
+        {'$unwind': '$partsupps'},
+        {
+            '$match': {
+                'partsupps.supplier.nation.n_name': nation
+            }
+        },
+        {
+            '$group': {
+                '_id': '$p_partkey',
+                'value': {
+                    '$sum': {
+                        '$multiply': ['$partsupps.ps_supplycost', '$partsupps.ps_availqty']
+                    }
+                }
+            }
+        },
+        {
+            '$setWindowFields': {
+                'output': {'total': {'$sum': '$value'}}
+            }
+        },
+        {
+            '$match': {
+                '$expr': {'$gt': ['$value', {'$multiply': ['$total', fraction]}]}
+            }
+        },
+        {'$sort': {'value': -1}},
+        {
+            '$project': {
+                '_id': 0,
+                'ps_partkey': '$_id',
+                'value': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query11_mongodb(db, nation='GERMANY', fraction=0.0001):
+    """Q11: Important Stock Identification Query"""
+    return list(db['part'].aggregate(q11_pipeline(nation, fraction)))
+
+def q12_pipeline(shipmode1='MAIL', shipmode2='SHIP', date='1994-01-01'):
+    """Pipeline da Q12 (sobre orders, com os lineitems embutidos)"""
+    shipmodes = [shipmode1, shipmode2]
+    end = _add_months(date, 12)
+    high = {'$in': ['$o_orderpriority', ['1-URGENT', '2-HIGH']]}
+    pipeline = [
+        {
+            '$match': {
+                'lineitems': {
+                    '$elemMatch': {
+                        'l_shipmode': {'$in': shipmodes},
+                        'l_receiptdate': {'$gte': date, '$lt': end}
+                    }
+                }
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_shipmode': {'$in': shipmodes},
+                'lineitems.l_receiptdate': {'$gte': date, '$lt': end},
+                '$expr': {
+                    '$and': [
+                        {'$lt': ['$lineitems.l_commitdate', '$lineitems.l_receiptdate']},
+                        {'$lt': ['$lineitems.l_shipdate', '$lineitems.l_commitdate']}
+                    ]
+                }
+            }
+        },
+        {
+            '$group': {
+                '_id': '$lineitems.l_shipmode',
+                'high_line_count': {'$sum': {'$cond': [high, 1, 0]}},
+                'low_line_count': {'$sum': {'$cond': [high, 0, 1]}}
+            }
+        },
+        {'$sort': {'_id': 1}},
+        {
+            '$project': {
+                '_id': 0,
+                'l_shipmode': '$_id',
+                'high_line_count': 1,
+                'low_line_count': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query12_mongodb(db, shipmode1='MAIL', shipmode2='SHIP', date='1994-01-01'):
+    """Q12: Shipping Modes and Order Priority Query"""
+    return list(db['orders'].aggregate(q12_pipeline(shipmode1, shipmode2, date)))
+
+def q13_pipeline(word1='special', word2='requests'):
+    """
+    Pipeline da Q13 (sobre customer).
+    Left outer join: o $lookup traz só o _id dos pedidos que passam no filtro.
+    """
+    pipeline = [
+        {
+            '$lookup': {
+                'from': 'orders',
+                'let': {'custkey': '$c_custkey'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$o_custkey', '$$custkey']}}},
+                    {'$match': {'o_comment': {'$not': re.compile(f'{re.escape(word1)}.*{re.escape(word2)}', re.S)}}},
+                    {'$project': {'_id': 1}}
+                ],
+                'as': 'orders'
+            }
+        },
+        {
+            '$group': {
+                '_id': {'$size': '$orders'},
+                'custdist': {'$sum': 1}
+            }
+        },
+        {
+            '$sort': {
+                'custdist': -1,
+                '_id': -1
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'c_count': '$_id',
+                'custdist': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query13_mongodb(db, word1='special', word2='requests'):
+    """Q13: Customer Distribution Query"""
+    return list(db['customer'].aggregate(q13_pipeline(word1, word2)))
+
+def q14_pipeline(date='1995-09-01'):
+    """Pipeline da Q14 (sobre lineitem)"""
+    promo = {'$eq': [{'$substrBytes': ['$part.p_type', 0, 5]}, 'PROMO']}
+    pipeline = [
+        {
+            '$match': {
+                'l_shipdate': {'$gte': date, '$lt': _add_months(date, 1)}
+            }
+        },
+        {
+            '$lookup': {
+                'from': 'part',
+                'localField': 'l_partkey',
+                'foreignField': 'p_partkey',
+                'pipeline': [{'$project': {'_id': 0, 'p_type': 1}}],
+                'as': 'part'
+            }
+        },
+        {'$unwind': '$part'},
+        {
+            '$group': {
+                '_id': None,
+                'promo': {'$sum': {'$cond': [promo, _disc_price(), 0]}},
+                'total': {'$sum': _disc_price()}
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'promo_revenue': {
+                    '$divide': [{'$multiply': [100.0, '$promo']}, '$total']
+                }
+            }
+        }
+    ]
+    return pipeline
+
+def query14_mongodb(db, date='1995-09-01'):
+    """Q14: Promotion Effect Query"""
+    return list(db['lineitem'].aggregate(q14_pipeline(date)))
+
+def q15_pipeline(date='1996-01-01'):
+    """
+    Pipeline da Q15 (sobre lineitem). A view revenue0 vira um $group por
+    fornecedor; agrupar de novo pela receita deixa os empatados no máximo juntos.
+    """
+    pipeline = [
+        {
+            '$match': {
+                'l_shipdate': {'$gte': date, '$lt': _add_months(date, 3)}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$l_suppkey',
+                'total_revenue': {'$sum': _disc_price()}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$total_revenue',
+                'suppliers': {'$push': '$_id'}
+            }
+        },
+        {'$sort': {'_id': -1}},
+        {'$limit': 1},
+        {'$unwind': '$suppliers'},
+        *_lookup_one('supplier', 'suppliers', 's_suppkey', 'supplier'),
+        {
+            '$project': {
+                '_id': 0,
+                's_suppkey': '$suppliers',
+                's_name': '$supplier.s_name',
+                's_address': '$supplier.s_address',
+                's_phone': '$supplier.s_phone',
+                'total_revenue': '$_id'
+            }
+        },
+        {'$sort': {'s_suppkey': 1}}
+    ]
+    return pipeline
+
+def query15_mongodb(db, date='1996-01-01'):
+    """Q15: Top Supplier Query"""
+    return list(db['lineitem'].aggregate(q15_pipeline(date)))
+
+def q16_pipeline(brand='Brand#45', type_prefix='MEDIUM POLISHED',
+                 sizes=(49, 14, 23, 45, 19, 3, 36, 9)):
+    """Pipeline da Q16 (sobre part.partsupps; s_comment vem do fornecedor embutido)"""
+    pipeline = [
+        {
+            '$match': {
+                'p_brand': {'$ne': brand},
+                'p_type': {'$not': re.compile('^' + re.escape(type_prefix))},
+                'p_size': {'$in': list(sizes)}
+            }
+        },
+        {'$unwind': '$partsupps'},
+        {
+            '$match': {
+                'partsupps.supplier.s_comment': {'$not': re.compile('Customer.*Complaints', re.S)}
+            }
+        },
+        {
+            '$group': {
+                '_id': {
+                    'p_brand': '$p_brand',
+                    'p_type': '$p_type',
+                    'p_size': '$p_size'
+                },
+                'suppliers': {'$addToSet': '$partsupps.ps_suppkey'}
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'p_brand': '$_id.p_brand',
+                'p_type': '$_id.p_type',
+                'p_size': '$_id.p_size',
+                'supplier_cnt': {'$size': '$suppliers'}
+            }
+        },
+        {
+            '$sort': {
+                'supplier_cnt': -1,
+                'p_brand': 1,
+                'p_type': 1,
+                'p_size': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query16_mongodb(db, brand='Brand#45', type_prefix='MEDIUM POLISHED',
+                    sizes=(49, 14, 23, 45, 19, 3, 36, 9)):
+    """Q16: Parts/Supplier Relationship Query"""
+    return list(db['part'].aggregate(q16_pipeline(brand, type_prefix, sizes)))
+
+def q17_pipeline(partkeys):
+    """
+    Pipeline da Q17 (sobre lineitem).
+    partkeys: p_partkey das peças da marca/container (ver query17_mongodb).
+    """
+    pipeline = [
+        {
+            '$match': {
+                'l_partkey': {'$in': partkeys}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$l_partkey',
+                'avg_qty': {'$avg': '$l_quantity'},
+                'lines': {
+                    '$push': {'q': '$l_quantity', 'p': '$l_extendedprice'}
+                }
+            }
+        },
+        {'$unwind': '$lines'},
+        {
+            '$match': {
+                '$expr': {'$lt': ['$lines.q', {'$multiply': [0.2, '$avg_qty']}]}
+            }
+        },
+        {
+            '$group': {
+                '_id': None,
+                'total': {'$sum': '$lines.p'}
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'avg_yearly': {'$divide': ['$total', 7.0]}
+            }
+        }
+    ]
+    return pipeline
+
+def query17_mongodb(db, brand='Brand#23', container='MED BOX'):
+    """Q17: Small-Quantity-Order Revenue Query"""
+    partkeys = db['part'].distinct('p_partkey', {'p_brand': brand, 'p_container': container})
+    return list(db['lineitem'].aggregate(q17_pipeline(partkeys)))
+
+def q18_pipeline(quantity=300):
+    """Pipeline da Q18 (sobre orders): a soma das quantidades sai dos lineitems embutidos"""
+    pipeline = [
+        {
+            '$addFields': {
+                'sum_quantity': {'$sum': '$lineitems.l_quantity'}
+            }
+        },
+        {
+            '$match': {
+                'sum_quantity': {'$gt': quantity}
+            }
+        },
+        {
+            '$sort': {
+                'o_totalprice': -1,
+                'o_orderdate': 1
+            }
+        },
+        {'$limit': 100},
+        *_lookup_one('customer', 'o_custkey', 'c_custkey', 'customer'),
+        {
+            '$project': {
+                '_id': 0,
+                'c_name': '$customer.c_name',
+                'c_custkey': '$o_custkey',
+                'o_orderkey': 1,
+                'o_orderdate': 1,
+                'o_totalprice': 1,
+                'sum_quantity': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query18_mongodb(db, quantity=300):
+    """Q18: Large Volume Customer Query"""
+    return list(db['orders'].aggregate(q18_pipeline(quantity)))
+
+# containers e tamanhos máximos de cada ramo da Q19
+Q19_BRANCHES = [
+    (['SM CASE', 'SM BOX', 'SM PACK', 'SM PKG'], 5),
+    (['MED BAG', 'MED BOX', 'MED PKG', 'MED PACK'], 10),
+    (['LG CASE', 'LG BOX', 'LG PACK', 'LG PKG'], 15),
+]
+
+def q19_pipeline(branch_partkeys, quantities=(1, 10, 20)):
+    """
+    Pipeline da Q19 (sobre lineitem).
+    branch_partkeys: p_partkey que passam nos filtros de part de cada ramo
+    (ver query19_mongodb); cada ramo vira um termo do $or.
+    """
+    pipeline = [
+        {
+            '$match': {
+                'l_shipmode': {'$in': ['AIR', 'AIR REG']},
+                'l_shipinstruct': 'DELIVER IN PERSON',
+                '$or': [
+                    {
+                        'l_partkey': {'$in': partkeys},
+                        'l_quantity': {'$gte': qty, '$lte': qty + 10}
+                    }
+                    for partkeys, qty in zip(branch_partkeys, quantities)
+                ]
+            }
+        },
+        {
+            '$group': {
+                '_id': None,
+                'revenue': {'$sum': _disc_price()}
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'revenue': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query19_mongodb(db, brands=('Brand#12', 'Brand#23', 'Brand#34'), quantities=(1, 10, 20)):
+    """Q19: Discounted Revenue Query"""
+    branch_partkeys = [
+        db['part'].distinct('p_partkey', {
+            'p_brand': brand,
+            'p_container': {'$in': containers},
+            'p_size': {'$gte': 1, '$lte': max_size}
+        })
+        for brand, (containers, max_size) in zip(brands, Q19_BRANCHES)
+    ]
+    return list(db['lineitem'].aggregate(q19_pipeline(branch_partkeys, quantities)))
+
+def q20_pipeline(partkeys, suppkeys, date='1994-01-01'):
+    """
+    Pipeline da Q20 (sobre lineitem).
+    partkeys/suppkeys: peças com o prefixo de cor e fornecedores da nação
+    (ver query20_mongodb). ps_availqty e o fornecedor vêm de part.partsupps.
+    """
+    pipeline = [
+        {
+            '$match': {
+                'l_shipdate': {'$gte': date, '$lt': _add_months(date, 12)},
+                'l_partkey': {'$in': partkeys},
+                'l_suppkey': {'$in': suppkeys}
+            }
+        },
+        {
+            '$group': {
+                '_id': {'partkey': '$l_partkey', 'suppkey': '$l_suppkey'},
+                'quantity': {'$sum': '$l_quantity'}
+            }
+        },
+        *_lookup_one('part', '_id.partkey', 'p_partkey', 'part'),
+        {
+            '$addFields': {
+                'ps': _partsupp_of('part', '_id.suppkey')
+            }
+        },
+        {
+            '$match': {
+                '$expr': {'$gt': ['$ps.ps_availqty', {'$multiply': [0.5, '$quantity']}]}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$_id.suppkey',
+                's_name': {'$first': '$ps.supplier.s_name'},
+                's_address': {'$first': '$ps.supplier.s_address'}
+            }
+        },
+        {'$sort': {'s_name': 1}},
+        {
+            '$project': {
+                '_id': 0,
+                's_name': 1,
+                's_address': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query20_mongodb(db, color='forest', date='1994-01-01', nation='CANADA'):
+    """Q20: Potential Part Promotion Query"""
+    partkeys = db['part'].distinct('p_partkey', {'p_name': {'$regex': '^' + re.escape(color)}})
+    suppkeys = db['supplier'].distinct('s_suppkey', {'nation.n_name': nation})
+    return list(db['lineitem'].aggregate(q20_pipeline(partkeys, suppkeys, date)))
+
+def q21_pipeline(suppkeys):
+    """
+    Pipeline da Q21 (sobre orders).
+    suppkeys: fornecedores da nação (ver query21_mongodb). Os exists/not exists
+    viram conjuntos de fornecedores calculados sobre os lineitems embutidos:
+    mais de um fornecedor no pedido e exatamente um deles atrasado.
+    """
+    late = {
+        '$filter': {
+            'input': '$lineitems',
+            'as': 'l',
+            'cond': {'$gt': ['$$l.l_receiptdate', '$$l.l_commitdate']}
+        }
+    }
+    pipeline = [
+        {
+            '$match': {
+                'o_orderstatus': 'F',
+                'lineitems.l_suppkey': {'$in': suppkeys}
+            }
+        },
+        {
+            '$project': {
+                'lineitems': 1,
+                'suppliers': {'$setUnion': ['$lineitems.l_suppkey', []]},
+                'late_suppliers': {
+                    '$setUnion': [{'$map': {'input': late, 'as': 'l', 'in': '$$l.l_suppkey'}}, []]
+                }
+            }
+        },
+        {
+            '$match': {
+                '$expr': {
+                    '$and': [
+                        {'$gt': [{'$size': '$suppliers'}, 1]},
+                        {'$eq': [{'$size': '$late_suppliers'}, 1]}
+                    ]
+                }
+            }
+        },
+        {'$unwind': '$lineitems'},
+        {
+            '$match': {
+                'lineitems.l_suppkey': {'$in': suppkeys},
+                '$expr': {'$gt': ['$lineitems.l_receiptdate', '$lineitems.l_commitdate']}
+            }
+        },
+        {
+            '$group': {
+                '_id': '$lineitems.l_suppkey',
+                'numwait': {'$sum': 1}
+            }
+        },
+        *_lookup_one('supplier', '_id', 's_suppkey', 'supplier'),
+        {
+            '$project': {
+                '_id': 0,
+                's_name': '$supplier.s_name',
+                'numwait': 1
+            }
+        },
+        {
+            '$sort': {
+                'numwait': -1,
+                's_name': 1
+            }
+        },
+        {'$limit': 100}
+    ]
+    return pipeline
+
+def query21_mongodb(db, nation='SAUDI ARABIA'):
+    """Q21: Suppliers Who Kept Orders Waiting Query"""
+    suppkeys = db['supplier'].distinct('s_suppkey', {'nation.n_name': nation})
+    return list(db['orders'].aggregate(q21_pipeline(suppkeys)))
+
+def q22_pipeline(codes, avg_acctbal):
+    """
+    Pipeline da Q22 (sobre customer).
+    avg_acctbal: média de c_acctbal > 0 nos códigos de país (ver query22_mongodb).
+    """
+    pipeline = [
+        {
+            '$match': {
+                'c_phone': {'$regex': '^(' + '|'.join(codes) + ')'},
+                'c_acctbal': {'$gt': avg_acctbal}
+            }
+        },
+        # not exists (pedido do cliente)
+        {
+            '$lookup': {
+                'from': 'orders',
+                'let': {'custkey': '$c_custkey'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$o_custkey', '$$custkey']}}},
+                    {'$limit': 1},
+                    {'$project': {'_id': 1}}
+                ],
+                'as': 'orders'
+            }
+        },
+        {
+            '$match': {
+                'orders': {'$size': 0}
+            }
+        },
+        {
+            '$group': {
+                '_id': {'$substrBytes': ['$c_phone', 0, 2]},
+                'numcust': {'$sum': 1},
+                'totacctbal': {'$sum': '$c_acctbal'}
+            }
+        },
+        {'$sort': {'_id': 1}},
+        {
+            '$project': {
+                '_id': 0,
+                'cntrycode': '$_id',
+                'numcust': 1,
+                'totacctbal': 1
+            }
+        }
+    ]
+    return pipeline
+
+def query22_mongodb(db, codes=('13', '31', '23', '29', '30', '18', '17')):
+    """Q22: Global Sales Opportunity Query"""
+    codes = list(codes)
+    avg = list(db['customer'].aggregate([
+        {
+            '$match': {
+                'c_phone': {'$regex': '^(' + '|'.join(codes) + ')'},
+                'c_acctbal': {'$gt': 0.0}
+            }
+        },
+        {'$group': {'_id': None, 'avg': {'$avg': '$c_acctbal'}}}
+    ]))
+    if not avg:
+        return []
+    return list(db['customer'].aggregate(q22_pipeline(codes, avg[0]['avg'])))
+
+# Query -> (collection base, construtor do pipeline); usado pelo index_advisor.
+# Ficam de fora as queries cujo pipeline depende de um distinct prévio.
+QUERY_PIPELINES = {
+    'Q1': ('lineitem', q1_pipeline),
+    'Q2': ('part', q2_pipeline),
+    'Q3': ('orders', q3_pipeline),
+    'Q4': ('orders', q4_pipeline),
+    'Q5': ('orders', q5_pipeline),
+    'Q6': ('lineitem', q6_pipeline),
+    'Q7': ('orders', q7_pipeline),
+    'Q10': ('orders', q10_pipeline),
+    'Q11': ('part', q11_pipeline),
+    'Q12': ('orders', q12_pipeline),
+    'Q13': ('customer', q13_pipeline),
+    'Q14': ('lineitem', q14_pipeline),
+    'Q15': ('lineitem', q15_pipeline),
+    'Q16': ('part', q16_pipeline),
+    'Q18': ('orders', q18_pipeline),
+}
+
+# queries com variante sobre os campos derivados (load_mongodb.py --derived)
+DERIVED_QUERIES = {'Q1', 'Q2', 'Q3'}
+
+# Query -> função que executa a query e retorna a lista de documentos; usado pelo benchmark
+MONGODB_QUERIES = {
+    'Q1': query1_mongodb,
+    'Q2': query2_mongodb,
+    'Q3': query3_mongodb,
+    'Q4': query4_mongodb,
+    'Q5': query5_mongodb,
+    'Q6': query6_mongodb,
+    'Q7': query7_mongodb,
+    'Q8': query8_mongodb,
+    'Q9': query9_mongodb,
+    'Q10': query10_mongodb,
+    'Q11': query11_mongodb,
+    'Q12': query12_mongodb,
+    'Q13': query13_mongodb,
+    'Q14': query14_mongodb,
+    'Q15': query15_mongodb,
+    'Q16': query16_mongodb,
+    'Q17': query17_mongodb,
+    'Q18': query18_mongodb,
+    'Q19': query19_mongodb,
+    'Q20': query20_mongodb,
+    'Q21': query21_mongodb,
+    'Q22': query22_mongodb,
+}
 
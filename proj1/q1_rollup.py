@@ -0,0 +1,117 @@
+"""
+Rollup pré-agregado da Q1 no MongoDB.
+
+Um documento por (l_returnflag, l_linestatus, l_shipdate) com as somas parciais
+e a contagem que a Q1 precisa. Como o TPC-H tem ~2.500 datas de envio, a Q1
+passa a somar alguns milhares de buckets em vez de varrer lineitem.
+
+O rollup é mantido incrementalmente: na carga (load_mongodb.py --q1-rollup)
+tracking acumula as parciais enquanto o fluxo de lineitem passa para o insert
+e apply_partials grava tudo no fim; depois, update_q1_rollup soma os novos
+lineitems com $inc (upsert), então continua correto depois de novas inserções.
+rebuild_q1_rollup recalcula tudo no servidor a partir de lineitem.
+"""
+import argparse
+
+from pymongo import MongoClient, UpdateOne
+
+ROLLUP_COLLECTION = 'lineitem_q1_rollup'
+
+SUM_FIELDS = ['sum_qty', 'sum_base_price', 'sum_disc_price', 'sum_charge', 'sum_disc', 'count']
+
+def accumulate(partials, doc):
+    """Soma um lineitem nas parciais em memória {(rf, ls, shipdate): [somas...]}"""
+    key = (doc['l_returnflag'], doc['l_linestatus'], doc['l_shipdate'])
+    p = partials.get(key)
+    if p is None:
+        p = partials[key] = [0.0, 0.0, 0.0, 0.0, 0.0, 0]
+    ext = doc['l_extendedprice']
+    disc = doc['l_discount']
+    disc_price = ext * (1 - disc)
+    p[0] += doc['l_quantity']
+    p[1] += ext
+    p[2] += disc_price
+    p[3] += disc_price * (1 + doc['l_tax'])
+    p[4] += disc
+    p[5] += 1
+
+def apply_partials(db, partials):
+    """Aplica as parciais ao rollup com $inc + upsert (um bulk_write não ordenado)"""
+    if not partials:
+        return 0
+    ops = [
+        UpdateOne(
+            {'_id': {'returnflag': rf, 'linestatus': ls, 'shipdate': shipdate}},
+            {'$inc': dict(zip(SUM_FIELDS, sums))},
+            upsert=True
+        )
+        for (rf, ls, shipdate), sums in partials.items()
+    ]
+    db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+def update_q1_rollup(db, lineitems):
+    """Caminho incremental: incorpora novos lineitems ao rollup"""
+    partials = {}
+    for doc in lineitems:
+        accumulate(partials, doc)
+    return apply_partials(db, partials)
+
+def tracking(partials, docs):
+    """Repassa um fluxo de lineitems acumulando as parciais (usado pelo load_mongodb durante a carga)"""
+    for doc in docs:
+        accumulate(partials, doc)
+        yield doc
+
+def insert_lineitems(db, docs):
+    """Insere novos lineitems e atualiza o rollup da Q1 na mesma chamada"""
+    docs = list(docs)
+    if not docs:
+        return 0
+    db['lineitem'].insert_many(docs)
+    update_q1_rollup(db, docs)
+    return len(docs)
+
+def create_rollup_indexes(db):
+    db[ROLLUP_COLLECTION].create_index('_id.shipdate')
+
+def rebuild_q1_rollup(db):
+    """Recalcula o rollup inteiro no servidor a partir de lineitem ($group + $out)"""
+    disc_price = {'$multiply': ['$l_extendedprice', {'$subtract': [1, '$l_discount']}]}
+    db['lineitem'].aggregate([
+        {
+            '$group': {
+                '_id': {
+                    'returnflag': '$l_returnflag',
+                    'linestatus': '$l_linestatus',
+                    'shipdate': '$l_shipdate'
+                },
+                'sum_qty': {'$sum': '$l_quantity'},
+                'sum_base_price': {'$sum': '$l_extendedprice'},
+                'sum_disc_price': {'$sum': disc_price},
+                'sum_charge': {'$sum': {'$multiply': [disc_price, {'$add': [1, '$l_tax']}]}},
+                'sum_disc': {'$sum': '$l_discount'},
+                'count': {'$sum': 1}
+            }
+        },
+        {'$out': ROLLUP_COLLECTION}
+    ], allowDiskUse=True)
+    create_rollup_indexes(db)
+    return db[ROLLUP_COLLECTION].count_documents({})
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollup da Q1 no MongoDB")
+    parser.add_argument('--rebuild', action='store_true', help="recalcula o rollup a partir de lineitem")
+    args = parser.parse_args()
+
+    client = MongoClient('mongodb://localhost:27017/')
+    db = client['tpch']
+    if args.rebuild:
+        print(f"Recalculando {ROLLUP_COLLECTION}...")
+        print(f"  {rebuild_q1_rollup(db)} buckets")
+    else:
+        print(f"{ROLLUP_COLLECTION}: {db[ROLLUP_COLLECTION].count_documents({})} buckets")
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Varredura de scale factors: como cada banco escala com o tamanho dos dados.
+
+Para cada SF da lista: usa os .tbl de <data-dir>/sf<SF> ou os gera com
+tpch_datagen.py, carrega todos os bancos pedidos (MySQL com LOAD DATA,
+MongoDB com load_mongodb.load_hashjoin, Redis com load_tpch_redis
+--query-indexes), mede a carga, a memória do servidor depois da carga
+(Backend.server_memory) e roda as queries com benchmark.measure. O pico de
+memória no cliente de cada query vem de uma execução extra com tracemalloc,
+fora das medições.
+
+A carga substitui os dados dos bancos (tpch no MySQL e no MongoDB, o db do
+Redis é esvaziado). O relatório traz a latência x SF de cada query e banco e
+o expoente de escala (inclinação de log(tempo) x log(SF): 1 é linear, acima
+de 1 o tempo cresce mais rápido que os dados).
+
+Uso:
+    python proj1/sf_sweep.py --scale-factors 0.01 0.1 1 --engines mysql mongodb redis --queries all
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import mysql.connector
+from pymongo import MongoClient
+
+import backends
+import benchmark
+import load_mongodb
+import tpch_datagen
+import tpch_params
+from mongodb_queries import MONGODB_QUERIES
+from q1_rollup import ROLLUP_COLLECTION
+
+ENGINE_LABELS = benchmark.ENGINE_LABELS
+
+def data_dir_for(base_dir, scale_factor):
+    return os.path.join(base_dir, f"sf{scale_factor:g}")
+
+def locate_or_generate(base_dir, scale_factor, seed, workers):
+    """Diretório com os .tbl do SF; gera as tabelas que faltam"""
+    tbl_dir = data_dir_for(base_dir, scale_factor)
+    missing = [t for t in tpch_datagen.TABLE_ORDER if not os.path.exists(os.path.join(tbl_dir, f"{t}.tbl"))]
+    if missing:
+        print(f"Gerando SF {scale_factor:g} em {tbl_dir}...")
+        tpch_datagen.generate(missing, tbl_dir, scale_factor, seed, workers)
+    else:
+        print(f"Usando os .tbl de {tbl_dir}")
+    return tbl_dir
+
+def load_mysql(tbl_dir):
+    """TRUNCATE + LOAD DATA LOCAL INFILE de cada tabela (como load_tbls.sql)"""
+    conn = mysql.connector.connect(**backends.MYSQL_CONFIG, allow_local_infile=True)
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in tpch_datagen.TABLE_ORDER:
+        path = os.path.abspath(os.path.join(tbl_dir, f"{table}.tbl")).replace("\\", "/")
+        print(f"Carregando {table}...")
+        cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} FIELDS TERMINATED BY '|'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def load_mongodb_data(tbl_dir):
+    """Carga em passada única (load_mongodb.py --mode hashjoin)"""
+    client = MongoClient(backends.MONGODB_URI)
+    db = client[backends.MONGODB_DB]
+    for collection in load_mongodb.TABLES + [ROLLUP_COLLECTION]:
+        db.drop_collection(collection)
+    inserter = load_mongodb.BulkInserter(client)
+    load_mongodb.load_hashjoin(db, tbl_dir, inserter=inserter)
+    inserter.close()
+    client.close()
+
+def load_redis(tbl_dir):
+    """Esvazia o db e carrega com os índices das Q4-Q22 (load_tpch_redis.py --query-indexes)"""
+    if backends.PROJ2_DIR not in sys.path:
+        sys.path.insert(0, backends.PROJ2_DIR)
+    import load_tpch_redis
+    load_tpch_redis.r.flushdb()
+    load_tpch_redis.TPCH_PATH = tbl_dir
+    load_tpch_redis.load_all(query_indexes=True)
+
+LOADERS = {
+    'mysql': load_mysql,
+    'mongodb': load_mongodb_data,
+    'redis': load_redis,
+}
+
+def sweep_params(n, scale_factor, count, seed):
+    """Parâmetros da query no SF: sorteados (count > 0) ou os de validação, com a FRACTION da Q11 ajustada"""
+    if count > 0:
+        return tpch_params.param_sets(n, count, seed, scale_factor)
+    params = dict(tpch_params.VALIDATION[n])
+    if n == 11:
+        params['fraction'] = 0.0001 / scale_factor
+    return [params]
+
+def client_peak(backend, query, params):
+    """Pico de memória Python (bytes) de uma execução extra, medido com tracemalloc"""
+    tracemalloc.start()
+    try:
+        backend.run(query, params)
+        return tracemalloc.get_traced_memory()[1]
+    except Exception:
+        return None
+    finally:
+        tracemalloc.stop()
+
+def sweep_point(scale_factor, tbl_dir, engines, queries, args, queries_dir):
+    """Carga e benchmark de um SF"""
+    point = {'scale_factor': scale_factor, 'data_dir': tbl_dir, 'load_s': {}, 'server_memory': {}, 'results': []}
+    for engine in engines:
+        print(f"Carregando SF {scale_factor:g} no {ENGINE_LABELS[engine]}...")
+        start = time.perf_counter()
+        LOADERS[engine](tbl_dir)
+        point['load_s'][engine] = time.perf_counter() - start
+        print(f"  carga em {point['load_s'][engine]:.1f}s")
+
+    for engine in engines:
+        options = {'fetch_batch': 0} if engine == 'mysql' else {}
+        backend = backends.create(engine, queries_dir=queries_dir, **options)
+        backend.connect()
+        try:
+            point['server_memory'][engine] = backend.server_memory()
+        except Exception as e:
+            print(f"AVISO: memória do {ENGINE_LABELS[engine]} indisponível: {e}")
+            point['server_memory'][engine] = None
+        for query in queries:
+            param_sets = sweep_params(int(query[1:]), scale_factor, args.param_sets, args.seed)
+            result = benchmark.measure(backend, query, param_sets, args.warmup, args.iterations)
+            result['client_peak_bytes'] = client_peak(backend, query, param_sets[0]) \
+                if result['status'] == 'ok' else None
+            point['results'].append(result)
+            if result['status'] == 'ok':
+                print(f"  SF {scale_factor:g} {ENGINE_LABELS[engine]} {query}: "
+                      f"mediana {result['stats']['total']['median_ms']:.1f} ms ({result['rows']} resultados)")
+            else:
+                print(f"  SF {scale_factor:g} {ENGINE_LABELS[engine]} {query}: FALHOU: {result['error']}")
+        backend.close()
+    return point
+
+def scaling_exponent(scale_factors, times):
+    """Inclinação de log(tempo) x log(SF) por mínimos quadrados; None com menos de 2 pontos"""
+    points = [(math.log(sf), math.log(t)) for sf, t in zip(scale_factors, times) if t]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+def point_result(point, query, engine):
+    for r in point['results']:
+        if r['query'] == query and r['engine'] == engine:
+            return r
+    return None
+
+def mb(value):
+    return f"{value / (1024 * 1024):.1f}" if value is not None else "-"
+
+def report_lines(points, engines, queries):
+    """Tabelas markdown: latência, carga e memória por SF"""
+    scale_factors = [p['scale_factor'] for p in points]
+    sf_header = " | ".join(f"SF {sf:g}" for sf in scale_factors)
+    sf_rule = "|".join("-" * (len(f"SF {sf:g}") + 2) for sf in scale_factors)
+
+    lines = [
+        "# Varredura de scale factor",
+        "",
+        "## Latência (mediana, ms)",
+        "Expoente: inclinação de log(tempo) x log(SF); 1 = linear, acima de 1 cresce mais rápido que os dados.",
+        "",
+        f"| Query | Banco | {sf_header} | Expoente |",
+        f"|-------|-------|{sf_rule}|----------|",
+    ]
+    for query in queries:
+        for engine in engines:
+            times = []
+            for p in points:
+                r = point_result(p, query, engine)
+                times.append(r['stats']['total']['median_ms'] if r and r['status'] == 'ok' else None)
+            exponent = scaling_exponent(scale_factors, times)
+            cells = " | ".join(f"{t:.1f}" if t is not None else "falhou" for t in times)
+            lines.append(f"| {query} | {ENGINE_LABELS[engine]} | {cells} | "
+                         f"{f'{exponent:.2f}' if exponent is not None else '-'} |")
+
+    lines += ["", "## Carga (s)", f"| Banco | {sf_header} |", f"|-------|{sf_rule}|"]
+    for engine in engines:
+        cells = " | ".join(f"{p['load_s'][engine]:.1f}" for p in points)
+        lines.append(f"| {ENGINE_LABELS[engine]} | {cells} |")
+
+    lines += ["", "## Memória do servidor após a carga (MB)", f"| Banco | {sf_header} |", f"|-------|{sf_rule}|"]
+    for engine in engines:
+        cells = " | ".join(mb(p['server_memory'].get(engine)) for p in points)
+        lines.append(f"| {ENGINE_LABELS[engine]} | {cells} |")
+
+    lines += ["", "## Pico de memória no cliente (MB, tracemalloc)", f"| Query | Banco | {sf_header} |",
+              f"|-------|-------|{sf_rule}|"]
+    for query in queries:
+        for engine in engines:
+            cells = []
+            for p in points:
+                r = point_result(p, query, engine)
+                cells.append(mb(r.get('client_peak_bytes')) if r else "-")
+            lines.append(f"| {query} | {ENGINE_LABELS[engine]} | {' | '.join(cells)} |")
+    return lines
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Latência x scale factor para MySQL, MongoDB e Redis")
+    parser.add_argument('--scale-factors', nargs='+', type=float, default=[0.01, 0.1, 1])
+    parser.add_argument('--engines', nargs='+', choices=benchmark.ENGINES, default=benchmark.ENGINES)
+    parser.add_argument('--queries', nargs='+', default=['Q1', 'Q2', 'Q3'],
+                        help="queries (ex.: Q1 Q6) ou 'all' para Q1-Q22")
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--param-sets', type=int, default=0,
+                        help="N conjuntos de parâmetros sorteados por query (padrão: os de validação)")
+    parser.add_argument('--seed', type=int, default=0, help="semente dos dados gerados e dos parâmetros")
+    parser.add_argument('--data-dir', default=os.path.join(os.getcwd(), 'sweep_data'),
+                        help="os .tbl de cada SF ficam em <data-dir>/sf<SF>")
+    parser.add_argument('--gen-workers', type=int, default=1, help="processos do tpch_datagen.py")
+    parser.add_argument('--out', default='sf_sweep.md', help="relatório markdown")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva cargas, memória e resultados de cada SF")
+    args = parser.parse_args()
+    if args.queries == ['all']:
+        args.queries = list(MONGODB_QUERIES)
+    for q in args.queries:
+        if q not in MONGODB_QUERIES:
+            parser.error(f"query desconhecida: {q} (use Q1-Q22)")
+    if any(sf <= 0 for sf in args.scale_factors):
+        parser.error("--scale-factors devem ser > 0")
+    args.scale_factors = sorted(set(args.scale_factors))
+    args.engines = [e for e in benchmark.ENGINES if e in args.engines]
+    return args
+
+def main():
+    args = parse_args()
+    queries_dir = os.path.join(os.getcwd(), 'tpch-dbgen', 'queries')
+
+    points = []
+    for sf in args.scale_factors:
+        print("=" * 60)
+        print(f"SF {sf:g}")
+        print("=" * 60)
+        tbl_dir = locate_or_generate(args.data_dir, sf, args.seed, args.gen_workers)
+        try:
+            points.append(sweep_point(sf, tbl_dir, args.engines, args.queries, args, queries_dir))
+        except Exception as e:
+            print(f"Erro no SF {sf:g}: {e}")
+            break
+        print()
+
+    if not points:
+        return
+    lines = report_lines(points, args.engines, args.queries)
+    print("\n".join(lines))
+    with open(args.out, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"\nRelatório salvo em {args.out}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'engines': args.engines, 'queries': args.queries, 'seed': args.seed,
+                       'points': points}, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos em {args.json}")
+
+if __name__ == "__main__":
+    main()
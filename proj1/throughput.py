@@ -0,0 +1,161 @@
+"""
+Teste de throughput do TPC-H (vários streams concorrentes).
+
+Cada stream roda em uma thread com o seu próprio backend (backends.py), a
+sua ordem (permutação) das queries e os seus parâmetros sorteados
+(tpch_params, com semente por stream), como os streams gerados pelo qgen. Os
+bancos são medidos um de cada vez: MySQL, MongoDB e/ou Redis (proj2,
+carregado com load_tpch_redis.py --query-indexes).
+
+Mede o tempo total Ts (do início do primeiro stream ao fim do último), as
+queries por hora e as latências de cada stream. Com as 22 queries e sem
+falhas também calcula a métrica do TPC-H: Throughput@Size = S * 22 * 3600 / Ts * SF.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import backends
+import bench_stats
+import tpch_params
+import tpch_sql
+from mongodb_queries import MONGODB_QUERIES
+
+ENGINES = list(backends.BACKENDS)
+ENGINE_LABELS = {name: cls.label for name, cls in backends.BACKENDS.items()}
+ALL_QUERIES = list(MONGODB_QUERIES)
+
+def stream_plan(stream, queries, seed=None, scale_factor=1):
+    """[(query, parâmetros), ...] na ordem do stream; reproduzível pela semente"""
+    rng = random.Random(f"{seed}:stream:{stream}") if seed is not None else random.Random()
+    order = list(queries)
+    rng.shuffle(order)
+    return [(q, tpch_params.generate(int(q[1:]), rng, scale_factor)) for q in order]
+
+def run_stream(backend, plan):
+    """Roda as queries do stream em sequência; uma falha não interrompe o stream"""
+    executions = []
+    start = time.perf_counter_ns()
+    for query, params in plan:
+        t0 = time.perf_counter_ns()
+        execution = {'query': query, 'params': params, 'status': 'ok', 'error': None, 'rows': None}
+        try:
+            execution['rows'] = len(backend.run(query, params))
+        except Exception as e:
+            execution['status'] = 'falha'
+            execution['error'] = f"{type(e).__name__}: {e}"
+        execution['ms'] = (time.perf_counter_ns() - t0) / 1e6
+        executions.append(execution)
+    elapsed_ns = time.perf_counter_ns() - start
+    ok = [e['ms'] * 1e6 for e in executions if e['status'] == 'ok']
+    return {
+        'stream': backend.stream,
+        'elapsed_s': elapsed_ns / 1e9,
+        'failures': len(executions) - len(ok),
+        'latency': bench_stats.summarize(ok),
+        'executions': executions,
+    }
+
+def run_throughput(engine, streams, queries, seed=None, scale_factor=1, queries_dir=tpch_sql.QUERIES_DIR):
+    """S streams concorrentes no banco; as conexões são abertas antes de medir"""
+    plans = {s: stream_plan(s, queries, seed, scale_factor) for s in range(1, streams + 1)}
+    if engine == 'mysql':
+        # uma conexão do pool por stream
+        backends.mysql_pool(streams)
+    stream_backends = {}
+    for s in plans:
+        stream_backends[s] = backends.create(engine, stream=s, queries_dir=queries_dir)
+        stream_backends[s].connect()
+
+    start = time.perf_counter_ns()
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        futures = [pool.submit(run_stream, stream_backends[s], plans[s]) for s in plans]
+        stream_results = [f.result() for f in futures]
+    elapsed_s = (time.perf_counter_ns() - start) / 1e9
+
+    for backend in stream_backends.values():
+        backend.close()
+
+    completed = sum(len(r['executions']) - r['failures'] for r in stream_results)
+    failures = sum(r['failures'] for r in stream_results)
+    full_run = sorted(queries, key=lambda q: int(q[1:])) == ALL_QUERIES and failures == 0
+    return {
+        'engine': engine,
+        'streams': streams,
+        'elapsed_s': elapsed_s,
+        'queries_completed': completed,
+        'failures': failures,
+        'queries_per_hour': completed * 3600 / elapsed_s if elapsed_s > 0 else None,
+        'throughput_at_size': streams * 22 * 3600 / elapsed_s * scale_factor if full_run else None,
+        'stream_results': stream_results,
+    }
+
+def print_report(result):
+    label = ENGINE_LABELS[result['engine']]
+    print(f"== {label}: {result['streams']} streams ==")
+    print(f"Ts: {result['elapsed_s']:.3f} s  queries: {result['queries_completed']}"
+          f"  falhas: {result['failures']}  queries/hora: {result['queries_per_hour']:.0f}")
+    if result['throughput_at_size'] is not None:
+        print(f"Throughput@Size: {result['throughput_at_size']:.1f}")
+    print("| Stream | Tempo (s) | Mediana (ms) | p95 (ms) | Máx (ms) | Falhas |")
+    print("|--------|-----------|--------------|----------|----------|--------|")
+    for r in result['stream_results']:
+        lat = r['latency']
+        if lat:
+            print(f"| {r['stream']} | {r['elapsed_s']:.3f} | {lat['median_ms']:.1f} | "
+                  f"{lat['p95_ms']:.1f} | {lat['max_ms']:.1f} | {r['failures']} |")
+        else:
+            print(f"| {r['stream']} | {r['elapsed_s']:.3f} | - | - | - | {r['failures']} |")
+    for r in result['stream_results']:
+        for e in r['executions']:
+            if e['status'] != 'ok':
+                print(f"  stream {r['stream']} {e['query']}: {e['error']}")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de throughput TPC-H com streams concorrentes")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--streams', type=int, default=2, help="número de streams concorrentes (S)")
+    parser.add_argument('--queries', nargs='+', default=['all'],
+                        help="queries de cada stream (ex.: Q1 Q6 Q14) ou 'all' para Q1-Q22")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="semente das permutações e dos parâmetros dos streams")
+    parser.add_argument('--scale-factor', type=float, default=1,
+                        help="SF dos dados (Q11 e Throughput@Size)")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva os resultados e as latências de cada execução")
+    args = parser.parse_args()
+    queries = ALL_QUERIES if args.queries == ['all'] else args.queries
+    for q in queries:
+        if q not in MONGODB_QUERIES:
+            parser.error(f"query desconhecida: {q} (use Q1-Q22)")
+    if args.streams < 1:
+        parser.error("--streams deve ser >= 1")
+
+    queries_dir = os.path.join(os.getcwd(), 'tpch-dbgen', 'queries')
+    results = []
+    for engine in args.engines:
+        print(f"Rodando {args.streams} streams no {ENGINE_LABELS[engine]}...")
+        try:
+            result = run_throughput(engine, args.streams, queries, args.seed, args.scale_factor, queries_dir)
+        except Exception as e:
+            print(f"Erro ao rodar o teste de throughput no {ENGINE_LABELS[engine]}: {e}")
+            continue
+        print_report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'streams': args.streams,
+                'queries': queries,
+                'seed': args.seed,
+                'scale_factor': args.scale_factor,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos em {args.json}")
+
+if __name__ == "__main__":
+    main()
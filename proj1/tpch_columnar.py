@@ -0,0 +1,235 @@
+"""
+Formato colunar binário para as tabelas do TPC-H.
+
+Cada tabela vira um diretório com um arquivo por coluna e um manifest.json:
+  - inteiros  -> int64 ('q')
+  - decimais  -> float64 ('d')
+  - datas     -> int32 ('i') com o ordinal do dia (datetime.date.toordinal)
+  - strings de baixa cardinalidade -> códigos uint8 ('B') + dicionário no manifest
+  - demais strings -> blob UTF-8 + offsets int64 (rows + 1 posições)
+
+A leitura usa mmap + memoryview.cast, sem copiar os dados para o Python.
+"""
+import datetime
+import json
+import mmap
+import os
+import sys
+from array import array
+
+import tpch_schema
+
+MANIFEST = "manifest.json"
+
+# colunas string codificadas por dicionário
+DICT_COLUMNS = {
+    "r_name", "n_name",
+    "p_mfgr", "p_brand", "p_type", "p_container",
+    "c_mktsegment",
+    "o_orderstatus", "o_orderpriority",
+    "l_returnflag", "l_linestatus", "l_shipinstruct", "l_shipmode",
+}
+
+TYPECODES = {"int": "q", "decimal": "d", "date": "i", "dict": "B"}
+
+# linhas acumuladas em memória antes de gravar cada coluna
+FLUSH_ROWS = 65536
+
+def column_kind(kind, field):
+    """Tipo físico da coluna no formato colunar a partir do tipo do DDL"""
+    if kind != "str":
+        return kind
+    return "dict" if field in DICT_COLUMNS else "string"
+
+def ordinal_to_date(n):
+    return datetime.date.fromordinal(n)
+
+class _ColumnWriter:
+    """Acumula valores de uma coluna e grava em blocos"""
+
+    def __init__(self, out_dir, name, kind):
+        self.name = name
+        self.kind = kind
+        self.file = f"{name}.bin"
+        self.fout = open(os.path.join(out_dir, self.file), "wb")
+        self.dictionary = {}
+        if kind == "string":
+            self.offsets_file = f"{name}.offsets"
+            self.foff = open(os.path.join(out_dir, self.offsets_file), "wb")
+            self.values = []
+            self.offsets = array("q", [0])
+            self.pos = 0
+        else:
+            self.values = array(TYPECODES[kind])
+
+    def append(self, raw):
+        """raw já vem tipado pelo decodificador de tpch_schema (datas como ordinais)"""
+        kind = self.kind
+        if kind == "dict":
+            code = self.dictionary.get(raw)
+            if code is None:
+                code = len(self.dictionary)
+                if code > 255:
+                    raise ValueError(f"coluna {self.name}: mais de 256 valores distintos")
+                self.dictionary[raw] = code
+            self.values.append(code)
+        elif kind == "string":
+            b = raw.encode("utf-8")
+            self.pos += len(b)
+            self.values.append(b)
+            self.offsets.append(self.pos)
+        else:
+            self.values.append(raw)
+
+    def flush(self):
+        if self.kind == "string":
+            self.fout.write(b"".join(self.values))
+            self.offsets.tofile(self.foff)
+            self.values = []
+            self.offsets = array("q")
+        else:
+            self.values.tofile(self.fout)
+            self.values = array(TYPECODES[self.kind])
+
+    def close(self):
+        self.flush()
+        self.fout.close()
+        if self.kind == "string":
+            self.foff.close()
+
+    def describe(self):
+        col = {"name": self.name, "kind": self.kind, "file": self.file}
+        if self.kind == "string":
+            col["typecode"] = "B"
+            col["offsets"] = self.offsets_file
+        else:
+            col["typecode"] = TYPECODES[self.kind]
+        if self.kind == "dict":
+            col["dictionary"] = sorted(self.dictionary, key=self.dictionary.get)
+        return col
+
+def write_table(tbl_name, cols, in_path, out_dir):
+    """Converte um .tbl em arrays por coluna + manifest; retorna o número de linhas"""
+    table_dir = os.path.join(out_dir, tbl_name)
+    os.makedirs(table_dir, exist_ok=True)
+    kinds = tpch_schema.column_kinds(tbl_name)
+    writers = [_ColumnWriter(table_dir, c, column_kind(kinds[c], c)) for c in cols]
+    rows = 0
+    for row in tpch_schema.iter_tbl(in_path, tbl_name, cols, dates="ordinal", nulls=False):
+        for w, val in zip(writers, row.values()):
+            w.append(val)
+        rows += 1
+        if rows % FLUSH_ROWS == 0:
+            for w in writers:
+                w.flush()
+    for w in writers:
+        w.close()
+
+    manifest = {
+        "table": tbl_name,
+        "rows": rows,
+        "byteorder": sys.byteorder,
+        "date_encoding": "ordinal",
+        "columns": [w.describe() for w in writers],
+    }
+    with open(os.path.join(table_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return rows
+
+def _map(path, typecode):
+    """memoryview zero-copy sobre o arquivo (mmap somente leitura)"""
+    if os.path.getsize(path) == 0:
+        return memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm).cast(typecode)
+
+class StringColumn:
+    """Coluna string de tamanho variável: decodifica sob demanda"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+class DictColumn:
+    """Coluna codificada por dicionário: codes (uint8) + dictionary"""
+
+    def __init__(self, codes, dictionary):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.dictionary[self.codes[i]]
+
+    def code_of(self, value):
+        """Código de um valor (ou None), útil para filtrar direto nos códigos"""
+        try:
+            return self.dictionary.index(value)
+        except ValueError:
+            return None
+
+class ColumnarTable:
+    """Leitor de uma tabela no formato colunar; só mapeia as colunas acessadas"""
+
+    def __init__(self, table_dir):
+        self.dir = table_dir
+        with open(os.path.join(table_dir, MANIFEST), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"{table_dir}: gerado com byteorder {self.manifest['byteorder']}")
+        self.name = self.manifest["table"]
+        self.rows = self.manifest["rows"]
+        self.meta = {c["name"]: c for c in self.manifest["columns"]}
+        self._cache = {}
+
+    @property
+    def columns(self):
+        return [c["name"] for c in self.manifest["columns"]]
+
+    def column(self, name):
+        """
+        int/decimal/date -> memoryview tipado (datas como ordinais)
+        dict             -> DictColumn
+        string           -> StringColumn
+        """
+        if name in self._cache:
+            return self._cache[name]
+        meta = self.meta[name]
+        data = _map(os.path.join(self.dir, meta["file"]), meta["typecode"])
+        if meta["kind"] == "dict":
+            col = DictColumn(data, meta["dictionary"])
+        elif meta["kind"] == "string":
+            col = StringColumn(data, _map(os.path.join(self.dir, meta["offsets"]), "q"))
+        else:
+            col = data
+        self._cache[name] = col
+        return col
+
+    def iter_rows(self, names=None, dates_as="str"):
+        """Gera dicts apenas com as colunas pedidas (datas em 'YYYY-MM-DD' ou ordinais)"""
+        names = names or self.columns
+        cols = [self.column(n) for n in names]
+        date_cols = [i for i, n in enumerate(names) if self.meta[n]["kind"] == "date"]
+        cache = {}
+        for i in range(self.rows):
+            values = [c[i] for c in cols]
+            if dates_as == "str":
+                for j in date_cols:
+                    n = values[j]
+                    s = cache.get(n)
+                    if s is None:
+                        s = cache[n] = ordinal_to_date(n).isoformat()
+                    values[j] = s
+            yield dict(zip(names, values))
+
+def open_table(base_dir, tbl_name):
+    return ColumnarTable(os.path.join(base_dir, tbl_name))
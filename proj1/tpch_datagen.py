@@ -0,0 +1,368 @@
+"""
+Gerador dos .tbl do TPC-H em Python/NumPy (substitui o binário dbgen).
+
+Segue as regras de geração da especificação TPC-H (cláusula 4.2):
+cardinalidades por SF, chaves esparsas de orders (8 de cada 32), clientes
+com custkey múltiplo de 3 sem pedidos, fornecedores de partsupp/lineitem
+pela fórmula do dbgen, p_retailprice pela fórmula da chave, datas,
+flags e status derivados de CURRENTDATE (1995-06-17) e o totalprice
+calculado dos lineitems. Os comentários são trechos de um texto gerado
+com o vocabulário da gramática do dbgen (inclui as palavras das Q13/Q16),
+como no text pool do dbgen; os valores são listas de tpch_params.
+
+Cada tabela é gerada em blocos de linhas, com os valores sorteados em
+vetores do NumPy; cada bloco tem a sua semente (semente, tabela, bloco),
+então o resultado é o mesmo com qualquer número de workers. orders e
+lineitem saem juntos (o pedido precisa dos seus itens), assim como part e
+partsupp. A saída é igual à do dbgen ('|' entre os campos e no fim da
+linha) e é lida por tpch_to_json.py e proj2/load_tpch_redis.py.
+
+Uso:
+    python proj1/tpch_datagen.py --scale-factor 1 --seed 42 --workers 4
+"""
+import argparse
+import datetime
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tpch_params
+
+TABLE_ORDER = ["region", "nation", "supplier", "part", "partsupp", "customer", "orders", "lineitem"]
+
+# tabelas geradas juntas: a primeira de cada grupo define os blocos
+GROUPS = {
+    "region": ["region"],
+    "nation": ["nation"],
+    "supplier": ["supplier"],
+    "part": ["part", "partsupp"],
+    "customer": ["customer"],
+    "orders": ["orders", "lineitem"],
+}
+GROUP_IDS = {name: i for i, name in enumerate(GROUPS)}
+
+# linhas da tabela principal do grupo por bloco
+CHUNK_ROWS = 100_000
+
+BASE_ROWS = {"supplier": 10_000, "part": 200_000, "customer": 150_000, "orders": 1_500_000}
+
+START_DATE = datetime.date(1992, 1, 1)
+END_DATE = datetime.date(1998, 12, 31)
+CURRENT_DATE = (datetime.date(1995, 6, 17) - START_DATE).days
+# o último pedido é de ENDDATE - 151 dias, para os itens caberem até ENDDATE
+LAST_ORDER_DAY = (END_DATE - START_DATE).days - 151
+DATES = np.array([(START_DATE + datetime.timedelta(days=d)).isoformat()
+                  for d in range((END_DATE - START_DATE).days + 1)], dtype=object)
+
+PRIORITIES = ["1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW"]
+SHIP_INSTRUCTIONS = ["DELIVER IN PERSON", "COLLECT COD", "NONE", "TAKE BACK RETURN"]
+TYPES = np.array([f"{a} {b} {c}" for a in tpch_params.TYPE_SYLLABLE_1 for b in tpch_params.TYPE_SYLLABLE_2
+                  for c in tpch_params.TYPE_SYLLABLE_3], dtype=object)
+CONTAINERS = np.array([f"{a} {b}" for a in tpch_params.CONTAINER_SYLLABLE_1
+                       for b in tpch_params.CONTAINER_SYLLABLE_2], dtype=object)
+COLORS = np.array(tpch_params.COLORS, dtype=object)
+
+# vocabulário da gramática de texto do dbgen
+NOUNS = ["foxes", "ideas", "theodolites", "pinto beans", "instructions", "dependencies", "excuses",
+         "platelets", "asymptotes", "courts", "dolphins", "multipliers", "sauternes", "warthogs", "frets",
+         "dinos", "attainments", "somas", "Tiresias", "patterns", "forges", "braids", "hockey players",
+         "frays", "warhorses", "dugouts", "notornis", "epitaphs", "pearls", "tithes", "waters", "orbits",
+         "gifts", "sheaves", "depths", "sentiments", "decoys", "realms", "pains", "grouches", "escapades",
+         "accounts", "deposits", "requests", "packages"]
+VERBS = ["sleep", "wake", "are", "cajole", "haggle", "nag", "use", "boost", "affix", "detect", "integrate",
+         "maintain", "nod", "was", "lose", "sublate", "solve", "thrash", "promise", "engage", "hinder",
+         "print", "x-ray", "breach", "eat", "grow", "impress", "mold", "poach", "serve", "run", "dazzle",
+         "snooze", "doze", "unwind", "kindle", "play", "hang", "believe", "doubt"]
+ADJECTIVES = ["furious", "sly", "careful", "blithe", "quick", "fluffy", "slow", "quiet", "ruthless", "thin",
+              "close", "dogged", "daring", "brave", "stealthy", "permanent", "enticing", "idle", "busy",
+              "regular", "final", "ironic", "even", "bold", "silent", "special", "pending", "unusual",
+              "express"]
+ADVERBS = ["sometimes", "always", "never", "furiously", "slyly", "carefully", "blithely", "quickly",
+           "fluffily", "slowly", "quietly", "ruthlessly", "thinly", "closely", "doggedly", "daringly",
+           "bravely", "stealthily", "permanently", "enticingly", "idly", "busily", "regularly", "finally",
+           "ironically", "evenly", "boldly", "silently"]
+PREPOSITIONS = ["about", "above", "according to", "across", "after", "against", "along", "alongside of",
+                "among", "around", "at", "atop", "before", "behind", "beneath", "beside", "besides",
+                "between", "beyond", "by", "despite", "during", "except", "for", "from", "in place of",
+                "inside", "instead of", "into", "near", "of", "on", "outside", "over", "past", "since",
+                "through", "throughout", "to", "toward", "under", "until", "up", "upon", "without", "with",
+                "within"]
+TERMINATORS = [".", ";", ":", "?", "!", "--"]
+
+TEXT_POOL_BYTES = 4 * 1024 * 1024
+ADDRESS_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ,"
+
+_pools = {}
+
+def row_counts(scale_factor):
+    """Linhas de cada tabela principal no SF (mínimo 1)"""
+    return {t: max(int(n * scale_factor), 1) for t, n in BASE_ROWS.items()}
+
+def text_pool(seed):
+    """Texto com as frases da gramática do dbgen; os comentários são trechos dele"""
+    if seed not in _pools:
+        rng = np.random.default_rng([seed, len(GROUPS)])
+        sentences = []
+        size = 0
+        while size < TEXT_POOL_BYTES:
+            n = 10_000
+            adj = rng.integers(len(ADJECTIVES), size=n).tolist()
+            noun = rng.integers(len(NOUNS), size=n).tolist()
+            adv = rng.integers(len(ADVERBS), size=n).tolist()
+            verb = rng.integers(len(VERBS), size=n).tolist()
+            prep = rng.integers(len(PREPOSITIONS), size=n).tolist()
+            adj2 = rng.integers(len(ADJECTIVES), size=n).tolist()
+            noun2 = rng.integers(len(NOUNS), size=n).tolist()
+            term = rng.integers(len(TERMINATORS), size=n).tolist()
+            form = rng.integers(4, size=n).tolist()
+            for i in range(n):
+                subject = f"{ADJECTIVES[adj[i]]} {NOUNS[noun[i]]}" if form[i] & 1 else NOUNS[noun[i]]
+                predicate = f"{ADVERBS[adv[i]]} {VERBS[verb[i]]}" if form[i] & 2 else VERBS[verb[i]]
+                sentence = f"{subject} {predicate} {PREPOSITIONS[prep[i]]} the {ADJECTIVES[adj2[i]]} " \
+                           f"{NOUNS[noun2[i]]}{TERMINATORS[term[i]]} "
+                sentences.append(sentence)
+                size += len(sentence)
+        _pools[seed] = "".join(sentences)
+    return _pools[seed]
+
+def texts(rng, pool, n, lo, hi):
+    """n trechos do pool com tamanho entre lo e hi"""
+    lengths = rng.integers(lo, hi + 1, size=n)
+    offsets = rng.integers(0, len(pool) - hi, size=n)
+    return [pool[o:o + length] for o, length in zip(offsets.tolist(), lengths.tolist())]
+
+def addresses(rng, n):
+    """v-strings de 10 a 40 caracteres"""
+    chars = np.array(list(ADDRESS_CHARS))
+    pool = "".join(chars[rng.integers(len(chars), size=64 * 1024)])
+    return texts(rng, pool, n, 10, 40)
+
+def phones(rng, nationkeys):
+    n = len(nationkeys)
+    a = rng.integers(100, 1000, size=n).tolist()
+    b = rng.integers(100, 1000, size=n).tolist()
+    c = rng.integers(1000, 10000, size=n).tolist()
+    return [f"{k + 10}-{x}-{y}-{z}" for k, x, y, z in zip(nationkeys.tolist(), a, b, c)]
+
+def ints(values):
+    return list(map(str, values.tolist()))
+
+def money(cents):
+    """Valores em centavos -> '1234.56'"""
+    return [f"{c / 100:.2f}" for c in cents.tolist()]
+
+def keyed_names(prefix, keys):
+    return [f"{prefix}#{k:09d}" for k in keys.tolist()]
+
+def to_tbl(columns):
+    """Colunas (listas de texto) -> linhas do .tbl"""
+    return "".join(f"{line}|\n" for line in map("|".join, zip(*columns)))
+
+def retail_cents(partkeys):
+    """p_retailprice (em centavos) pela fórmula da chave"""
+    return 90000 + (partkeys // 10) % 20001 + 100 * (partkeys % 1000)
+
+def partsupp_suppkey(partkeys, i, suppliers):
+    """i-ésimo fornecedor (0-3) de cada peça, a fórmula do dbgen"""
+    return (partkeys + i * (suppliers // 4 + (partkeys - 1) // suppliers)) % suppliers + 1
+
+def gen_region(rng, pool, start, n, counts):
+    keys = np.arange(5)
+    return {"region": to_tbl([ints(keys), tpch_params.REGIONS, texts(rng, pool, 5, 31, 115)])}
+
+def gen_nation(rng, pool, start, n, counts):
+    names = [name for name, _ in tpch_params.NATIONS]
+    regions = [str(region) for _, region in tpch_params.NATIONS]
+    return {"nation": to_tbl([ints(np.arange(25)), names, regions, texts(rng, pool, 25, 31, 114)])}
+
+def gen_supplier(rng, pool, start, n, counts):
+    keys = np.arange(start + 1, start + n + 1)
+    nationkeys = rng.integers(25, size=n)
+    comments = texts(rng, pool, n, 25, 100)
+    # 5 em 10.000 fornecedores têm reclamações e 5 têm recomendações (Q16)
+    special = rng.choice(n, size=max(n // 1000, 1), replace=False)
+    for j, i in enumerate(special.tolist()):
+        word = "Complaints" if j % 2 == 0 else "Recommends"
+        comments[i] = f"{comments[i][:20]}Customer {comments[i][20:30]}{word}"
+    return {"supplier": to_tbl([
+        ints(keys), keyed_names("Supplier", keys), addresses(rng, n), ints(nationkeys),
+        phones(rng, nationkeys), money(rng.integers(-99999, 1000000, size=n)), comments,
+    ])}
+
+def gen_part(rng, pool, start, n, counts):
+    keys = np.arange(start + 1, start + n + 1)
+    # 5 cores distintas por nome
+    colors = np.argpartition(rng.random((n, len(COLORS))), 5, axis=1)[:, :5]
+    names = [" ".join(c) for c in COLORS[colors].tolist()]
+    mfgr = rng.integers(1, 6, size=n)
+    brand = mfgr * 10 + rng.integers(1, 6, size=n)
+    part = to_tbl([
+        ints(keys), names, [f"Manufacturer#{m}" for m in mfgr.tolist()], [f"Brand#{b}" for b in brand.tolist()],
+        TYPES[rng.integers(len(TYPES), size=n)].tolist(), ints(rng.integers(1, 51, size=n)),
+        CONTAINERS[rng.integers(len(CONTAINERS), size=n)].tolist(), money(retail_cents(keys)),
+        texts(rng, pool, n, 5, 22),
+    ])
+
+    # 4 fornecedores por peça
+    ps_keys = np.repeat(keys, 4)
+    ps_supp = partsupp_suppkey(ps_keys, np.tile(np.arange(4), n), counts["supplier"])
+    partsupp = to_tbl([
+        ints(ps_keys), ints(ps_supp), ints(rng.integers(1, 10000, size=4 * n)),
+        money(rng.integers(100, 100001, size=4 * n)), texts(rng, pool, 4 * n, 49, 198),
+    ])
+    return {"part": part, "partsupp": partsupp}
+
+def gen_customer(rng, pool, start, n, counts):
+    keys = np.arange(start + 1, start + n + 1)
+    nationkeys = rng.integers(25, size=n)
+    segments = np.array(tpch_params.SEGMENTS, dtype=object)
+    return {"customer": to_tbl([
+        ints(keys), keyed_names("Customer", keys), addresses(rng, n), ints(nationkeys),
+        phones(rng, nationkeys), money(rng.integers(-99999, 1000000, size=n)),
+        segments[rng.integers(len(segments), size=n)].tolist(), texts(rng, pool, n, 29, 116),
+    ])}
+
+def gen_orders(rng, pool, start, n, counts):
+    # chaves esparsas: as 8 primeiras de cada 32
+    index = np.arange(start, start + n)
+    orderkeys = index // 8 * 32 + index % 8 + 1
+    # custkey nunca é múltiplo de 3 (um terço dos clientes fica sem pedidos)
+    customers = counts["customer"]
+    r = rng.integers(max(customers - customers // 3, 1), size=n)
+    custkeys = r // 2 * 3 + r % 2 + 1
+    orderdates = rng.integers(LAST_ORDER_DAY + 1, size=n)
+
+    # itens de cada pedido
+    lines = rng.integers(1, 8, size=n)
+    total = int(lines.sum())
+    first = np.cumsum(lines) - lines
+    order_of_line = np.repeat(np.arange(n), lines)
+    linenumbers = np.arange(total) - np.repeat(first, lines) + 1
+    partkeys = rng.integers(1, counts["part"] + 1, size=total)
+    suppkeys = partsupp_suppkey(partkeys, rng.integers(4, size=total), counts["supplier"])
+    quantity = rng.integers(1, 51, size=total)
+    extended = quantity * retail_cents(partkeys)
+    discount = rng.integers(0, 11, size=total)
+    tax = rng.integers(0, 9, size=total)
+    line_orderdates = orderdates[order_of_line]
+    shipdates = line_orderdates + rng.integers(1, 122, size=total)
+    commitdates = line_orderdates + rng.integers(30, 91, size=total)
+    receiptdates = shipdates + rng.integers(1, 31, size=total)
+    returned = np.where(rng.random(total) < 0.5, "R", "A")
+    returnflags = np.where(receiptdates <= CURRENT_DATE, returned, "N")
+    open_lines = shipdates > CURRENT_DATE
+    linestatus = np.where(open_lines, "O", "F")
+
+    # status e total do pedido a partir dos itens
+    open_count = np.add.reduceat(open_lines.astype(np.int64), first)
+    status = np.where(open_count == lines, "O", np.where(open_count == 0, "F", "P"))
+    charge = extended * (100 + tax) * (100 - discount) / 10000
+    totalprice = np.rint(np.add.reduceat(charge, first)).astype(np.int64)
+    clerks = rng.integers(1, max(int(1000 * counts["scale_factor"]), 1) + 1, size=n)
+    priorities = np.array(PRIORITIES, dtype=object)
+
+    orders = to_tbl([
+        ints(orderkeys), ints(custkeys), status.tolist(), money(totalprice), DATES[orderdates].tolist(),
+        priorities[rng.integers(5, size=n)].tolist(), keyed_names("Clerk", clerks), ["0"] * n,
+        texts(rng, pool, n, 19, 78),
+    ])
+    instructions = np.array(SHIP_INSTRUCTIONS, dtype=object)
+    modes = np.array(tpch_params.SHIPMODES, dtype=object)
+    lineitem = to_tbl([
+        ints(orderkeys[order_of_line]), ints(partkeys), ints(suppkeys), ints(linenumbers), ints(quantity),
+        money(extended), money(discount), money(tax), returnflags.tolist(), linestatus.tolist(),
+        DATES[shipdates].tolist(), DATES[commitdates].tolist(), DATES[receiptdates].tolist(),
+        instructions[rng.integers(4, size=total)].tolist(), modes[rng.integers(len(modes), size=total)].tolist(),
+        texts(rng, pool, total, 10, 43),
+    ])
+    return {"orders": orders, "lineitem": lineitem}
+
+GENERATORS = {
+    "region": gen_region,
+    "nation": gen_nation,
+    "supplier": gen_supplier,
+    "part": gen_part,
+    "customer": gen_customer,
+    "orders": gen_orders,
+}
+
+def generate_chunk(job):
+    """Gera um bloco: job = (grupo, bloco, primeira linha, linhas, semente, SF) -> {tabela: texto}"""
+    group, chunk, start, n, seed, scale_factor = job
+    counts = dict(row_counts(scale_factor), scale_factor=scale_factor)
+    rng = np.random.default_rng([seed, GROUP_IDS[group], chunk])
+    return GENERATORS[group](rng, text_pool(seed), start, n, counts)
+
+def chunk_jobs(group, seed, scale_factor):
+    total = row_counts(scale_factor).get(group, 1)
+    return [(group, i, start, min(CHUNK_ROWS, total - start), seed, scale_factor)
+            for i, start in enumerate(range(0, total, CHUNK_ROWS))]
+
+def ordered_results(pool, jobs, window):
+    """Resultados na ordem dos jobs, com no máximo window blocos em andamento"""
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(generate_chunk, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def generate(tables, out_dir, scale_factor=1, seed=0, workers=1):
+    """Gera os .tbl pedidos em out_dir; retorna {tabela: linhas}"""
+    os.makedirs(out_dir, exist_ok=True)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    totals = {}
+    try:
+        for group, members in GROUPS.items():
+            wanted = [t for t in members if t in tables]
+            if not wanted:
+                continue
+            start = time.perf_counter()
+            jobs = chunk_jobs(group, seed, scale_factor)
+            results = ordered_results(pool, jobs, 2 * workers) if pool else map(generate_chunk, jobs)
+            files = {t: open(os.path.join(out_dir, f"{t}.tbl"), "w", encoding="utf-8") for t in wanted}
+            rows = dict.fromkeys(wanted, 0)
+            try:
+                for chunk in results:
+                    for t in wanted:
+                        files[t].write(chunk[t])
+                        rows[t] += chunk[t].count("\n")
+            finally:
+                for f in files.values():
+                    f.close()
+            elapsed = time.perf_counter() - start
+            for t in wanted:
+                report(t, rows[t], elapsed)
+            totals.update(rows)
+    finally:
+        if pool:
+            pool.shutdown()
+    return totals
+
+def report(tbl_name, rows, elapsed):
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"  {tbl_name}: {rows} linhas em {elapsed:.2f}s ({rate:,.0f} linhas/s)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gera os .tbl do TPC-H (NumPy, sem o dbgen)")
+    parser.add_argument("--scale-factor", type=float, default=1, help="SF (1 = ~1 GB, 6 milhões de lineitems)")
+    parser.add_argument("--seed", type=int, default=0, help="semente (mesma semente e SF, mesmos arquivos)")
+    parser.add_argument("--tables", nargs="+", choices=TABLE_ORDER, default=TABLE_ORDER)
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"processos gerando blocos de {CHUNK_ROWS} linhas em paralelo")
+    parser.add_argument("--out-dir", default=os.path.join(os.getcwd(), "tpch-dbgen"))
+    args = parser.parse_args()
+    if args.scale_factor <= 0:
+        parser.error("--scale-factor deve ser > 0")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"Gerando TPC-H SF {args.scale_factor} (semente {args.seed}) em {args.out_dir}...")
+    start = time.perf_counter()
+    totals = generate(args.tables, args.out_dir, args.scale_factor, args.seed, args.workers)
+    print(f"{sum(totals.values())} linhas em {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,193 @@
+"""
+Parâmetros das 22 queries do TPC-H no estilo do qgen.
+
+generate(n, rng) sorteia um conjunto de parâmetros seguindo as regras de
+substituição da especificação (cláusula 2.4); VALIDATION tem os valores de
+validação. Os parâmetros têm nome e são passados como keyword arguments para
+queryN_mongodb / queryN_redis; sql_params(n, params) os coloca na ordem
+':1', ':2', ... dos templates de tpch-dbgen/queries.
+"""
+import datetime
+import random
+
+# listas de tpch-dbgen/dists.dss (especificação, cláusula 4.2.3)
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+
+# nação -> índice da região, na ordem de n_nationkey
+NATIONS = [
+    ("ALGERIA", 0), ("ARGENTINA", 1), ("BRAZIL", 1), ("CANADA", 1), ("EGYPT", 4),
+    ("ETHIOPIA", 0), ("FRANCE", 3), ("GERMANY", 3), ("INDIA", 2), ("INDONESIA", 2),
+    ("IRAN", 4), ("IRAQ", 4), ("JAPAN", 2), ("JORDAN", 4), ("KENYA", 0),
+    ("MOROCCO", 0), ("MOZAMBIQUE", 0), ("PERU", 1), ("CHINA", 2), ("ROMANIA", 3),
+    ("SAUDI ARABIA", 4), ("VIETNAM", 2), ("RUSSIA", 3), ("UNITED KINGDOM", 3), ("UNITED STATES", 1),
+]
+
+COLORS = [
+    "almond", "antique", "aquamarine", "azure", "beige", "bisque", "black", "blanched",
+    "blue", "blush", "brown", "burlywood", "burnished", "chartreuse", "chiffon", "chocolate",
+    "coral", "cornflower", "cornsilk", "cream", "cyan", "dark", "deep", "dim", "dodger",
+    "drab", "firebrick", "floral", "forest", "frosted", "gainsboro", "ghost", "goldenrod",
+    "green", "grey", "honeydew", "hot", "indian", "ivory", "khaki", "lace", "lavender",
+    "lawn", "lemon", "light", "lime", "linen", "magenta", "maroon", "medium", "metallic",
+    "midnight", "mint", "misty", "moccasin", "navajo", "navy", "olive", "orange", "orchid",
+    "pale", "papaya", "peach", "peru", "pink", "plum", "powder", "puff", "purple", "red",
+    "rose", "rosy", "royal", "saddle", "salmon", "sandy", "seashell", "sienna", "sky",
+    "slate", "smoke", "snow", "spring", "steel", "tan", "thistle", "tomato", "turquoise",
+    "violet", "wheat", "white", "yellow",
+]
+
+TYPE_SYLLABLE_1 = ["STANDARD", "SMALL", "MEDIUM", "LARGE", "ECONOMY", "PROMO"]
+TYPE_SYLLABLE_2 = ["ANODIZED", "BURNISHED", "PLATED", "POLISHED", "BRUSHED"]
+TYPE_SYLLABLE_3 = ["TIN", "NICKEL", "BRASS", "STEEL", "COPPER"]
+
+CONTAINER_SYLLABLE_1 = ["SM", "LG", "MED", "JUMBO", "WRAP"]
+CONTAINER_SYLLABLE_2 = ["CASE", "BOX", "BAG", "JAR", "PKG", "PACK", "CAN", "DRUM"]
+
+SEGMENTS = ["AUTOMOBILE", "BUILDING", "FURNITURE", "MACHINERY", "HOUSEHOLD"]
+
+SHIPMODES = ["REG AIR", "AIR", "RAIL", "SHIP", "TRUCK", "MAIL", "FOB"]
+
+Q13_WORDS_1 = ["special", "pending", "unusual", "express"]
+Q13_WORDS_2 = ["packages", "requests", "accounts", "deposits"]
+
+# valores de validação (cláusula 2.4), com os nomes dos keyword arguments das queries
+VALIDATION = {
+    1: {"delta": 90},
+    2: {"size": 15, "type_suffix": "BRASS", "region": "EUROPE"},
+    3: {"segment": "BUILDING", "date": "1995-03-15"},
+    4: {"date": "1993-07-01"},
+    5: {"region": "ASIA", "date": "1994-01-01"},
+    6: {"date": "1994-01-01", "discount": 0.06, "quantity": 24},
+    7: {"nation1": "FRANCE", "nation2": "GERMANY"},
+    8: {"nation": "BRAZIL", "region": "AMERICA", "p_type": "ECONOMY ANODIZED STEEL"},
+    9: {"color": "green"},
+    10: {"date": "1993-10-01"},
+    11: {"nation": "GERMANY", "fraction": 0.0001},
+    12: {"shipmode1": "MAIL", "shipmode2": "SHIP", "date": "1994-01-01"},
+    13: {"word1": "special", "word2": "requests"},
+    14: {"date": "1995-09-01"},
+    15: {"date": "1996-01-01"},
+    16: {"brand": "Brand#45", "type_prefix": "MEDIUM POLISHED", "sizes": (49, 14, 23, 45, 19, 3, 36, 9)},
+    17: {"brand": "Brand#23", "container": "MED BOX"},
+    18: {"quantity": 300},
+    19: {"brands": ("Brand#12", "Brand#23", "Brand#34"), "quantities": (1, 10, 20)},
+    20: {"color": "forest", "date": "1994-01-01", "nation": "CANADA"},
+    21: {"nation": "SAUDI ARABIA"},
+    22: {"codes": ("13", "31", "23", "29", "30", "18", "17")},
+}
+
+# ordem dos parâmetros nos templates SQL (':1', ':2', ...); tuplas ocupam várias posições
+SQL_ORDER = {
+    1: ["delta"],
+    2: ["size", "type_suffix", "region"],
+    3: ["segment", "date"],
+    4: ["date"],
+    5: ["region", "date"],
+    6: ["date", "discount", "quantity"],
+    7: ["nation1", "nation2"],
+    8: ["nation", "region", "p_type"],
+    9: ["color"],
+    10: ["date"],
+    11: ["nation", "fraction"],
+    12: ["shipmode1", "shipmode2", "date"],
+    13: ["word1", "word2"],
+    14: ["date"],
+    15: ["date"],
+    16: ["brand", "type_prefix", "sizes"],
+    17: ["brand", "container"],
+    18: ["quantity"],
+    19: ["brands", "quantities"],
+    20: ["color", "date", "nation"],
+    21: ["nation"],
+    22: ["codes"],
+}
+
+def sql_params(n, params):
+    """Valores (como texto) na ordem ':1', ':2', ... do template n"""
+    values = []
+    for name in SQL_ORDER[n]:
+        value = params[name]
+        if isinstance(value, (list, tuple)):
+            values.extend(str(v) for v in value)
+        else:
+            values.append(str(value))
+    return values
+
+def _month_start(rng, first, last):
+    """Primeiro dia de um mês sorteado entre first e last ((ano, mês), inclusive)"""
+    months = (last[0] - first[0]) * 12 + last[1] - first[1]
+    m = first[1] - 1 + rng.randint(0, months)
+    return datetime.date(first[0] + m // 12, m % 12 + 1, 1).isoformat()
+
+def _year_start(rng):
+    return f"{rng.randint(1993, 1997)}-01-01"
+
+def _brand(rng):
+    return f"Brand#{rng.randint(1, 5)}{rng.randint(1, 5)}"
+
+def _nation(rng):
+    return rng.choice(NATIONS)[0]
+
+def generate(n, rng, scale_factor=1):
+    """Sorteia os parâmetros da query n com o random.Random rng"""
+    if n == 1:
+        return {"delta": rng.randint(60, 120)}
+    if n == 2:
+        return {"size": rng.randint(1, 50), "type_suffix": rng.choice(TYPE_SYLLABLE_3),
+                "region": rng.choice(REGIONS)}
+    if n == 3:
+        day = datetime.date(1995, 3, rng.randint(1, 31))
+        return {"segment": rng.choice(SEGMENTS), "date": day.isoformat()}
+    if n == 4:
+        return {"date": _month_start(rng, (1993, 1), (1997, 10))}
+    if n == 5:
+        return {"region": rng.choice(REGIONS), "date": _year_start(rng)}
+    if n == 6:
+        return {"date": _year_start(rng), "discount": rng.randint(2, 9) / 100,
+                "quantity": rng.randint(24, 25)}
+    if n == 7:
+        nation1, nation2 = rng.sample([name for name, _ in NATIONS], 2)
+        return {"nation1": nation1, "nation2": nation2}
+    if n == 8:
+        nation, region = rng.choice(NATIONS)
+        p_type = " ".join(rng.choice(s) for s in (TYPE_SYLLABLE_1, TYPE_SYLLABLE_2, TYPE_SYLLABLE_3))
+        return {"nation": nation, "region": REGIONS[region], "p_type": p_type}
+    if n == 9:
+        return {"color": rng.choice(COLORS)}
+    if n == 10:
+        return {"date": _month_start(rng, (1993, 2), (1995, 1))}
+    if n == 11:
+        return {"nation": _nation(rng), "fraction": 0.0001 / scale_factor}
+    if n == 12:
+        shipmode1, shipmode2 = rng.sample(SHIPMODES, 2)
+        return {"shipmode1": shipmode1, "shipmode2": shipmode2, "date": _year_start(rng)}
+    if n == 13:
+        return {"word1": rng.choice(Q13_WORDS_1), "word2": rng.choice(Q13_WORDS_2)}
+    if n == 14:
+        return {"date": _month_start(rng, (1993, 1), (1997, 12))}
+    if n == 15:
+        return {"date": _month_start(rng, (1993, 1), (1997, 10))}
+    if n == 16:
+        type_prefix = f"{rng.choice(TYPE_SYLLABLE_1)} {rng.choice(TYPE_SYLLABLE_2)}"
+        return {"brand": _brand(rng), "type_prefix": type_prefix,
+                "sizes": tuple(rng.sample(range(1, 51), 8))}
+    if n == 17:
+        container = f"{rng.choice(CONTAINER_SYLLABLE_1)} {rng.choice(CONTAINER_SYLLABLE_2)}"
+        return {"brand": _brand(rng), "container": container}
+    if n == 18:
+        return {"quantity": rng.randint(312, 315)}
+    if n == 19:
+        return {"brands": (_brand(rng), _brand(rng), _brand(rng)),
+                "quantities": (rng.randint(1, 10), rng.randint(10, 20), rng.randint(20, 30))}
+    if n == 20:
+        return {"color": rng.choice(COLORS), "date": _year_start(rng), "nation": _nation(rng)}
+    if n == 21:
+        return {"nation": _nation(rng)}
+    if n == 22:
+        return {"codes": tuple(str(k + 10) for k in rng.sample(range(len(NATIONS)), 7))}
+    raise ValueError(f"query desconhecida: {n}")
+
+def param_sets(n, count, seed=None, scale_factor=1):
+    """count conjuntos de parâmetros reproduzíveis para a query n"""
+    rng = random.Random(f"{seed}:{n}") if seed is not None else random.Random()
+    return [generate(n, rng, scale_factor) for _ in range(count)]
@@ -0,0 +1,153 @@
+"""
+Registro de schema do TPC-H gerado a partir de tpch-dbgen/dss.ddl.
+
+Para cada tabela é compilado (uma vez) um decodificador especializado:
+uma função gerada com exec que converte os campos de uma linha do .tbl
+sem nenhum teste de tipo por campo. Usado por proj1 (tpch_to_json,
+load_mongodb) e proj2 (load_tpch_redis).
+"""
+import datetime
+import os
+import re
+from collections import namedtuple
+
+DDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tpch-dbgen", "dss.ddl")
+
+Column = namedtuple("Column", ["name", "sqltype", "kind", "nullable"])
+
+_TABLE_RE = re.compile(r"CREATE\s+TABLE\s+(\w+)\s*\((.*?)\)\s*;", re.IGNORECASE | re.DOTALL)
+_COLUMN_RE = re.compile(r"(\w+)\s+(INTEGER|DECIMAL\s*\(\s*\d+\s*,\s*\d+\s*\)|DATE|(?:VAR)?CHAR\s*\(\s*\d+\s*\))\s*(NOT\s+NULL)?",
+                        re.IGNORECASE)
+
+def _kind(sqltype):
+    t = sqltype.upper()
+    if t == "INTEGER":
+        return "int"
+    if t.startswith("DECIMAL"):
+        return "decimal"
+    if t == "DATE":
+        return "date"
+    return "str"
+
+def parse_ddl(path=DDL_PATH):
+    """{tabela: [Column, ...]} na ordem em que as colunas aparecem no DDL"""
+    with open(path, "r", encoding="utf-8") as f:
+        ddl = f.read()
+    tables = {}
+    for name, body in _TABLE_RE.findall(ddl):
+        tables[name.lower()] = [
+            Column(col.lower(), re.sub(r"\s+", "", sqltype.upper()), _kind(sqltype), not notnull)
+            for col, sqltype, notnull in _COLUMN_RE.findall(body)
+        ]
+    return tables
+
+TABLES = parse_ddl()
+
+def columns(table):
+    return [c.name for c in TABLES[table]]
+
+def column_kinds(table):
+    return {c.name: c.kind for c in TABLES[table]}
+
+class _DateOrdinals(dict):
+    """'YYYY-MM-DD' -> ordinal; o TPC-H tem só ~2.500 datas distintas"""
+
+    def __missing__(self, d):
+        y, m, da = d.split("-")
+        n = self[d] = datetime.date(int(y), int(m), int(da)).toordinal()
+        return n
+
+DATE_ORDINALS = _DateOrdinals()
+
+def date_ordinal(d):
+    return DATE_ORDINALS[d]
+
+def _field_expr(col, i, dates, nulls):
+    v = f"p[{i}]"
+    if col.kind == "int":
+        expr = f"int({v})"
+    elif col.kind == "decimal":
+        expr = f"float({v})"
+    elif col.kind == "date" and dates == "ordinal":
+        expr = f"_dates[{v}]"
+    else:
+        expr = v
+    if nulls and col.nullable:
+        if col.kind == "str" or (col.kind == "date" and dates == "str"):
+            return f"({v} or None)"
+        return f"({expr} if {v} else None)"
+    return expr
+
+_DECODERS = {}
+
+def compile_decoder(table, columns=None, dates="str", nulls=True):
+    """
+    Retorna decode(parts) -> dict para a tabela.
+    parts: campos já separados por '|' (todas as colunas da tabela).
+    columns: subconjunto de colunas a manter (padrão: todas).
+    dates: 'str' mantém 'YYYY-MM-DD'; 'ordinal' usa a tabela memoizada de ordinais.
+    nulls: campos vazios de colunas anuláveis viram None.
+    """
+    key = (table, tuple(columns) if columns else None, dates, nulls)
+    decoder = _DECODERS.get(key)
+    if decoder is not None:
+        return decoder
+
+    cols = TABLES[table]
+    wanted = set(columns) if columns else None
+    fields = ", ".join(
+        f"{c.name!r}: {_field_expr(c, i, dates, nulls)}"
+        for i, c in enumerate(cols)
+        if wanted is None or c.name in wanted
+    )
+    src = f"def decode_{table}(p):\n    return {{{fields}}}\n"
+    namespace = {"_dates": DATE_ORDINALS}
+    exec(src, namespace)
+    decoder = _DECODERS[key] = namespace[f"decode_{table}"]
+    return decoder
+
+def split_line(line):
+    """Remove o '|' final e separa os campos de uma linha do .tbl"""
+    return line.rstrip("\r\n").rstrip("|").split("|")
+
+def tbl_spans(path, parts):
+    """Divide o .tbl em até parts trechos de bytes (start, end) de tamanho parecido"""
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size))
+    bounds = [size * i // parts for i in range(parts + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _lines_between(path, start, end):
+    """Linhas que começam no trecho [start, end) do arquivo"""
+    with open(path, "rb") as f:
+        if start > 0:
+            # a linha cortada no início pertence ao trecho anterior
+            f.seek(start - 1)
+            start += len(f.readline()) - 1
+        pos = start
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            yield line.decode("utf-8", errors="ignore")
+
+def iter_tbl(path, table, columns=None, dates="str", nulls=True, span=None):
+    """
+    Lê um .tbl e gera dicts tipados; linhas com número errado de campos são
+    ignoradas. span=(start, end) lê só as linhas que começam nesse trecho de
+    bytes (tbl_spans), para dividir o arquivo entre processos.
+    """
+    decode = compile_decoder(table, columns, dates, nulls)
+    ncols = len(TABLES[table])
+    if span is not None:
+        lines = _lines_between(path, *span)
+    else:
+        lines = open(path, "r", encoding="utf-8", errors="ignore")
+    try:
+        for line in lines:
+            parts = split_line(line)
+            if len(parts) != ncols:
+                continue
+            yield decode(parts)
+    finally:
+        lines.close()
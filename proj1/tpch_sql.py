@@ -0,0 +1,60 @@
+"""
+Queries SQL do TPC-H (tpch-dbgen/queries) prontas para o MySQL.
+
+Os arquivos são templates do qgen com parâmetros ':1', ':2', ... e diretivas
+(':x', ':o', ':n N'); 1.sql-3.sql já usam a sintaxe do MySQL. render_query
+substitui os parâmetros (padrão: valores de validação da especificação;
+tpch_params.py gera outros), remove as diretivas, converte ':n N' em LIMIT e
+separa os comandos (a Q15 cria e remove uma view).
+"""
+import functools
+import os
+import re
+
+from tpch_params import VALIDATION, sql_params
+
+QUERIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tpch-dbgen", "queries")
+
+# valores de validação (TPC-H, cláusula 2.4) na ordem ':1', ':2', ...
+VALIDATION_PARAMS = {n: sql_params(n, params) for n, params in VALIDATION.items()}
+
+_PARAM_RE = re.compile(r":(\d+)")
+_STREAM_RE = re.compile(r":s\b")
+_LIMIT_RE = re.compile(r":n\s+(-?\d+)")
+
+@functools.lru_cache(maxsize=None)
+def read_template(n, queries_dir=QUERIES_DIR):
+    with open(os.path.join(queries_dir, f"{n}.sql"), "r", encoding="utf-8") as f:
+        return f.read()
+
+def render_query(n, params=None, stream=0, queries_dir=QUERIES_DIR):
+    """
+    Retorna a lista de comandos SQL da query n.
+    params: valores de ':1', ':2', ... (padrão: VALIDATION_PARAMS).
+    stream: número do stream usado no nome da view da Q15 (revenue:s).
+    """
+    if params is None:
+        params = VALIDATION_PARAMS.get(n, [])
+    lines = []
+    limit = -1
+    for line in read_template(n, queries_dir).splitlines():
+        s = line.strip()
+        if s.startswith("--") or s in (":x", ":o"):
+            continue
+        m = _LIMIT_RE.fullmatch(s)
+        if m:
+            limit = int(m.group(1))
+            continue
+        lines.append(line)
+
+    sql = _STREAM_RE.sub(str(stream), "\n".join(lines))
+    sql = _PARAM_RE.sub(lambda m: str(params[int(m.group(1)) - 1]), sql)
+    statements = [s.strip() for s in sql.split(";") if s.strip()]
+
+    if limit > 0:
+        # o LIMIT vale para o último SELECT (na Q15 os demais comandos são DDL)
+        for i in range(len(statements) - 1, -1, -1):
+            if statements[i].lower().startswith("select"):
+                statements[i] += f"\nlimit {limit}"
+                break
+    return statements
@@ -1,50 +1,179 @@
-import json, os
+import argparse, glob, json, os, shutil, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import tpch_columnar
+import tpch_schema
+
+# ordem de carga das tabelas; colunas e tipos vêm de dss.ddl (tpch_schema)
+TABLE_ORDER = ["region", "nation", "supplier", "part", "partsupp", "customer", "orders", "lineitem"]
 
 # mapeamentos de campos por tabela
-SCHEMAS = {
-    "region":    ["r_regionkey","r_name","r_comment"],
-    "nation":    ["n_nationkey","n_name","n_regionkey","n_comment"],
-    "supplier":  ["s_suppkey","s_name","s_address","s_nationkey","s_phone","s_acctbal","s_comment"],
-    "part":      ["p_partkey","p_name","p_mfgr","p_brand","p_type","p_size","p_container","p_retailprice","p_comment"],
-    "partsupp":  ["ps_partkey","ps_suppkey","ps_availqty","ps_supplycost","ps_comment"],
-    "customer":  ["c_custkey","c_name","c_address","c_nationkey","c_phone","c_acctbal","c_mktsegment","c_comment"],
-    "orders":    ["o_orderkey","o_custkey","o_orderstatus","o_totalprice","o_orderdate","o_orderpriority","o_clerk","o_shippriority","o_comment"],
-    "lineitem":  ["l_orderkey","l_partkey","l_suppkey","l_linenumber","l_quantity","l_extendedprice","l_discount","l_tax","l_returnflag","l_linestatus","l_shipdate","l_commitdate","l_receiptdate","l_shipinstruct","l_shipmode","l_comment"],
-}
-
-def to_int(x):   return int(x) if x != "" else None
-def to_float(x): return float(x) if x != "" else None
-def to_date(x):
-    if not x: return None
-    return x
-
-def cast(field, val):
-    if val == "": return None
-    if field.endswith("key") or field in ("l_linenumber","ps_availqty","p_size","o_shippriority"):
-        return to_int(val)
-    if field.endswith("acctbal") or field.endswith("price") or field.endswith("discount") or field.endswith("tax") or field.endswith("supplycost") or field == "o_totalprice" or field == "l_quantity":
-        return to_float(val)
-    if field.endswith("date"):
-        return to_date(val)
-    return val
+SCHEMAS = { t: tpch_schema.columns(t) for t in TABLE_ORDER }
+
+# tamanho padrão de cada fatia de .tbl processada por um worker
+DEFAULT_CHUNK_MB = 32
 
 def convert(tbl_name, in_path, out_path):
-    cols = SCHEMAS[tbl_name]
-    with open(in_path, "r", encoding="utf-8", errors="ignore") as fin, open(out_path, "w", encoding="utf-8") as fout:
-        for line in fin:
-            # remove o último '|', split pelo '|'
-            parts = line.rstrip("\n").rstrip("|").split("|")
-            if len(parts) != len(cols):
-                continue
-            doc = { col: cast(col, val) for col, val in zip(cols, parts) }
+    rows = 0
+    with open(out_path, "w", encoding="utf-8") as fout:
+        for doc in tpch_schema.iter_tbl(in_path, tbl_name):
             fout.write(json.dumps(doc) + "\n")
+            rows += 1
+    return rows
+
+def split_ranges(in_path, chunk_bytes):
+    """Divide o arquivo em intervalos de bytes [início, fim) alinhados a quebras de linha"""
+    size = os.path.getsize(in_path)
+    bounds = [0]
+    with open(in_path, "rb") as f:
+        pos = chunk_bytes
+        while pos < size:
+            f.seek(pos)
+            f.readline()  # avança até o fim da linha corrente
+            end = f.tell()
+            if end >= size:
+                break
+            if end > bounds[-1]:
+                bounds.append(end)
+            pos = end + chunk_bytes
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def shard_path(out_path, index):
+    """jsons/lineitem.jsonl -> jsons/lineitem.part-0003.jsonl"""
+    base, ext = os.path.splitext(out_path)
+    return f"{base}.part-{index:04d}{ext}"
+
+def shard_files(out_path):
+    """Lista, em ordem, os shards numerados de uma tabela"""
+    base, ext = os.path.splitext(out_path)
+    return sorted(glob.glob(f"{glob.escape(base)}.part-[0-9][0-9][0-9][0-9]{ext}"))
+
+def convert_range(tbl_name, in_path, out_path, start, end):
+    """Converte o intervalo de bytes [start, end) do .tbl em um arquivo JSONL"""
+    decode = tpch_schema.compile_decoder(tbl_name)
+    ncols = len(SCHEMAS[tbl_name])
+    rows = 0
+    with open(in_path, "rb") as fin:
+        fin.seek(start)
+        data = fin.read(end - start).decode("utf-8", errors="ignore")
+    with open(out_path, "w", encoding="utf-8") as fout:
+        for line in data.split("\n"):
+            parts = tpch_schema.split_line(line)
+            if len(parts) != ncols:
+                continue
+            fout.write(json.dumps(decode(parts)) + "\n")
+            rows += 1
+    return rows
+
+def concat_shards(paths, out_path):
+    """Concatena os shards em ordem no arquivo final e remove os shards"""
+    with open(out_path, "wb") as fout:
+        for p in paths:
+            with open(p, "rb") as fin:
+                shutil.copyfileobj(fin, fout, 1024 * 1024)
+    for p in paths:
+        os.remove(p)
+
+def clear_outputs(out_path):
+    """Remove saídas anteriores (arquivo único e shards) de uma tabela"""
+    for p in shard_files(out_path):
+        os.remove(p)
+    if os.path.exists(out_path):
+        os.remove(out_path)
+
+def report(tbl_name, rows, elapsed):
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"  {tbl_name}: {rows} linhas em {elapsed:.2f}s ({rate:,.0f} linhas/s)")
+
+def convert_parallel(jobs, workers, chunk_bytes, keep_shards=False):
+    """
+    Converte várias tabelas ao mesmo tempo em um pool de processos.
+    jobs: lista de (tabela, .tbl de entrada, .jsonl de saída).
+    Cada .tbl é dividido em fatias alinhadas a linhas; cada fatia vira um shard.
+    Com keep_shards os shards numerados são mantidos (load_mongodb.py os lê em ordem);
+    caso contrário são concatenados, em ordem, no .jsonl final.
+    """
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for tbl_name, in_path, out_path in jobs:
+            clear_outputs(out_path)
+            ranges = split_ranges(in_path, chunk_bytes)
+            shards = [shard_path(out_path, i) for i in range(len(ranges))]
+            state = {"out": out_path, "shards": shards, "left": len(ranges),
+                     "rows": 0, "start": time.perf_counter()}
+            for (start, end), shard in zip(ranges, shards):
+                fut = pool.submit(convert_range, tbl_name, in_path, shard, start, end)
+                pending[fut] = (tbl_name, state)
+
+        for fut in as_completed(pending):
+            tbl_name, state = pending[fut]
+            state["rows"] += fut.result()
+            state["left"] -= 1
+            if state["left"] == 0:
+                if not keep_shards:
+                    concat_shards(state["shards"], state["out"])
+                elapsed = time.perf_counter() - state["start"]
+                totals[tbl_name] = state["rows"]
+                report(tbl_name, state["rows"], elapsed)
+    return totals
+
+def convert_columnar(jobs, workers, out_dir):
+    """Grava cada tabela no formato colunar (ver tpch_columnar); uma tabela por worker"""
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+        pending = {}
+        for tbl_name, in_path, _ in jobs:
+            fut = pool.submit(tpch_columnar.write_table, tbl_name, SCHEMAS[tbl_name], in_path, out_dir)
+            pending[fut] = (tbl_name, time.perf_counter())
+        for fut in as_completed(pending):
+            tbl_name, start = pending[fut]
+            report(tbl_name, fut.result(), time.perf_counter() - start)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Converte os .tbl do TPC-H em JSONL")
+    parser.add_argument("--tables", nargs="+", choices=list(SCHEMAS.keys()),
+                        default=list(SCHEMAS.keys()), help="tabelas a converter")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos de conversão (1 = modo sequencial original)")
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB,
+                        help="tamanho de cada fatia do .tbl no modo paralelo")
+    parser.add_argument("--shards", action="store_true",
+                        help="mantém os shards numerados em vez de concatená-los (usa o modo paralelo "
+                             "mesmo com --workers 1)")
+    parser.add_argument("--format", choices=["jsonl", "columnar"], default="jsonl",
+                        help="jsonl (padrão) ou arrays binários por coluna + manifest")
+    parser.add_argument("--tbl-dir", default=os.path.join(os.getcwd(), "tpch-dbgen"))
+    parser.add_argument("--out-dir", default=None,
+                        help="padrão: ./jsons (jsonl) ou ./columnar (columnar)")
+    args = parser.parse_args()
+    if args.shards and args.format == "columnar":
+        parser.error("--shards só se aplica ao formato jsonl")
+    return args
 
 if __name__ == "__main__":
-    base = os.getcwd()
-    tables = list(SCHEMAS.keys())
-    for t in tables:
-        in_file  = os.path.join(base, "tpch-dbgen", f"{t}.tbl")
-        out_file = os.path.join(base, "jsons", f"{t}.jsonl")
+    args = parse_args()
+    if args.out_dir is None:
+        args.out_dir = os.path.join(os.getcwd(), "jsons" if args.format == "jsonl" else "columnar")
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    jobs = []
+    for t in args.tables:
+        in_file  = os.path.join(args.tbl_dir, f"{t}.tbl")
+        if args.format == "columnar":
+            out_file = os.path.join(args.out_dir, t)
+        else:
+            out_file = os.path.join(args.out_dir, f"{t}.jsonl")
         if os.path.exists(in_file):
             print(f"{in_file} -> {out_file}")
-            convert(t, in_file, out_file)
+            jobs.append((t, in_file, out_file))
+
+    if args.format == "columnar":
+        convert_columnar(jobs, args.workers, args.out_dir)
+    elif args.workers <= 1 and not args.shards:
+        for t, in_file, out_file in jobs:
+            clear_outputs(out_file)
+            start = time.perf_counter()
+            rows = convert(t, in_file, out_file)
+            report(t, rows, time.perf_counter() - start)
+    else:
+        convert_parallel(jobs, max(args.workers, 1), args.chunk_mb * 1024 * 1024, args.shards)
@@ -0,0 +1,224 @@
+"""
+Verificação cruzada dos resultados das queries entre os bancos.
+
+Cada resposta é normalizada para as mesmas colunas (as do SELECT da query SQL,
+na mesma ordem): tuplas do MySQL são lidas por posição, documentos do MongoDB
+e dicts do Redis por nome. Datas viram 'AAAA-MM-DD', Decimal e textos numéricos
+viram números e os números são comparados com tolerância (math.isclose).
+Por padrão as linhas são ordenadas antes da comparação, porque empates no
+ORDER BY podem sair em ordens diferentes em cada banco; --ordered compara na
+ordem devolvida.
+
+Uso avulso (uma execução por banco, relatório das primeiras diferenças):
+    python proj1/verify.py --engines mysql mongodb redis --queries all
+O benchmark.py --verify usa o Verifier depois de cada execução medida.
+"""
+import argparse
+import datetime
+import math
+import os
+import re
+from decimal import Decimal
+
+import backends
+import tpch_params
+from mongodb_queries import MONGODB_QUERIES
+
+# colunas do resultado de cada query, na ordem do SELECT de tpch-dbgen/queries
+QUERY_COLUMNS = {
+    1: ['l_returnflag', 'l_linestatus', 'sum_qty', 'sum_base_price', 'sum_disc_price', 'sum_charge',
+        'avg_qty', 'avg_price', 'avg_disc', 'count_order'],
+    2: ['s_acctbal', 's_name', 'n_name', 'p_partkey', 'p_mfgr', 's_address', 's_phone', 's_comment'],
+    3: ['l_orderkey', 'revenue', 'o_orderdate', 'o_shippriority'],
+    4: ['o_orderpriority', 'order_count'],
+    5: ['n_name', 'revenue'],
+    6: ['revenue'],
+    7: ['supp_nation', 'cust_nation', 'l_year', 'revenue'],
+    8: ['o_year', 'mkt_share'],
+    9: ['nation', 'o_year', 'sum_profit'],
+    10: ['c_custkey', 'c_name', 'revenue', 'c_acctbal', 'n_name', 'c_address', 'c_phone', 'c_comment'],
+    11: ['ps_partkey', 'value'],
+    12: ['l_shipmode', 'high_line_count', 'low_line_count'],
+    13: ['c_count', 'custdist'],
+    14: ['promo_revenue'],
+    15: ['s_suppkey', 's_name', 's_address', 's_phone', 'total_revenue'],
+    16: ['p_brand', 'p_type', 'p_size', 'supplier_cnt'],
+    17: ['avg_yearly'],
+    # no SQL a última coluna é sum(l_quantity)
+    18: ['c_name', 'c_custkey', 'o_orderkey', 'o_orderdate', 'o_totalprice', 'sum_quantity'],
+    19: ['revenue'],
+    20: ['s_name', 's_address'],
+    21: ['s_name', 'numwait'],
+    22: ['cntrycode', 'numcust', 'totacctbal'],
+}
+
+REL_TOL = 1e-6
+ABS_TOL = 1e-6
+
+_NUMBER_RE = re.compile(r"-?\d+(\.\d+)?")
+
+def normalize_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()[:10]
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode()
+    if isinstance(value, str):
+        value = value.strip()
+        if _NUMBER_RE.fullmatch(value):
+            return float(value)
+    return value
+
+def normalize_rows(query, rows):
+    """
+    Linhas como tuplas nas colunas de QUERY_COLUMNS. Sem linhas que casem, o
+    MySQL devolve uma linha só com NULL nas agregações escalares (Q6, Q14,
+    Q17, Q19) e MongoDB/Redis devolvem nada; os dois viram resposta vazia.
+    """
+    columns = QUERY_COLUMNS[int(query[1:])]
+    normalized = []
+    for row in rows:
+        if isinstance(row, dict):
+            values = [row.get(c) for c in columns]
+        else:
+            values = list(row)
+        normalized.append(tuple(normalize_value(v) for v in values))
+    if len(normalized) == 1 and all(v is None for v in normalized[0]):
+        return []
+    return normalized
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def values_equal(a, b, rel_tol=REL_TOL, abs_tol=ABS_TOL):
+    if _is_number(a) and _is_number(b):
+        return math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol)
+    return a == b
+
+def _sort_key(row):
+    # números arredondados para que diferenças de ponto flutuante não mudem a ordem
+    return tuple((0, round(v, 2), '') if _is_number(v) else (1, 0, '' if v is None else str(v)) for v in row)
+
+def compare(query, expected, actual, rel_tol=REL_TOL, abs_tol=ABS_TOL, ordered=False, max_diffs=5):
+    """
+    Compara duas respostas já normalizadas. Retorna {'ok', 'expected_rows',
+    'actual_rows', 'diffs'}; diffs traz as primeiras linhas diferentes com
+    o índice, as duas versões e as colunas que divergem.
+    """
+    columns = QUERY_COLUMNS[int(query[1:])]
+    if not ordered:
+        expected = sorted(expected, key=_sort_key)
+        actual = sorted(actual, key=_sort_key)
+
+    diffs = []
+    for i in range(max(len(expected), len(actual))):
+        exp = expected[i] if i < len(expected) else None
+        act = actual[i] if i < len(actual) else None
+        if exp is None or act is None:
+            differing = list(columns)
+        else:
+            differing = [c for c, a, b in zip(columns, exp, act) if not values_equal(a, b, rel_tol, abs_tol)]
+        if differing:
+            diffs.append({'row': i, 'expected': exp, 'actual': act, 'columns': differing})
+            if len(diffs) >= max_diffs:
+                break
+    return {
+        'ok': not diffs and len(expected) == len(actual),
+        'expected_rows': len(expected),
+        'actual_rows': len(actual),
+        'diffs': diffs,
+    }
+
+def format_comparison(comparison):
+    """Texto curto com o número de linhas e as primeiras diferenças"""
+    if comparison['ok']:
+        return f"ok ({comparison['actual_rows']} linhas)"
+    lines = [f"DIVERGENTE: {comparison['actual_rows']} linhas, esperado {comparison['expected_rows']}"]
+    for d in comparison['diffs']:
+        lines.append(f"  linha {d['row']} ({', '.join(d['columns'])}):")
+        lines.append(f"    esperado {d['expected']}")
+        lines.append(f"    obtido   {d['actual']}")
+    return "\n".join(lines)
+
+class Verifier:
+    """
+    Confere cada execução contra a resposta do banco de referência para a mesma
+    query e o mesmo conjunto de parâmetros. A primeira execução do banco de
+    referência define a resposta esperada.
+    """
+    def __init__(self, reference, rel_tol=REL_TOL, abs_tol=ABS_TOL, ordered=False):
+        self.reference = reference
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.ordered = ordered
+        self.expected = {}
+
+    def check(self, engine, query, set_index, rows):
+        """None quando não há o que comparar (referência ou sem resposta esperada), senão o compare"""
+        normalized = normalize_rows(query, rows)
+        key = (query, set_index)
+        if engine == self.reference:
+            self.expected.setdefault(key, normalized)
+            return None
+        if key not in self.expected:
+            return None
+        return compare(query, self.expected[key], normalized, self.rel_tol, self.abs_tol, self.ordered)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara as respostas das queries TPC-H entre os bancos")
+    parser.add_argument('--engines', nargs='+', choices=list(backends.BACKENDS), default=list(backends.BACKENDS),
+                        help="bancos a comparar; o primeiro é a referência")
+    parser.add_argument('--queries', nargs='+', default=['all'], help="queries (ex.: Q1 Q5) ou 'all'")
+    parser.add_argument('--param-sets', type=int, default=0,
+                        help="também compara N conjuntos de parâmetros sorteados (tpch_params.py)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--scale-factor', type=float, default=1)
+    parser.add_argument('--rel-tol', type=float, default=REL_TOL, help="tolerância relativa dos números")
+    parser.add_argument('--abs-tol', type=float, default=ABS_TOL, help="tolerância absoluta dos números")
+    parser.add_argument('--ordered', action='store_true', help="compara as linhas na ordem devolvida")
+    args = parser.parse_args()
+    queries = list(MONGODB_QUERIES) if args.queries == ['all'] else args.queries
+    for q in queries:
+        if q not in MONGODB_QUERIES:
+            parser.error(f"query desconhecida: {q} (use Q1-Q22)")
+
+    queries_dir = os.path.join(os.getcwd(), 'tpch-dbgen', 'queries')
+    connected = []
+    for engine in args.engines:
+        backend = backends.create(engine, queries_dir=queries_dir)
+        backend.connect()
+        connected.append(backend)
+    reference = connected[0]
+
+    divergent = 0
+    for query in queries:
+        n = int(query[1:])
+        param_sets = [tpch_params.VALIDATION[n]]
+        if args.param_sets > 0:
+            param_sets += tpch_params.param_sets(n, args.param_sets, args.seed, args.scale_factor)
+        for params in param_sets:
+            try:
+                expected = normalize_rows(query, reference.run(query, params))
+            except Exception as e:
+                print(f"{query} {params}: {reference.label} falhou ({e}); sem referência")
+                continue
+            for backend in connected[1:]:
+                try:
+                    actual = normalize_rows(query, backend.run(query, params))
+                except Exception as e:
+                    print(f"{query} {backend.label}: FALHOU ({e})")
+                    divergent += 1
+                    continue
+                comparison = compare(query, expected, actual, args.rel_tol, args.abs_tol, args.ordered)
+                if not comparison['ok']:
+                    divergent += 1
+                print(f"{query} {backend.label} x {reference.label} {params}: {format_comparison(comparison)}")
+
+    for backend in connected:
+        backend.close()
+    print()
+    print("Todas as respostas conferem." if divergent == 0 else f"{divergent} comparações divergentes.")
+
+if __name__ == "__main__":
+    main()
@@ -1,196 +1,269 @@
-import redis
-import datetime
+"""
+Carrega as tabelas do TPC-H no Redis: um hash por linha e os índices em
+SETs e ZSETs.
+
+Os comandos vão em pipelines sem MULTI/EXEC, enviados a cada
+--pipeline-depth comandos (1 = um round trip por comando). Os membros dos
+ZSETs (orders:by_date, lineitem:by_shipdate...) são agrupados por chave num
+ZADD com vários membros, e os incrementos de orders:sum_qty são somados por
+pedido antes do ZINCRBY. Com --workers > 1 as tabelas grandes são divididas
+em trechos do .tbl, cada um carregado por um processo com a sua conexão.
+
+Uso:
+    python load_tpch_redis.py --query-indexes --pipeline-depth 1000 --workers 4
+"""
+import argparse
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "proj1"))
+import tpch_schema
 
 TPCH_PATH = "../tpch-dbgen"
 
 # Conexao com Redis
 r = redis.Redis(host='localhost', port=6379, decode_responses=True)
 
-def parse_date(d):
-    y, m, da = map(int, d.split('-'))
-    return datetime.date(y, m, da).toordinal()
-
-def read_tbl(path):
-    """Lê arquivo .tbl e já remove o último campo vazio causado pelo '|' final."""
-    with open(path, "r") as f:
-        for line in f:
-            parts = line.strip().split("|")
-            if parts[-1] == "":
-                parts = parts[:-1]
-            yield parts
-
-def load_region():
-    print("Carregando region...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "region.tbl")):
-        r_regionkey, r_name, r_comment = parts
-        key = f"region:{r_regionkey}"
-
-        r.hset(key, mapping={
-            "r_regionkey": int(r_regionkey),
-            "r_name": r_name,
-            "r_comment": r_comment
-        })
-
-def load_nation():
-    print("Carregando nation...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "nation.tbl")):
-        n_nationkey, n_name, n_regionkey, n_comment = parts
-        key = f"nation:{n_nationkey}"
-
-        r.hset(key, mapping={
-            "n_nationkey": int(n_nationkey),
-            "n_name": n_name,
-            "n_regionkey": int(n_regionkey),
-            "n_comment": n_comment
-        })
-
-def load_supplier():
-    print("Carregando supplier...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "supplier.tbl")):
-        (s_suppkey, s_name, s_address, s_nationkey,
-         s_phone, s_acctbal, s_comment) = parts
-
-        key = f"supplier:{s_suppkey}"
-
-        r.hset(key, mapping={
-            "s_suppkey": int(s_suppkey),
-            "s_name": s_name,
-            "s_address": s_address,
-            "s_nationkey": int(s_nationkey),
-            "s_phone": s_phone,
-            "s_acctbal": float(s_acctbal),
-            "s_comment": s_comment
-        })
-
-def load_part():
-    print("Carregando part...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "part.tbl")):
-        (p_partkey, p_name, p_mfgr, p_brand, p_type,
-         p_size, p_container, p_retailprice, p_comment) = parts
-
-        key = f"part:{p_partkey}"
-
-        r.hset(key, mapping={
-            "p_partkey": int(p_partkey),
-            "p_name": p_name,
-            "p_mfgr": p_mfgr,
-            "p_brand": p_brand,
-            "p_type": p_type,
-            "p_size": int(p_size),
-            "p_container": p_container,
-            "p_retailprice": float(p_retailprice),
-            "p_comment": p_comment
-        })
-
-        # Índices úteis
-        r.sadd(f"part:size:{p_size}", p_partkey)
-
-        # Para BRASS
-        if p_type.endswith("BRASS"):
-            r.sadd("part:type:BRASS", p_partkey)
-
-def load_partsupp():
-    print("Carregando partsupp...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "partsupp.tbl")):
-        (ps_partkey, ps_suppkey, ps_availqty,
-         ps_supplycost, ps_comment) = parts
-
-        key = f"partsupp:{ps_partkey}:{ps_suppkey}"
-
-        r.hset(key, mapping={
-            "ps_partkey": int(ps_partkey),
-            "ps_suppkey": int(ps_suppkey),
-            "ps_availqty": int(ps_availqty),
-            "ps_supplycost": float(ps_supplycost),
-            "ps_comment": ps_comment
-        })
-
-        # Índice por partkey
-        r.sadd(f"partsupp:by_part:{ps_partkey}", f"{ps_partkey}:{ps_suppkey}")
-
-def load_customer():
-    print("Carregando customer...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "customer.tbl")):
-        (c_custkey, c_name, c_address, c_nationkey,
-         c_phone, c_acctbal, c_mktsegment, c_comment) = parts
-
-        key = f"customer:{c_custkey}"
-
-        r.hset(key, mapping={
-            "c_custkey": int(c_custkey),
-            "c_name": c_name,
-            "c_address": c_address,
-            "c_nationkey": int(c_nationkey),
-            "c_phone": c_phone,
-            "c_acctbal": float(c_acctbal),
-            "c_mktsegment": c_mktsegment,
-            "c_comment": c_comment
-        })
-
-        # Índice por segmento
-        r.sadd(f"customer:segment:{c_mktsegment}", c_custkey)
-
-def load_orders():
-    print("Carregando orders...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "orders.tbl")):
-        (o_orderkey, o_custkey, o_orderstatus, o_totalprice,
-         o_orderdate, o_orderpriority, o_clerk,
-         o_shippriority, o_comment) = parts
-
-        key = f"orders:{o_orderkey}"
-
-        r.hset(key, mapping={
-            "o_orderkey": int(o_orderkey),
-            "o_custkey": int(o_custkey),
-            "o_orderstatus": o_orderstatus,
-            "o_totalprice": float(o_totalprice),
-            "o_orderdate": o_orderdate,
-            "o_orderpriority": o_orderpriority,
-            "o_clerk": o_clerk,
-            "o_shippriority": int(o_shippriority),
-            "o_comment": o_comment
-        })
-
-        # Índice por cliente -> usada na Q3
-        r.sadd(f"orders:by_customer:{o_custkey}", o_orderkey)
-
-        # Índice por data
-        score = parse_date(o_orderdate)
-        r.zadd("orders:by_date", {o_orderkey: score})
-
-def load_lineitem():
-    print("Carregando lineitem...")
-    for parts in read_tbl(os.path.join(TPCH_PATH, "lineitem.tbl")):
-        (l_orderkey, l_partkey, l_suppkey, l_linenumber,
-         l_quantity, l_extendedprice, l_discount, l_tax,
-         l_returnflag, l_linestatus, l_shipdate, l_commitdate,
-         l_receiptdate, l_shipinstruct, l_shipmode, l_comment) = parts
-
-        key = f"lineitem:{l_orderkey}:{l_linenumber}"
-
-        r.hset(key, mapping={
-            "l_orderkey": int(l_orderkey),
-            "l_linenumber": int(l_linenumber),
-            "l_quantity": float(l_quantity),
-            "l_extendedprice": float(l_extendedprice),
-            "l_discount": float(l_discount),
-            "l_tax": float(l_tax),
-            "l_returnflag": l_returnflag,
-            "l_linestatus": l_linestatus,
-            "l_shipdate": l_shipdate
-        })
-
-        score = parse_date(l_shipdate)
-        r.zadd("lineitem:by_shipdate", {key: score})
-
-load_region()
-load_nation()
-load_supplier()
-load_part()
-load_partsupp()
-load_customer()
-load_orders()
-load_lineitem()
-
-print("=== TODOS OS DADOS FORAM CARREGADOS COM SUCESSO ===")
+# ordinais memoizados ('YYYY-MM-DD' -> int), compartilhados com proj1
+parse_date = tpch_schema.date_ordinal
+
+# comandos (ou membros de ZSET) acumulados antes de cada envio do pipeline
+PIPELINE_DEPTH = 1000
+
+# tabelas divididas entre os processos quando --workers > 1
+PARALLEL_TABLES = ["part", "partsupp", "customer", "orders", "lineitem"]
+
+TABLE_ORDER = ["region", "nation", "supplier", "part", "partsupp", "customer", "orders", "lineitem"]
+
+class PipelineWriter:
+    """
+    Acumula hset/sadd num pipeline não transacional e envia a cada depth
+    comandos. zadd e zincrby só guardam o membro; no envio saem um ZADD por
+    chave com todos os membros e um ZINCRBY por membro com a soma.
+    """
+
+    def __init__(self, client, depth=PIPELINE_DEPTH):
+        self.pipe = client.pipeline(transaction=False)
+        self.depth = max(depth, 1)
+        self.queued = 0
+        self.zsets = {}
+        self.increments = {}
+
+    def _added(self):
+        self.queued += 1
+        if self.queued >= self.depth:
+            self.flush()
+
+    def hset(self, key, mapping):
+        self.pipe.hset(key, mapping=mapping)
+        self._added()
+
+    def sadd(self, key, member):
+        self.pipe.sadd(key, member)
+        self._added()
+
+    def zadd(self, key, member, score):
+        self.zsets.setdefault(key, {})[member] = score
+        self._added()
+
+    def zincrby(self, key, amount, member):
+        increments = self.increments.setdefault(key, {})
+        increments[member] = increments.get(member, 0) + amount
+        self._added()
+
+    def flush(self):
+        for key, members in self.zsets.items():
+            self.pipe.zadd(key, members)
+        for key, increments in self.increments.items():
+            for member, amount in increments.items():
+                self.pipe.zincrby(key, amount, member)
+        self.zsets = {}
+        self.increments = {}
+        self.queued = 0
+        self.pipe.execute()
+
+def add_region(w, row, query_indexes):
+    w.hset(f"region:{row['r_regionkey']}", row)
+
+def add_nation(w, row, query_indexes):
+    w.hset(f"nation:{row['n_nationkey']}", row)
+
+def add_supplier(w, row, query_indexes):
+    w.hset(f"supplier:{row['s_suppkey']}", row)
+
+    if query_indexes:
+        w.sadd(f"supplier:by_nation:{row['s_nationkey']}", row["s_suppkey"])
+
+def add_part(w, row, query_indexes):
+    p_partkey = row["p_partkey"]
+    w.hset(f"part:{p_partkey}", row)
+
+    # Índices úteis
+    w.sadd(f"part:size:{row['p_size']}", p_partkey)
+
+    # Sufixo do tipo (Q2: p_type LIKE '%BRASS', '%STEEL', ...)
+    w.sadd(f"part:type:{row['p_type'].split()[-1]}", p_partkey)
+
+    if query_indexes:
+        w.sadd(f"part:by_type:{row['p_type']}", p_partkey)
+        w.sadd(f"part:brand_container:{row['p_brand']}:{row['p_container']}", p_partkey)
+        # palavras do nome (cores) -> Q9 e Q20
+        for word in set(row["p_name"].split()):
+            w.sadd(f"part:name_word:{word}", p_partkey)
+
+def add_partsupp(w, row, query_indexes):
+    ps_partkey = row["ps_partkey"]
+    ps_suppkey = row["ps_suppkey"]
+    w.hset(f"partsupp:{ps_partkey}:{ps_suppkey}", row)
+
+    # Índice por partkey
+    w.sadd(f"partsupp:by_part:{ps_partkey}", f"{ps_partkey}:{ps_suppkey}")
+
+    if query_indexes:
+        w.sadd(f"partsupp:by_supp:{ps_suppkey}", f"{ps_partkey}:{ps_suppkey}")
+
+def add_customer(w, row, query_indexes):
+    c_custkey = row["c_custkey"]
+    w.hset(f"customer:{c_custkey}", row)
+
+    # Índice por segmento
+    w.sadd(f"customer:segment:{row['c_mktsegment']}", c_custkey)
+
+    if query_indexes:
+        w.sadd(f"customer:by_nation:{row['c_nationkey']}", c_custkey)
+        w.sadd(f"customer:by_phone_cc:{row['c_phone'][:2]}", c_custkey)
+
+def add_orders(w, row, query_indexes):
+    o_orderkey = row["o_orderkey"]
+    w.hset(f"orders:{o_orderkey}", row)
+
+    # Índice por cliente -> usada na Q3
+    w.sadd(f"orders:by_customer:{row['o_custkey']}", o_orderkey)
+
+    # Índice por data
+    w.zadd("orders:by_date", o_orderkey, parse_date(row["o_orderdate"]))
+
+    if query_indexes:
+        w.sadd(f"orders:status:{row['o_orderstatus']}", o_orderkey)
+
+# colunas de lineitem mantidas no Redis
+LINEITEM_COLUMNS = [
+    "l_orderkey", "l_linenumber", "l_quantity", "l_extendedprice",
+    "l_discount", "l_tax", "l_returnflag", "l_linestatus", "l_shipdate",
+]
+
+def add_lineitem(w, row, query_indexes):
+    """
+    query_indexes: mantém todas as colunas de lineitem (as Q4-Q22 usam
+    l_partkey, l_suppkey, datas de commit/recebimento, shipmode...) e cria
+    os índices por pedido, por peça, por data de recebimento e a soma de
+    l_quantity por pedido (Q18).
+    """
+    key = f"lineitem:{row['l_orderkey']}:{row['l_linenumber']}"
+    w.hset(key, row)
+
+    w.zadd("lineitem:by_shipdate", key, parse_date(row["l_shipdate"]))
+
+    if query_indexes:
+        w.sadd(f"lineitem:by_order:{row['l_orderkey']}", key)
+        w.sadd(f"lineitem:by_part:{row['l_partkey']}", key)
+        w.zadd("lineitem:by_receiptdate", key, parse_date(row["l_receiptdate"]))
+        w.zincrby("orders:sum_qty", row["l_quantity"], row["l_orderkey"])
+
+ROW_LOADERS = {
+    "region": add_region,
+    "nation": add_nation,
+    "supplier": add_supplier,
+    "part": add_part,
+    "partsupp": add_partsupp,
+    "customer": add_customer,
+    "orders": add_orders,
+    "lineitem": add_lineitem,
+}
+
+def table_columns(table, query_indexes):
+    return LINEITEM_COLUMNS if table == "lineitem" and not query_indexes else None
+
+def load_rows(client, table, path, query_indexes=False, depth=PIPELINE_DEPTH, span=None):
+    """Carrega o .tbl (ou o trecho span dele) com um PipelineWriter; retorna o número de linhas"""
+    add = ROW_LOADERS[table]
+    writer = PipelineWriter(client, depth)
+    rows = 0
+    for row in tpch_schema.iter_tbl(path, table, table_columns(table, query_indexes), nulls=False, span=span):
+        add(writer, row, query_indexes)
+        rows += 1
+    writer.flush()
+    return rows
+
+def _load_span(connection, table, path, span, query_indexes, depth):
+    """Executado em cada processo: conexão própria e um trecho do .tbl"""
+    client = redis.Redis(decode_responses=True, **connection)
+    try:
+        return load_rows(client, table, path, query_indexes, depth, span)
+    finally:
+        client.close()
+
+def load_table(table, query_indexes=False, depth=PIPELINE_DEPTH, workers=1):
+    """Carrega uma tabela; retorna (linhas, segundos)"""
+    print(f"Carregando {table}...")
+    path = os.path.join(TPCH_PATH, f"{table}.tbl")
+    start = time.perf_counter()
+    if table == "lineitem" and query_indexes:
+        # ZINCRBY soma no que já existe: sem isso recarregar sem FLUSHDB dobraria
+        # orders:sum_qty (os demais comandos sobrescrevem)
+        r.delete("orders:sum_qty")
+    if workers > 1 and table in PARALLEL_TABLES:
+        kwargs = r.connection_pool.connection_kwargs
+        connection = {k: kwargs[k] for k in ("host", "port", "db", "password") if k in kwargs}
+        spans = tpch_schema.tbl_spans(path, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_load_span, connection, table, path, span, query_indexes, depth)
+                       for span in spans]
+            rows = sum(f.result() for f in futures)
+    else:
+        rows = load_rows(r, table, path, query_indexes, depth)
+    elapsed = time.perf_counter() - start
+    print(f"  {rows} linhas em {elapsed:.2f}s ({rows / elapsed if elapsed > 0 else 0:,.0f} linhas/s)")
+    return rows, elapsed
+
+def load_all(query_indexes=False, depth=PIPELINE_DEPTH, workers=1):
+    """Carrega todas as tabelas; retorna {tabela: (linhas, segundos)}"""
+    return {table: load_table(table, query_indexes, depth, workers) for table in TABLE_ORDER}
+
+def report(stats):
+    print("Throughput por tabela:")
+    for table, (rows, seconds) in stats.items():
+        print(f"  {table}: {rows} linhas em {seconds:.2f}s ({rows / seconds if seconds > 0 else 0:,.0f} linhas/s)")
+    rows = sum(n for n, _ in stats.values())
+    seconds = sum(s for _, s in stats.values())
+    print(f"  total: {rows} linhas em {seconds:.2f}s ({rows / seconds if seconds > 0 else 0:,.0f} linhas/s)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carrega as tabelas do TPC-H no Redis")
+    parser.add_argument("--query-indexes", action="store_true",
+                        help="guarda lineitem completo e cria os índices usados pelas Q4-Q22")
+    parser.add_argument("--tbl-dir", default=TPCH_PATH, help="diretório dos .tbl")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--pipeline-depth", type=int, default=PIPELINE_DEPTH,
+                        help="comandos por envio do pipeline (1 = um round trip por comando)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"processos para as tabelas grandes ({', '.join(PARALLEL_TABLES)})")
+    return parser.parse_args()
+
+def main():
+    global TPCH_PATH, r
+    args = parse_args()
+    TPCH_PATH = args.tbl_dir
+    r = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    stats = load_all(args.query_indexes, args.pipeline_depth, args.workers)
+
+    print("=== TODOS OS DADOS FORAM CARREGADOS COM SUCESSO ===")
+    report(stats)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,94 @@
+import argparse
+import collections
 import redis
 import datetime
+import os
+import re
+import statistics
+import sys
 import time
 
-r = redis.Redis(host="localhost", port=6379, decode_responses=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "proj1"))
+import tpch_params
+
+class CountingRedis(redis.Redis):
+    """
+    Cliente Redis que conta round trips: cada comando avulso conta um e
+    cada pipeline executado conta um, independente do número de comandos.
+    Também conta os comandos por tipo (inclusive os de dentro dos pipelines)
+    e soma o tempo gasto dentro do cliente (rede, servidor e protocolo);
+    o resto do tempo de uma query é Python (junções, filtros, agregação).
+    """
+    round_trips = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = collections.Counter()
+        self.redis_ns = 0
+
+    def execute_command(self, *args, **options):
+        self.round_trips += 1
+        self.commands[str(args[0]).upper()] += 1
+        start = time.perf_counter_ns()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            self.redis_ns += time.perf_counter_ns() - start
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def counted_execute(raise_on_error=True):
+            if pipe.command_stack:
+                self.round_trips += 1
+            for args, _ in pipe.command_stack:
+                self.commands[str(args[0]).upper()] += 1
+            start = time.perf_counter_ns()
+            try:
+                return execute(raise_on_error)
+            finally:
+                self.redis_ns += time.perf_counter_ns() - start
+
+        pipe.execute = counted_execute
+        return pipe
+
+    def profile(self):
+        """Contadores acumulados até agora (use profile_since para os de uma query)"""
+        return {'round_trips': self.round_trips, 'commands': dict(self.commands), 'redis_ns': self.redis_ns}
+
+r = CountingRedis(host="localhost", port=6379, decode_responses=True)
+
+# False: as queries não imprimem nada (usado pelos backends do benchmark em proj1)
+VERBOSE = True
+
+def log(*args):
+    if VERBOSE:
+        print(*args)
+
+def profile_since(before, elapsed_ns):
+    """
+    Perfil de uma query a partir de r.profile() tirado antes dela e do tempo
+    total: round trips, comandos por tipo e o tempo no Redis x no Python (ms).
+    """
+    after = r.profile()
+    commands = {
+        name: count - before['commands'].get(name, 0)
+        for name, count in after['commands'].items()
+        if count > before['commands'].get(name, 0)
+    }
+    redis_ns = after['redis_ns'] - before['redis_ns']
+    return {
+        'round_trips': after['round_trips'] - before['round_trips'],
+        'commands': dict(sorted(commands.items(), key=lambda c: -c[1])),
+        'redis_ms': redis_ns / 1e6,
+        'python_ms': max(elapsed_ns - redis_ns, 0) / 1e6,
+    }
+
+def format_profile(profile):
+    commands = ", ".join(f"{name} {count}" for name, count in profile['commands'].items())
+    return (f"{profile['round_trips']} round trips ({commands}); "
+            f"Redis {profile['redis_ms']:.1f} ms, Python {profile['python_ms']:.1f} ms")
 
 def parse_date_str_to_date(d: str) -> datetime.date:
     y, m, da = map(int, d.split("-"))
@@ -15,20 +101,21 @@ def parse_date_str_to_ordinal(d: str) -> int:
 # Q1 - Pricing Summary Report (apenas lineitem)
 # =========================================================
 
-def query1_redis():
+def query1_redis(delta=90):
     """
     Equivalente à Q1 do TPC-H:
-    - Filtra l_shipdate <= '1998-12-01' - 90 dias
+    - Filtra l_shipdate <= '1998-12-01' - delta dias
     - Agrupa por (l_returnflag, l_linestatus)
     - Calcula SUM, AVG, COUNT
     """
-    # Data limite: 1998-12-01 - 90 dias
+    # Data limite: 1998-12-01 - delta dias
     base_date = datetime.date(1998, 12, 1)
-    cutoff_date = base_date - datetime.timedelta(days=90)
+    cutoff_date = base_date - datetime.timedelta(days=delta)
     cutoff_score = cutoff_date.toordinal()
 
-    print("== Q1 Redis ==")
-    print("Data limite:", cutoff_date)
+    log("== Q1 Redis ==")
+    trips = r.round_trips
+    log("Data limite:", cutoff_date)
 
     start = time.perf_counter()
 
@@ -95,9 +182,9 @@ def query1_redis():
 
     # Mostrar algumas linhas (opcional)
     for row in result_rows:
-        print(row)
+        log(row)
 
-    print(f"Tempo Q1 (Redis): {elapsed:.3f} s\n")
+    log(f"Tempo Q1 (Redis): {elapsed:.3f} s ({r.round_trips - trips} round trips)\n")
     return elapsed, result_rows
 
 # =========================================================
@@ -119,27 +206,28 @@ def get_region_name_by_nationkey(nationkey: int) -> str:
         return None
     return region.get("r_name")
 
-def query2_redis():
+def query2_redis(size=15, type_suffix="BRASS", region="EUROPE"):
     """
     Equivalente à Q2 do TPC-H:
     - part, supplier, partsupp, nation, region
-    - Filtro: p_size = 15, p_type LIKE '%BRASS', região 'EUROPE'
+    - Filtro: p_size = size, p_type LIKE '%type_suffix', r_name = region
     - ps_supplycost = mínimo por partkey
     """
 
-    print("== Q2 Redis ==")
+    log("== Q2 Redis ==")
+    trips = r.round_trips
 
     start = time.perf_counter()
 
-    # 1) Pegar todas as partes com p_size = 15 e p_type LIKE '%BRASS'
+    # 1) Pegar todas as partes com p_size = size e p_type LIKE '%type_suffix'
     # Conjuntos construídos no loader:
-    #   part:size:15
-    #   part:type:BRASS
-    partkeys_size_15 = r.smembers("part:size:15")
-    partkeys_brass = r.smembers("part:type:BRASS")
+    #   part:size:<size>
+    #   part:type:<sufixo> (ex.: part:type:BRASS)
+    partkeys_size = r.smembers(f"part:size:{size}")
+    partkeys_type = r.smembers(f"part:type:{type_suffix}")
 
     # interseção em Python (poderia usar SINTER também)
-    partkeys = set(partkeys_size_15).intersection(partkeys_brass)
+    partkeys = set(partkeys_size).intersection(partkeys_type)
 
     rows = []
 
@@ -184,7 +272,7 @@ def query2_redis():
             s_nationkey = int(supplier["s_nationkey"])
 
             r_name = get_region_name_by_nationkey(s_nationkey)
-            if r_name != "EUROPE":
+            if r_name != region:
                 continue
 
             # Aqui também poderíamos obter n_name:
@@ -221,36 +309,36 @@ def query2_redis():
 
     # Mostrar algumas linhas (opcional)
     for row in rows[:20]:
-        print(row)
+        log(row)
 
-    print(f"Tempo Q2 (Redis): {elapsed:.3f} s\n")
+    log(f"Tempo Q2 (Redis): {elapsed:.3f} s ({r.round_trips - trips} round trips)\n")
     return elapsed, rows
 
 # =========================================================
 # Q3 - Shipping Priority
 # =========================================================
 
-def query3_redis():
+def query3_redis(segment="BUILDING", date="1995-03-15"):
     """
     Equivalente à Q3 do TPC-H:
     - Tabelas: customer, orders, lineitem
     - Filtros:
-      c_mktsegment = 'BUILDING'
-      o_orderdate < '1995-03-15'
-      l_shipdate > '1995-03-15'
+      c_mktsegment = segment
+      o_orderdate < date
+      l_shipdate > date
     - Agrupa por (l_orderkey, o_orderdate, o_shippriority)
       e soma revenue = SUM(l_extendedprice * (1 - l_discount))
     """
 
-    print("== Q3 Redis ==")
+    log("== Q3 Redis ==")
+    trips = r.round_trips
 
-    cutoff_str = "1995-03-15"
-    cutoff_date = parse_date_str_to_date(cutoff_str)
+    cutoff_date = parse_date_str_to_date(date)
 
     start = time.perf_counter()
 
-    # 1) Clientes do segmento BUILDING
-    custkeys = r.smembers("customer:segment:BUILDING")
+    # 1) Clientes do segmento
+    custkeys = r.smembers(f"customer:segment:{segment}")
 
     # Resultado por (orderkey, orderdate, shippriority)
     groups = {}  # (orderkey, orderdate, shippriority) -> revenue
@@ -267,7 +355,7 @@ def query3_redis():
             o_orderdate_str = order["o_orderdate"]
             o_orderdate = parse_date_str_to_date(o_orderdate_str)
 
-            # Filtro de data: o_orderdate < '1995-03-15'
+            # Filtro de data: o_orderdate < date
             if not (o_orderdate < cutoff_date):
                 continue
 
@@ -287,7 +375,7 @@ def query3_redis():
                     l_shipdate_str = item["l_shipdate"]
                     l_shipdate = parse_date_str_to_date(l_shipdate_str)
 
-                    # Filtro l_shipdate > '1995-03-15'
+                    # Filtro l_shipdate > date
                     if not (l_shipdate > cutoff_date):
                         continue
 
@@ -319,21 +407,729 @@ def query3_redis():
     elapsed = end - start
 
     for row in rows[:20]:
-        print(row)
+        log(row)
 
-    print(f"Tempo Q3 (Redis): {elapsed:.3f} s\n")
+    log(f"Tempo Q3 (Redis): {elapsed:.3f} s ({r.round_trips - trips} round trips)\n")
     return elapsed, rows
 
 # =========================================================
-# MAIN - para rodar as três e já ver os tempos
+# Q4-Q22 - usam os índices criados por
+#   python load_tpch_redis.py --query-indexes
+# As junções são feitas no Python; as leituras de hashes e conjuntos
+# vão em lotes por pipeline para limitar o número de round trips.
+# =========================================================
+
+BATCH = 1000
+
+def fetch(keys, fields):
+    """HMGET de vários hashes em lotes; retorna {chave: {campo: valor}} (omite chaves inexistentes)"""
+    keys = list(keys)
+    out = {}
+    for i in range(0, len(keys), BATCH):
+        chunk = keys[i:i + BATCH]
+        pipe = r.pipeline(transaction=False)
+        for key in chunk:
+            pipe.hmget(key, fields)
+        for key, values in zip(chunk, pipe.execute()):
+            if any(v is not None for v in values):
+                out[key] = dict(zip(fields, values))
+    return out
+
+def members(keys):
+    """SMEMBERS de vários conjuntos em lotes; retorna {chave: set}"""
+    keys = list(keys)
+    out = {}
+    for i in range(0, len(keys), BATCH):
+        chunk = keys[i:i + BATCH]
+        pipe = r.pipeline(transaction=False)
+        for key in chunk:
+            pipe.smembers(key)
+        out.update(zip(chunk, pipe.execute()))
+    return out
+
+def union(keys):
+    """União dos conjuntos (SMEMBERS em lote)"""
+    result = set()
+    for values in members(keys).values():
+        result |= values
+    return result
+
+def add_months(d: str, months: int) -> str:
+    """'1993-07-01' + n meses (as datas dos parâmetros são sempre dia 1)"""
+    date = parse_date_str_to_date(d)
+    m = date.month - 1 + months
+    return date.replace(year=date.year + m // 12, month=m % 12 + 1).isoformat()
+
+def zrange_dates(key, start, end, inclusive_end=False):
+    """Membros de um zset indexado por ordinal de data com start <= data < end (ou <= end)"""
+    lo = parse_date_str_to_ordinal(start)
+    hi = parse_date_str_to_ordinal(end)
+    return r.zrangebyscore(key, lo, hi if inclusive_end else f"({hi}")
+
+def nations():
+    """{n_nationkey: (n_name, r_name)}: as 25 nações em dois round trips"""
+    nation_rows = fetch([f"nation:{k}" for k in range(25)], ["n_nationkey", "n_name", "n_regionkey"])
+    region_rows = fetch([f"region:{k}" for k in range(5)], ["r_regionkey", "r_name"])
+    region_names = {int(rg["r_regionkey"]): rg["r_name"] for rg in region_rows.values()}
+    return {
+        int(n["n_nationkey"]): (n["n_name"], region_names.get(int(n["n_regionkey"])))
+        for n in nation_rows.values()
+    }
+
+def nationkey_by_name(nat, name):
+    for key, (n_name, _) in nat.items():
+        if n_name == name:
+            return key
+    return None
+
+def revenue_of(item):
+    return float(item["l_extendedprice"]) * (1 - float(item["l_discount"]))
+
+def finish(query, start, trips, rows):
+    """Mostra as primeiras linhas, o tempo e os round trips; retorna (elapsed, rows)"""
+    elapsed = time.perf_counter() - start
+    for row in rows[:20]:
+        log(row)
+    log(f"Tempo {query} (Redis): {elapsed:.3f} s ({r.round_trips - trips} round trips)\n")
+    return elapsed, rows
+
+def query4_redis(date="1993-07-01"):
+    """Q4: pedidos do trimestre com algum lineitem recebido depois do commit"""
+    log("== Q4 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    orderkeys = zrange_dates("orders:by_date", date, add_months(date, 3))
+    line_sets = members(f"lineitem:by_order:{o}" for o in orderkeys)
+    items = fetch(set().union(*line_sets.values()), ["l_commitdate", "l_receiptdate"])
+
+    late_orders = [
+        o for o in orderkeys
+        if any(
+            items[k]["l_commitdate"] < items[k]["l_receiptdate"]
+            for k in line_sets[f"lineitem:by_order:{o}"] if k in items
+        )
+    ]
+    orders = fetch((f"orders:{o}" for o in late_orders), ["o_orderpriority"])
+
+    counts = {}
+    for order in orders.values():
+        priority = order["o_orderpriority"]
+        counts[priority] = counts.get(priority, 0) + 1
+
+    rows = [{"o_orderpriority": p, "order_count": c} for p, c in sorted(counts.items())]
+    return finish("Q4", start, trips, rows)
+
+def query5_redis(region="ASIA", date="1994-01-01"):
+    """Q5: receita por nação da região com cliente e fornecedor da mesma nação"""
+    log("== Q5 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nat = nations()
+    region_nations = [k for k, (_, r_name) in nat.items() if r_name == region]
+    cust_nation = {}
+    for nk, custkeys in zip(region_nations, members(f"customer:by_nation:{k}" for k in region_nations).values()):
+        for c in custkeys:
+            cust_nation[c] = nk
+    supp_nation = {}
+    for nk, suppkeys in zip(region_nations, members(f"supplier:by_nation:{k}" for k in region_nations).values()):
+        for s in suppkeys:
+            supp_nation[s] = nk
+
+    orderkeys = zrange_dates("orders:by_date", date, add_months(date, 12))
+    orders = fetch((f"orders:{o}" for o in orderkeys), ["o_orderkey", "o_custkey"])
+    order_nation = {
+        o["o_orderkey"]: cust_nation[o["o_custkey"]]
+        for o in orders.values() if o["o_custkey"] in cust_nation
+    }
+
+    line_keys = union(f"lineitem:by_order:{o}" for o in order_nation)
+    items = fetch(line_keys, ["l_orderkey", "l_suppkey", "l_extendedprice", "l_discount"])
+
+    revenue = {}
+    for item in items.values():
+        nk = order_nation[item["l_orderkey"]]
+        if supp_nation.get(item["l_suppkey"]) != nk:
+            continue
+        n_name = nat[nk][0]
+        revenue[n_name] = revenue.get(n_name, 0.0) + revenue_of(item)
+
+    rows = [{"n_name": n, "revenue": v} for n, v in revenue.items()]
+    rows.sort(key=lambda row: -row["revenue"])
+    return finish("Q5", start, trips, rows)
+
+def query6_redis(date="1994-01-01", discount=0.06, quantity=24):
+    """Q6: varredura por intervalo em lineitem:by_shipdate"""
+    log("== Q6 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    keys = zrange_dates("lineitem:by_shipdate", date, add_months(date, 12))
+    items = fetch(keys, ["l_extendedprice", "l_discount", "l_quantity"])
+    lo, hi = round(discount - 0.01, 2), round(discount + 0.01, 2)
+
+    revenue = 0.0
+    matched = False
+    for item in items.values():
+        disc = float(item["l_discount"])
+        if lo <= disc <= hi and float(item["l_quantity"]) < quantity:
+            revenue += float(item["l_extendedprice"]) * disc
+            matched = True
+
+    rows = [{"revenue": revenue}] if matched else []
+    return finish("Q6", start, trips, rows)
+
+def query7_redis(nation1="FRANCE", nation2="GERMANY"):
+    """Q7: volume enviado entre duas nações em 1995-1996"""
+    log("== Q7 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nat = nations()
+    pair = {nationkey_by_name(nat, nation1): nation1, nationkey_by_name(nat, nation2): nation2}
+    pair.pop(None, None)
+    supp_nation = {}
+    cust_nation = {}
+    for nk, name in pair.items():
+        for s in r.smembers(f"supplier:by_nation:{nk}"):
+            supp_nation[s] = name
+        for c in r.smembers(f"customer:by_nation:{nk}"):
+            cust_nation[c] = name
+
+    keys = zrange_dates("lineitem:by_shipdate", "1995-01-01", "1996-12-31", inclusive_end=True)
+    items = fetch(keys, ["l_orderkey", "l_suppkey", "l_shipdate", "l_extendedprice", "l_discount"])
+    items = [it for it in items.values() if it["l_suppkey"] in supp_nation]
+    orders = fetch({f"orders:{it['l_orderkey']}" for it in items}, ["o_custkey"])
+
+    revenue = {}
+    for item in items:
+        cust = orders[f"orders:{item['l_orderkey']}"]["o_custkey"]
+        supp_name = supp_nation[item["l_suppkey"]]
+        cust_name = cust_nation.get(cust)
+        if cust_name is None or cust_name == supp_name:
+            continue
+        key = (supp_name, cust_name, int(item["l_shipdate"][:4]))
+        revenue[key] = revenue.get(key, 0.0) + revenue_of(item)
+
+    rows = [
+        {"supp_nation": s, "cust_nation": c, "l_year": y, "revenue": v}
+        for (s, c, y), v in sorted(revenue.items())
+    ]
+    return finish("Q7", start, trips, rows)
+
+def query8_redis(nation="BRAZIL", region="AMERICA", p_type="ECONOMY ANODIZED STEEL"):
+    """Q8: participação da nação no volume da região para um tipo de peça"""
+    log("== Q8 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nat = nations()
+    region_customers = union(
+        f"customer:by_nation:{k}" for k, (_, r_name) in nat.items() if r_name == region
+    )
+    partkeys = r.smembers(f"part:by_type:{p_type}")
+    line_keys = union(f"lineitem:by_part:{p}" for p in partkeys)
+    items = fetch(line_keys, ["l_orderkey", "l_suppkey", "l_extendedprice", "l_discount"])
+    orders = fetch({f"orders:{it['l_orderkey']}" for it in items.values()}, ["o_orderdate", "o_custkey"])
+    suppliers = fetch({f"supplier:{it['l_suppkey']}" for it in items.values()}, ["s_nationkey"])
+
+    total = {}
+    nation_volume = {}
+    for item in items.values():
+        order = orders[f"orders:{item['l_orderkey']}"]
+        if not ("1995-01-01" <= order["o_orderdate"] <= "1996-12-31"):
+            continue
+        if order["o_custkey"] not in region_customers:
+            continue
+        year = int(order["o_orderdate"][:4])
+        volume = revenue_of(item)
+        total[year] = total.get(year, 0.0) + volume
+        s_nationkey = int(suppliers[f"supplier:{item['l_suppkey']}"]["s_nationkey"])
+        if nat[s_nationkey][0] == nation:
+            nation_volume[year] = nation_volume.get(year, 0.0) + volume
+
+    rows = [
+        {"o_year": y, "mkt_share": nation_volume.get(y, 0.0) / total[y]}
+        for y in sorted(total)
+    ]
+    return finish("Q8", start, trips, rows)
+
+def query9_redis(color="green"):
+    """
+    Q9: lucro por nação do fornecedor e ano para peças com a cor no nome.
+    Os candidatos vêm de part:name_word (as cores do TPC-H são palavras do p_name).
+    """
+    log("== Q9 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nat = nations()
+    parts = fetch((f"part:{p}" for p in r.smembers(f"part:name_word:{color}")), ["p_partkey", "p_name"])
+    partkeys = [p["p_partkey"] for p in parts.values() if color in p["p_name"]]
+
+    line_keys = union(f"lineitem:by_part:{p}" for p in partkeys)
+    items = fetch(line_keys, ["l_orderkey", "l_partkey", "l_suppkey", "l_quantity",
+                              "l_extendedprice", "l_discount"]).values()
+    partsupps = fetch({f"partsupp:{it['l_partkey']}:{it['l_suppkey']}" for it in items}, ["ps_supplycost"])
+    suppliers = fetch({f"supplier:{it['l_suppkey']}" for it in items}, ["s_nationkey"])
+    orders = fetch({f"orders:{it['l_orderkey']}" for it in items}, ["o_orderdate"])
+
+    profit = {}
+    for item in items:
+        cost = float(partsupps[f"partsupp:{item['l_partkey']}:{item['l_suppkey']}"]["ps_supplycost"])
+        n_name = nat[int(suppliers[f"supplier:{item['l_suppkey']}"]["s_nationkey"])][0]
+        year = int(orders[f"orders:{item['l_orderkey']}"]["o_orderdate"][:4])
+        amount = revenue_of(item) - cost * float(item["l_quantity"])
+        profit[(n_name, year)] = profit.get((n_name, year), 0.0) + amount
+
+    rows = [{"nation": n, "o_year": y, "sum_profit": v} for (n, y), v in profit.items()]
+    rows.sort(key=lambda row: (row["nation"], -row["o_year"]))
+    return finish("Q9", start, trips, rows)
+
+def query10_redis(date="1993-10-01"):
+    """Q10: top 20 clientes por receita devolvida no trimestre"""
+    log("== Q10 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nat = nations()
+    orderkeys = zrange_dates("orders:by_date", date, add_months(date, 3))
+    orders = fetch((f"orders:{o}" for o in orderkeys), ["o_orderkey", "o_custkey"])
+    line_keys = union(f"lineitem:by_order:{o}" for o in orderkeys)
+    items = fetch(line_keys, ["l_orderkey", "l_returnflag", "l_extendedprice", "l_discount"])
+
+    revenue = {}
+    for item in items.values():
+        if item["l_returnflag"] != "R":
+            continue
+        cust = orders[f"orders:{item['l_orderkey']}"]["o_custkey"]
+        revenue[cust] = revenue.get(cust, 0.0) + revenue_of(item)
+
+    top = sorted(revenue.items(), key=lambda kv: -kv[1])[:20]
+    fields = ["c_name", "c_acctbal", "c_nationkey", "c_address", "c_phone", "c_comment"]
+    customers = fetch((f"customer:{c}" for c, _ in top), fields)
+
+    rows = []
+    for c, value in top:
+        cust = customers[f"customer:{c}"]
+        rows.append({
+            "c_custkey": int(c),
+            "c_name": cust["c_name"],
+            "revenue": value,
+            "c_acctbal": float(cust["c_acctbal"]),
+            "n_name": nat[int(cust["c_nationkey"])][0],
+            "c_address": cust["c_address"],
+            "c_phone": cust["c_phone"],
+            "c_comment": cust["c_comment"]
+        })
+    return finish("Q10", start, trips, rows)
+
+def query11_redis(nation="GERMANY", fraction=0.0001):
+    """Q11: valor de estoque por peça nos fornecedores da nação (fraction = 0.0001 / SF)"""
+    log("== Q11 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nk = nationkey_by_name(nations(), nation)
+    suppkeys = r.smembers(f"supplier:by_nation:{nk}")
+    ps_keys = union(f"partsupp:by_supp:{s}" for s in suppkeys)
+    partsupps = fetch((f"partsupp:{ps}" for ps in ps_keys), ["ps_partkey", "ps_supplycost", "ps_availqty"])
+
+    value = {}
+    for ps in partsupps.values():
+        p = int(ps["ps_partkey"])
+        value[p] = value.get(p, 0.0) + float(ps["ps_supplycost"]) * int(ps["ps_availqty"])
+    threshold = sum(value.values()) * fraction
+
+    rows = [{"ps_partkey": p, "value": v} for p, v in value.items() if v > threshold]
+    rows.sort(key=lambda row: -row["value"])
+    return finish("Q11", start, trips, rows)
+
+def query12_redis(shipmode1="MAIL", shipmode2="SHIP", date="1994-01-01"):
+    """Q12: lineitems recebidos no ano (lineitem:by_receiptdate) por modo de envio"""
+    log("== Q12 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    keys = zrange_dates("lineitem:by_receiptdate", date, add_months(date, 12))
+    items = fetch(keys, ["l_orderkey", "l_shipmode", "l_commitdate", "l_receiptdate", "l_shipdate"])
+    items = [
+        it for it in items.values()
+        if it["l_shipmode"] in (shipmode1, shipmode2)
+        and it["l_commitdate"] < it["l_receiptdate"]
+        and it["l_shipdate"] < it["l_commitdate"]
+    ]
+    orders = fetch({f"orders:{it['l_orderkey']}" for it in items}, ["o_orderpriority"])
+
+    counts = {}
+    for item in items:
+        high, low = counts.get(item["l_shipmode"], (0, 0))
+        if orders[f"orders:{item['l_orderkey']}"]["o_orderpriority"] in ("1-URGENT", "2-HIGH"):
+            high += 1
+        else:
+            low += 1
+        counts[item["l_shipmode"]] = (high, low)
+
+    rows = [
+        {"l_shipmode": m, "high_line_count": h, "low_line_count": l}
+        for m, (h, l) in sorted(counts.items())
+    ]
+    return finish("Q12", start, trips, rows)
+
+def query13_redis(word1="special", word2="requests"):
+    """Q13: distribuição de clientes pelo número de pedidos (sem o padrão no comentário)"""
+    log("== Q13 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    pattern = re.compile(f"{re.escape(word1)}.*{re.escape(word2)}", re.S)
+    custkeys = list(union(f"customer:by_nation:{k}" for k in range(25)))
+
+    dist = {}
+    # em blocos de clientes para não manter todos os comentários em memória
+    for i in range(0, len(custkeys), BATCH):
+        chunk = custkeys[i:i + BATCH]
+        order_sets = members(f"orders:by_customer:{c}" for c in chunk)
+        comments = fetch(
+            (f"orders:{o}" for orderkeys in order_sets.values() for o in orderkeys), ["o_comment"]
+        )
+        for orderkeys in order_sets.values():
+            c_count = sum(1 for o in orderkeys if not pattern.search(comments[f"orders:{o}"]["o_comment"]))
+            dist[c_count] = dist.get(c_count, 0) + 1
+
+    rows = [{"c_count": c, "custdist": n} for c, n in dist.items()]
+    rows.sort(key=lambda row: (-row["custdist"], -row["c_count"]))
+    return finish("Q13", start, trips, rows)
+
+def query14_redis(date="1995-09-01"):
+    """Q14: percentual da receita do mês vindo de peças PROMO"""
+    log("== Q14 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    keys = zrange_dates("lineitem:by_shipdate", date, add_months(date, 1))
+    items = fetch(keys, ["l_partkey", "l_extendedprice", "l_discount"]).values()
+    parts = fetch({f"part:{it['l_partkey']}" for it in items}, ["p_type"])
+
+    promo = total = 0.0
+    for item in items:
+        value = revenue_of(item)
+        total += value
+        if parts[f"part:{item['l_partkey']}"]["p_type"].startswith("PROMO"):
+            promo += value
+
+    rows = [{"promo_revenue": 100.0 * promo / total}] if total else []
+    return finish("Q14", start, trips, rows)
+
+def query15_redis(date="1996-01-01"):
+    """Q15: fornecedor(es) com a maior receita no trimestre"""
+    log("== Q15 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    keys = zrange_dates("lineitem:by_shipdate", date, add_months(date, 3))
+    items = fetch(keys, ["l_suppkey", "l_extendedprice", "l_discount"])
+
+    revenue = {}
+    for item in items.values():
+        s = item["l_suppkey"]
+        revenue[s] = revenue.get(s, 0.0) + revenue_of(item)
+
+    rows = []
+    if revenue:
+        best = max(revenue.values())
+        top = [s for s, v in revenue.items() if v == best]
+        suppliers = fetch((f"supplier:{s}" for s in top), ["s_name", "s_address", "s_phone"])
+        for s in top:
+            sup = suppliers[f"supplier:{s}"]
+            rows.append({
+                "s_suppkey": int(s),
+                "s_name": sup["s_name"],
+                "s_address": sup["s_address"],
+                "s_phone": sup["s_phone"],
+                "total_revenue": best
+            })
+        rows.sort(key=lambda row: row["s_suppkey"])
+    return finish("Q15", start, trips, rows)
+
+def query16_redis(brand="Brand#45", type_prefix="MEDIUM POLISHED", sizes=(49, 14, 23, 45, 19, 3, 36, 9)):
+    """Q16: fornecedores distintos por (marca, tipo, tamanho), sem os com reclamações"""
+    log("== Q16 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    partkeys = union(f"part:size:{s}" for s in sizes)
+    parts = fetch((f"part:{p}" for p in partkeys), ["p_partkey", "p_brand", "p_type", "p_size"])
+    parts = [
+        p for p in parts.values()
+        if p["p_brand"] != brand and not p["p_type"].startswith(type_prefix)
+    ]
+
+    suppkeys = union(f"supplier:by_nation:{k}" for k in range(25))
+    comments = fetch((f"supplier:{s}" for s in suppkeys), ["s_suppkey", "s_comment"])
+    complaints = {
+        s["s_suppkey"] for s in comments.values()
+        if re.search("Customer.*Complaints", s["s_comment"])
+    }
+
+    ps_sets = members(f"partsupp:by_part:{p['p_partkey']}" for p in parts)
+    groups = {}
+    for p in parts:
+        key = (p["p_brand"], p["p_type"], int(p["p_size"]))
+        suppliers = groups.setdefault(key, set())
+        for ps in ps_sets[f"partsupp:by_part:{p['p_partkey']}"]:
+            s = ps.split(":")[1]
+            if s not in complaints:
+                suppliers.add(s)
+
+    rows = [
+        {"p_brand": b, "p_type": t, "p_size": z, "supplier_cnt": len(s)}
+        for (b, t, z), s in groups.items() if s
+    ]
+    rows.sort(key=lambda row: (-row["supplier_cnt"], row["p_brand"], row["p_type"], row["p_size"]))
+    return finish("Q16", start, trips, rows)
+
+def query17_redis(brand="Brand#23", container="MED BOX"):
+    """Q17: receita anual média perdida com pedidos pequenos da marca/container"""
+    log("== Q17 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    partkeys = r.smembers(f"part:brand_container:{brand}:{container}")
+    line_keys = union(f"lineitem:by_part:{p}" for p in partkeys)
+    items = fetch(line_keys, ["l_partkey", "l_quantity", "l_extendedprice"]).values()
+
+    per_part = {}
+    for item in items:
+        qty_sum, count = per_part.get(item["l_partkey"], (0.0, 0))
+        per_part[item["l_partkey"]] = (qty_sum + float(item["l_quantity"]), count + 1)
+
+    total = 0.0
+    matched = False
+    for item in items:
+        qty_sum, count = per_part[item["l_partkey"]]
+        if float(item["l_quantity"]) < 0.2 * qty_sum / count:
+            total += float(item["l_extendedprice"])
+            matched = True
+
+    rows = [{"avg_yearly": total / 7.0}] if matched else []
+    return finish("Q17", start, trips, rows)
+
+def query18_redis(quantity=300):
+    """Q18: pedidos com sum(l_quantity) > quantity, direto do zset orders:sum_qty"""
+    log("== Q18 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    sums = dict(r.zrangebyscore("orders:sum_qty", f"({quantity}", "+inf", withscores=True))
+    orders = fetch((f"orders:{o}" for o in sums), ["o_orderkey", "o_custkey", "o_orderdate", "o_totalprice"])
+    top = sorted(orders.values(), key=lambda o: (-float(o["o_totalprice"]), o["o_orderdate"]))[:100]
+    customers = fetch({f"customer:{o['o_custkey']}" for o in top}, ["c_name"])
+
+    rows = [
+        {
+            "c_name": customers[f"customer:{o['o_custkey']}"]["c_name"],
+            "c_custkey": int(o["o_custkey"]),
+            "o_orderkey": int(o["o_orderkey"]),
+            "o_orderdate": o["o_orderdate"],
+            "o_totalprice": float(o["o_totalprice"]),
+            "sum_quantity": sums[o["o_orderkey"]]
+        }
+        for o in top
+    ]
+    return finish("Q18", start, trips, rows)
+
+# containers e tamanhos máximos de cada ramo da Q19
+Q19_BRANCHES = [
+    (["SM CASE", "SM BOX", "SM PACK", "SM PKG"], 5),
+    (["MED BAG", "MED BOX", "MED PKG", "MED PACK"], 10),
+    (["LG CASE", "LG BOX", "LG PACK", "LG PKG"], 15),
+]
+
+def query19_redis(brands=("Brand#12", "Brand#23", "Brand#34"), quantities=(1, 10, 20)):
+    """Q19: receita dos três ramos (marca, containers, tamanho, quantidade)"""
+    log("== Q19 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    matched = {}
+    for brand, (containers, max_size), qty in zip(brands, Q19_BRANCHES, quantities):
+        partkeys = union(f"part:brand_container:{brand}:{c}" for c in containers)
+        sizes = fetch((f"part:{p}" for p in partkeys), ["p_partkey", "p_size"])
+        partkeys = [p["p_partkey"] for p in sizes.values() if 1 <= int(p["p_size"]) <= max_size]
+        line_keys = union(f"lineitem:by_part:{p}" for p in partkeys)
+        items = fetch(line_keys, ["l_quantity", "l_shipmode", "l_shipinstruct",
+                                  "l_extendedprice", "l_discount"])
+        for key, item in items.items():
+            if (item["l_shipmode"] in ("AIR", "AIR REG")
+                    and item["l_shipinstruct"] == "DELIVER IN PERSON"
+                    and qty <= float(item["l_quantity"]) <= qty + 10):
+                matched[key] = item
+
+    rows = [{"revenue": sum(revenue_of(it) for it in matched.values())}] if matched else []
+    return finish("Q19", start, trips, rows)
+
+def query20_redis(color="forest", date="1994-01-01", nation="CANADA"):
+    """Q20: fornecedores da nação com excesso de estoque de peças da cor"""
+    log("== Q20 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nk = nationkey_by_name(nations(), nation)
+    suppkeys = r.smembers(f"supplier:by_nation:{nk}")
+    parts = fetch((f"part:{p}" for p in r.smembers(f"part:name_word:{color}")), ["p_partkey", "p_name"])
+    partkeys = [p["p_partkey"] for p in parts.values() if p["p_name"].startswith(color)]
+
+    end = add_months(date, 12)
+    line_keys = union(f"lineitem:by_part:{p}" for p in partkeys)
+    items = fetch(line_keys, ["l_partkey", "l_suppkey", "l_quantity", "l_shipdate"])
+    qty = {}
+    for item in items.values():
+        if item["l_suppkey"] in suppkeys and date <= item["l_shipdate"] < end:
+            pair = (item["l_partkey"], item["l_suppkey"])
+            qty[pair] = qty.get(pair, 0.0) + float(item["l_quantity"])
+
+    partsupps = fetch((f"partsupp:{p}:{s}" for p, s in qty), ["ps_availqty"])
+    selected = {
+        s for (p, s), q in qty.items()
+        if int(partsupps[f"partsupp:{p}:{s}"]["ps_availqty"]) > 0.5 * q
+    }
+    suppliers = fetch((f"supplier:{s}" for s in selected), ["s_name", "s_address"])
+
+    rows = sorted(suppliers.values(), key=lambda row: row["s_name"])
+    return finish("Q20", start, trips, rows)
+
+def query21_redis(nation="SAUDI ARABIA"):
+    """
+    Q21: fornecedores da nação que foram os únicos atrasados em pedidos
+    'F' com mais de um fornecedor (pedidos processados em blocos).
+    """
+    log("== Q21 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    nk = nationkey_by_name(nations(), nation)
+    suppkeys = r.smembers(f"supplier:by_nation:{nk}")
+    orderkeys = list(r.smembers("orders:status:F"))
+
+    numwait = {}
+    for i in range(0, len(orderkeys), BATCH):
+        line_sets = members(f"lineitem:by_order:{o}" for o in orderkeys[i:i + BATCH])
+        items = fetch(set().union(*line_sets.values()), ["l_suppkey", "l_receiptdate", "l_commitdate"])
+        for keys in line_sets.values():
+            lines = [items[k] for k in keys if k in items]
+            late = [it["l_suppkey"] for it in lines if it["l_receiptdate"] > it["l_commitdate"]]
+            if len({it["l_suppkey"] for it in lines}) < 2 or len(set(late)) != 1:
+                continue
+            s = late[0]
+            if s in suppkeys:
+                numwait[s] = numwait.get(s, 0) + len(late)
+
+    names = fetch((f"supplier:{s}" for s in numwait), ["s_name"])
+    rows = [{"s_name": names[f"supplier:{s}"]["s_name"], "numwait": n} for s, n in numwait.items()]
+    rows.sort(key=lambda row: (-row["numwait"], row["s_name"]))
+    return finish("Q21", start, trips, rows[:100])
+
+def query22_redis(codes=("13", "31", "23", "29", "30", "18", "17")):
+    """Q22: clientes sem pedidos com saldo acima da média, por código de país"""
+    log("== Q22 Redis ==")
+    trips = r.round_trips
+    start = time.perf_counter()
+
+    custkeys = union(f"customer:by_phone_cc:{cc}" for cc in codes)
+    customers = fetch((f"customer:{c}" for c in custkeys), ["c_custkey", "c_phone", "c_acctbal"])
+    positive = [float(c["c_acctbal"]) for c in customers.values() if float(c["c_acctbal"]) > 0]
+    avg = sum(positive) / len(positive) if positive else 0.0
+    candidates = [c for c in customers.values() if float(c["c_acctbal"]) > avg]
+
+    # not exists: EXISTS orders:by_customer:<c> em lote
+    has_orders = []
+    for i in range(0, len(candidates), BATCH):
+        pipe = r.pipeline(transaction=False)
+        for c in candidates[i:i + BATCH]:
+            pipe.exists(f"orders:by_customer:{c['c_custkey']}")
+        has_orders.extend(pipe.execute())
+
+    groups = {}
+    for c, exists in zip(candidates, has_orders):
+        if exists:
+            continue
+        count, total = groups.get(c["c_phone"][:2], (0, 0.0))
+        groups[c["c_phone"][:2]] = (count + 1, total + float(c["c_acctbal"]))
+
+    rows = [
+        {"cntrycode": cc, "numcust": n, "totacctbal": t}
+        for cc, (n, t) in sorted(groups.items())
+    ]
+    return finish("Q22", start, trips, rows)
+
+REDIS_QUERIES = {
+    "Q1": query1_redis,
+    "Q2": query2_redis,
+    "Q3": query3_redis,
+    "Q4": query4_redis,
+    "Q5": query5_redis,
+    "Q6": query6_redis,
+    "Q7": query7_redis,
+    "Q8": query8_redis,
+    "Q9": query9_redis,
+    "Q10": query10_redis,
+    "Q11": query11_redis,
+    "Q12": query12_redis,
+    "Q13": query13_redis,
+    "Q14": query14_redis,
+    "Q15": query15_redis,
+    "Q16": query16_redis,
+    "Q17": query17_redis,
+    "Q18": query18_redis,
+    "Q19": query19_redis,
+    "Q20": query20_redis,
+    "Q21": query21_redis,
+    "Q22": query22_redis,
+}
+
+# =========================================================
+# MAIN - roda as queries pedidas e mostra os tempos
 # =========================================================
 
 if __name__ == "__main__":
-    t1, _ = query1_redis()
-    t2, _ = query2_redis()
-    t3, _ = query3_redis()
+    parser = argparse.ArgumentParser(description="Queries TPC-H no Redis")
+    parser.add_argument("--queries", nargs="+", default=["Q1", "Q2", "Q3"],
+                        help="queries a executar ou 'all' (Q4-Q22 exigem load_tpch_redis.py --query-indexes)")
+    parser.add_argument("--param-sets", type=int, default=0,
+                        help="roda cada query com N conjuntos de parâmetros sorteados (tpch_params.py)")
+    parser.add_argument("--seed", type=int, default=None, help="semente do gerador de parâmetros")
+    parser.add_argument("--scale-factor", type=float, default=1, help="SF dos dados (parâmetro da Q11)")
+    args = parser.parse_args()
+    queries = list(REDIS_QUERIES) if args.queries == ["all"] else args.queries
+    for q in queries:
+        if q not in REDIS_QUERIES:
+            parser.error(f"query desconhecida: {q} (use Q1-Q22)")
+
+    times = {}
+    for q in queries:
+        if args.param_sets > 0:
+            # um tempo por conjunto de parâmetros; o resumo mostra a mediana
+            param_sets = tpch_params.param_sets(int(q[1:]), args.param_sets, args.seed, args.scale_factor)
+        else:
+            param_sets = [{}]
+        before = r.profile()
+        start = time.perf_counter_ns()
+        elapsed = []
+        for params in param_sets:
+            if params:
+                print("Parâmetros:", params)
+            t, _ = REDIS_QUERIES[q](**params)
+            elapsed.append(t)
+        times[q] = (elapsed, profile_since(before, time.perf_counter_ns() - start))
 
     print("Resumo dos tempos (s):")
-    print(f"Q1 (Redis): {t1:.3f}")
-    print(f"Q2 (Redis): {t2:.3f}")
-    print(f"Q3 (Redis): {t3:.3f}")
+    for q, (elapsed, profile) in times.items():
+        if len(elapsed) == 1:
+            print(f"{q} (Redis): {elapsed[0]:.3f}")
+        else:
+            print(f"{q} (Redis): mediana {statistics.median(elapsed):.3f}, min {min(elapsed):.3f},"
+                  f" max {max(elapsed):.3f} em {len(elapsed)} conjuntos")
+        # com vários conjuntos de parâmetros o perfil é a soma de todos
+        print(f"  {format_profile(profile)}")